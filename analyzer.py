@@ -0,0 +1,185 @@
+import os
+import re
+import string
+from collections import Counter
+from itertools import compress, count, islice
+from operator import add
+
+from zxcvbn.adjacency_graphs import ADJACENCY_GRAPHS
+
+UPPERCASE, LOWERCASE, DIGITS, SYMBOLS = range(4)
+CHARACTER_SETS = ('uppercase', 'lowercase', 'digits', 'symbols')
+
+# Character class per ASCII code point; everything else counts as a symbol
+CHAR_CLASS = [SYMBOLS] * 128
+for _chars, _char_class in ((string.ascii_uppercase, UPPERCASE),
+                            (string.ascii_lowercase, LOWERCASE),
+                            (string.digits, DIGITS)):
+    for _char in _chars:
+        CHAR_CLASS[ord(_char)] = _char_class
+
+# Successor of each character within the alphabets we treat as sequences
+SEQUENCE_ALPHABETS = (string.ascii_lowercase, string.ascii_uppercase, string.digits)
+SEQUENCE_NEXT = {
+    alphabet[i]: alphabet[i + 1]
+    for alphabet in SEQUENCE_ALPHABETS
+    for i in range(len(alphabet) - 1)
+}
+
+# Three or more of the same character in a row
+REPEAT_RX = re.compile(r'(.)\1{2,}')
+
+# Runs of at least this many adjacent keys, all stepping in the same
+# direction, count as a keyboard pattern
+KEYBOARD_MIN_RUN = int(os.environ.get("KEYBOARD_MIN_RUN", 4))
+
+class KeyboardLayout:
+    """
+    Key adjacency for one keyboard layout.
+    Shifted and unshifted characters sit on the same key, so "qwerty" and
+    "QWERTY" are the same run. Each adjacent pair records the direction of
+    its step (the neighbour's position in the zxcvbn graph), so a walk in
+    one direction ("qwer", "1qaz") can be told from the zig-zags ordinary
+    words make across the keyboard ("were", "dresser").
+    """
+
+    def __init__(self, name, graph):
+        self.name = name
+
+        # Every character printed on each key, e.g. "2" -> "2@"
+        key_chars = {}
+        for char, neighbours in graph.items():
+            key_chars.setdefault(char, char)
+            for neighbour in neighbours:
+                if neighbour:
+                    for key_char in neighbour:
+                        key_chars[key_char] = neighbour
+
+        # Character pair -> direction of the step from the first key to the second
+        self.directions = {}
+        for char, neighbours in graph.items():
+            for direction, neighbour in enumerate(neighbours):
+                if neighbour:
+                    for key_char in key_chars[char]:
+                        for neighbour_char in neighbour:
+                            self.directions[key_char + neighbour_char] = direction
+
+    @classmethod
+    def from_zxcvbn(cls, name):
+        """Load a layout from zxcvbn's adjacency graphs (qwerty, dvorak, keypad, mac_keypad)"""
+        return cls(name, ADJACENCY_GRAPHS[name])
+
+class PatternAnalyzer:
+    """
+    Table-driven pattern analysis.
+    Character counts come from one counting pass and the class of each
+    distinct character is looked up in CHAR_CLASS. Every pair of neighbouring
+    characters is looked up once in a precomputed pair table whose flags say
+    whether the pair continues a sequence or a keyboard step on each layout,
+    so only the flagged positions are visited in Python. A keyboard run
+    only continues while its steps keep the same direction.
+    """
+
+    def __init__(self, layouts=None, keyboard_min_run=KEYBOARD_MIN_RUN):
+        if layouts is None:
+            layouts = [KeyboardLayout.from_zxcvbn('qwerty')]
+        self.layouts = list(layouts)
+        self.keyboard_min_run = keyboard_min_run
+
+        # Bit 0 marks an ascending sequence step, bit k+1 a key on layout k
+        self.pair_flags = {}
+        for previous, char in SEQUENCE_NEXT.items():
+            self._flag(previous + char, 1)
+        for index, layout in enumerate(self.layouts):
+            for pair in layout.directions:
+                self._flag(pair, 2 << index)
+        self.directions = [layout.directions for layout in self.layouts]
+
+    def _flag(self, pair, bit):
+        self.pair_flags[pair] = self.pair_flags.get(pair, 0) | bit
+
+    def scan(self, password):
+        """Analyze a password and return counts, distribution and pattern flags"""
+        distribution = dict(Counter(password))
+
+        class_counts = [0, 0, 0, 0]
+        for char, occurrences in distribution.items():
+            code = ord(char)
+            class_counts[CHAR_CLASS[code] if code < 128 else SYMBOLS] += occurrences
+
+        # Runs of one character ("aaa"), counted once per run
+        repeating = sum(1 for _ in REPEAT_RX.finditer(password))
+
+        flags = list(map(self.pair_flags.get, map(add, password, islice(password, 1, None))))
+
+        sequence_starts = set()
+        last_sequence = -2
+        keyboard = 0
+        pair_run = self.keyboard_min_run - 1
+        last_key = [-2] * len(self.layouts)
+        key_runs = [0] * len(self.layouts)
+        key_directions = [None] * len(self.layouts)
+
+        for i in compress(count(), flags):
+            pair = flags[i]
+
+            # Ascending runs ("abc", "123"), counted once per distinct trigram,
+            # identified by the code point it starts at
+            if pair & 1:
+                if last_sequence == i - 1:
+                    sequence_starts.add(ord(password[i - 1]))
+                last_sequence = i
+
+            # Runs of neighbouring keys in one direction, counted once per
+            # run and layout
+            for index in range(len(last_key)):
+                if pair & (2 << index):
+                    direction = self.directions[index][password[i:i + 2]]
+                    if last_key[index] == i - 1 and key_directions[index] == direction:
+                        key_runs[index] += 1
+                    else:
+                        key_runs[index] = 1
+                    key_directions[index] = direction
+                    if key_runs[index] == pair_run:
+                        keyboard += 1
+                    last_key[index] = i
+
+        character_sets = dict(zip(CHARACTER_SETS, class_counts))
+        sequential = len(sequence_starts)
+
+        return {
+            'length': len(password),
+            'character_sets': character_sets,
+            'repeating_chars': repeating,
+            'sequential_chars': sequential,
+            'keyboard_patterns': keyboard,
+            'character_distribution': distribution,
+            'patterns': {
+                'sequential': sequential > 0,
+                'repeated': repeating > 0,
+                'keyboard_pattern': keyboard > 0
+            }
+        }
+
+def username_similarity(username, password):
+    """
+    Character-overlap similarity of a password to a username, as a
+    percentage. Cheap enough to vectorize (see batch_analyzer); the
+    edit-distance based score /analyze reports is in similarity.py.
+    """
+    if not username:
+        return 0
+
+    # Simple check for username being contained in password
+    if username.lower() in password.lower():
+        return 100
+
+    # Calculate similarity percentage (very simple algorithm)
+    common_chars = set(username.lower()) & set(password.lower())
+    return int((len(common_chars) / len(username)) * 100)
+
+def analyzer_from_env():
+    """Build the analyzer for the layouts named in KEYBOARD_LAYOUTS"""
+    names = os.environ.get("KEYBOARD_LAYOUTS", "qwerty")
+    layouts = [KeyboardLayout.from_zxcvbn(name.strip()) for name in names.split(",") if name.strip()]
+    return PatternAnalyzer(layouts)
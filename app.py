@@ -1,34 +1,202 @@
 import os
 import re
+import secrets
 import logging
-import random
 import string
 import math
+import threading
 import json
 import time
+import functools
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, session
-import zxcvbn
+from flask import Flask, Response, render_template, request, jsonify, session, stream_with_context
+from flask.sessions import SecureCookieSessionInterface
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Map the precompiled dictionaries (ZXCVBN_DICTIONARY_PATH) before anything
+# imports zxcvbn, so its frequency lists are never loaded into this process
+import dictionaries
+dictionaries.install_from_env()
+
+from zxcvbn import time_estimates
+
+import audit
+import export
+import metrics
+import responses
+from breach import breach_index_from_env
+from generator import get_profile
+from history import history_from_env
+from incremental import EvaluatorStore, ResyncRequired
+from passphrase import DEFAULT_ENTROPY_BITS, get_passphrase_profile
+from policy import Policy, PolicyProfile
+from responses import EVERYTHING, FieldSelection
+from score_cache import cache_from_env, redact
+from scoring_pool import ScoringUnavailable, executor_from_env
+from similarity import SIMILARITY_WARNING, attribute_similarity, user_attributes
+from single_flight import single_flight_from_env
+from strength import (MAX_PASSWORD_LENGTH, analyze_password_patterns, check_length, is_common_password,
+                      pattern_analyzer, run_zxcvbn, summarize_strength)
+
+# Configure logging (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATE)
+metrics.configure_logging()
 
 # Create the Flask application
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "default_secret_key")
 
-# Word lists for different password generation methods
-COMMON_WORDS = ["apple", "orange", "banana", "grape", "melon", "cherry", "lemon",
-             "kiwi", "peach", "plum", "mango", "berry", "pear", "lime", "fig"]
+# Serialize responses with orjson when it is installed
+app.json = responses.JSONProvider(app)
+
+class TimedSessionInterface(SecureCookieSessionInterface):
+    """
+    Cookie sessions with loading and saving timed as the session stage.
+    Flask opens the session before anything else runs for a request, so
+    the request timer starts here, and saving it is the last step before
+    the response goes out, so the Server-Timing header is written here.
+    """
+
+    def open_session(self, app, request):
+        metrics.start_request()
+        with metrics.stage('session'):
+            return super().open_session(app, request)
+
+    def save_session(self, app, session, response):
+        with metrics.stage('session'):
+            super().save_session(app, session, response)
+        timer = metrics.current_request()
+        if metrics.SERVER_TIMING and timer is not None:
+            response.headers['Server-Timing'] = timer.server_timing()
+
+app.session_interface = TimedSessionInterface()
+
+# Optional cache of zxcvbn results, keyed on an HMAC of the password
+strength_cache = cache_from_env()
+if strength_cache is not None:
+    metrics.registry.add_collector('padlock_score_cache', strength_cache.stats,
+                                   counters=('hits', 'misses', 'evictions', 'expirations'))
+
+# Concurrent requests scoring the same password share one zxcvbn run
+# (SINGLE_FLIGHT_ENABLED=0 to disable)
+scoring_flight = single_flight_from_env()
+if scoring_flight is not None:
+    metrics.registry.add_collector('padlock_single_flight', scoring_flight.stats,
+                                   counters=('calls', 'coalesced'))
+
+# Process pool for zxcvbn scoring, enabled with SCORING_WORKERS. Each
+# process starts its own on first use: a forked child (a gunicorn --preload
+# worker) gets a copy of the parent's pool without its manager threads, so
+# every job sent to it would time out
+scoring_executor = None
+scoring_executor_started = False
+scoring_executor_lock = threading.Lock()
+
+def get_scoring_executor():
+    """This process's scoring pool, started on first use; None to score in-process"""
+    global scoring_executor, scoring_executor_started
+    if not scoring_executor_started:
+        with scoring_executor_lock:
+            if not scoring_executor_started:
+                scoring_executor = executor_from_env()
+                scoring_executor_started = True
+    return scoring_executor
+
+def set_scoring_executor(executor):
+    """Use executor (None to score in-process) instead of starting a pool"""
+    global scoring_executor, scoring_executor_started
+    with scoring_executor_lock:
+        scoring_executor = executor
+        scoring_executor_started = True
+
+def reset_scoring_executor():
+    """In a forked child, forget the parent's pool so the child starts its own"""
+    global scoring_executor, scoring_executor_started, scoring_executor_lock
+    scoring_executor = None
+    scoring_executor_started = False
+    scoring_executor_lock = threading.Lock()
 
-ADJECTIVES = ["happy", "brave", "calm", "wise", "kind", "quick", "bold", "bright", 
-           "clever", "fierce", "gentle", "grand", "lively", "noble", "proud"]
+def scoring_pool_stats():
+    return scoring_executor.stats() if scoring_executor is not None else {}
 
-NOUNS = ["tiger", "river", "mountain", "ocean", "forest", "eagle", "castle", 
-         "garden", "island", "journey", "legend", "meteor", "planet", "shadow", "thunder"]
+if int(os.environ.get("SCORING_WORKERS", 0)) > 0:
+    metrics.registry.add_collector('padlock_scoring_pool', scoring_pool_stats,
+                                   counters=('submitted', 'rejected', 'timeouts'))
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_scoring_executor)
 
-VERBS = ["runs", "jumps", "flies", "builds", "creates", "dreams", "explores", 
-         "fights", "grows", "holds", "leads", "moves", "seeks", "shines", "wins"]
+# Stand-in strength result when the scoring pool cannot answer in time
+DEGRADED_STRENGTH = {
+    'crack_time': None,
+    'score': None,
+    'feedback': {},
+    'entropy': None,
+    'raw_result': {},
+    'degraded': True
+}
+
+# Strength result for a generated password too long for zxcvbn whose
+# entropy is not known exactly either
+UNSCORED_STRENGTH = {
+    'crack_time': None,
+    'score': None,
+    'feedback': {},
+    'entropy': None,
+    'raw_result': {}
+}
+
+# Server-side password history (HISTORY_BACKEND, HISTORY_DEPTH)
+history_store = history_from_env()
+
+# Per-client state for keystroke-by-keystroke checking
+incremental_evaluators = EvaluatorStore()
+
+# Local breach corpus index (BREACH_INDEX_PATH), None when not configured
+breach_index = breach_index_from_env()
+
+# How many passwords generation tries before settling for a breached one
+GENERATOR_MAX_ATTEMPTS = max(1, int(os.environ.get("GENERATOR_MAX_ATTEMPTS", 10)))
+
+# Upper bound on how many passwords a single batch request may ask for
+BATCH_MAX_COUNT = int(os.environ.get("BATCH_MAX_COUNT", 50000))
+
+# Upper bound on how many fresh passwords one streamed export may generate
+EXPORT_MAX_COUNT = int(os.environ.get("EXPORT_MAX_COUNT", 1000000))
+
+# Human-readable name for each zxcvbn score
+STRENGTH_LABELS = ["Very Weak", "Weak", "Fair", "Good", "Strong"]
+
+# Top-level response fields per endpoint for ?fields=, and the summary
+# each returns in compact mode
+CHECK_FIELDS = ('crack_time', 'score', 'feedback', 'entropy', 'analysis', 'common_password',
+                'breached', 'breach_count', 'attribute_similarity', 'score_percent', 'strength', 'degraded')
+CHECK_COMPACT = ('score', 'strength', 'score_percent', 'crack_time', 'breached', 'degraded')
+ANALYZE_FIELDS = ('basic_analysis', 'strength', 'character_distribution', 'username_similarity',
+                  'attribute_similarity', 'patterns_detected', 'breached', 'breach_count')
+ANALYZE_COMPACT = ('strength.score', 'strength.crack_time', 'strength.entropy', 'strength.feedback',
+                   'strength.degraded', 'patterns_detected', 'breached')
+GENERATE_FIELDS = ('password', 'crack_time', 'score', 'feedback', 'entropy', 'analysis', 'entropy_bits',
+                   'degraded', 'breached', 'breach_count', 'policy')
+GENERATE_COMPACT = ('password', 'score', 'crack_time', 'entropy_bits', 'breached', 'degraded')
+# A generated password is only ever shown once, so no selection drops it
+GENERATE_REQUIRED = ('password',)
+
+# /check and /generate fields that need a zxcvbn result
+STRENGTH_FIELDS = ('crack_time', 'score', 'feedback', 'entropy', 'common_password',
+                   'score_percent', 'strength', 'degraded')
+
+def get_generator_profile(use_uppercase=True, use_lowercase=True, use_digits=True,
+                          use_symbols=True, method="random", pattern=None,
+                          exclude_similar=False, exclude_ambiguous=False):
+    """Look up the compiled generator profile for a set of options"""
+    return get_profile(
+        use_uppercase=bool(use_uppercase),
+        use_lowercase=bool(use_lowercase),
+        use_digits=bool(use_digits),
+        use_symbols=bool(use_symbols),
+        method=str(method),
+        pattern=str(pattern) if pattern else None,
+        exclude_similar=bool(exclude_similar),
+        exclude_ambiguous=bool(exclude_ambiguous)
+    )
 
 # Enhanced password generation
 def generate_password(length=16, use_uppercase=True, use_lowercase=True, 
@@ -38,234 +206,137 @@ def generate_password(length=16, use_uppercase=True, use_lowercase=True,
     Generates a password based on user preferences.
     Returns the generated password.
     """
-    # Define character sets
-    uppercase_chars = string.ascii_uppercase
-    lowercase_chars = string.ascii_lowercase
-    digit_chars = string.digits
-    symbol_chars = "!@#$%^&*()_-+=<>?"
-    
-    # Apply exclusions
-    if exclude_similar:
-        # Remove similar characters like l/1/I, 0/O, etc.
-        chars_to_remove = "il1Lo0O"
-        uppercase_chars = ''.join(c for c in uppercase_chars if c not in chars_to_remove)
-        lowercase_chars = ''.join(c for c in lowercase_chars if c not in chars_to_remove)
-        digit_chars = ''.join(c for c in digit_chars if c not in chars_to_remove)
-    
-    if exclude_ambiguous:
-        # Remove potentially confusing symbols
-        ambiguous_symbols = "{}[]()/'\"\\`~,;:.<>"
-        symbol_chars = ''.join(c for c in symbol_chars if c not in ambiguous_symbols)
-    
-    # Create the character pool based on user preferences
-    chars = ""
-    if use_uppercase:
-        chars += uppercase_chars
-    if use_lowercase:
-        chars += lowercase_chars
-    if use_digits:
-        chars += digit_chars
-    if use_symbols:
-        chars += symbol_chars
-    
-    # Fallback to lowercase if no options are selected
-    if not chars:
-        chars = lowercase_chars
-    
-    # Generate password based on method
-    if method == "random":
-        # Simple random password generation
-        password = ''.join(random.choice(chars) for _ in range(length))
-        
-        # Ensure password contains at least one character from each selected set
-        if length >= 4:
-            required_chars = []
-            if use_uppercase:
-                required_chars.append(random.choice(uppercase_chars))
-            if use_lowercase:
-                required_chars.append(random.choice(lowercase_chars))
-            if use_digits:
-                required_chars.append(random.choice(digit_chars))
-            if use_symbols:
-                required_chars.append(random.choice(symbol_chars))
-            
-            # Replace first few characters with required characters
-            for i, c in enumerate(required_chars):
-                if i < length:
-                    position = random.randint(0, length - 1)
-                    password = password[:position] + c + password[position+1:]
-    
-    elif method == "memorable":
-        # Memorable password with words
-        num_words = max(2, length // 6)
-        selected_words = random.sample(COMMON_WORDS, min(num_words, len(COMMON_WORDS)))
-        
-        # Capitalize first letter of each word if uppercase is enabled
-        if use_uppercase:
-            selected_words = [word.capitalize() for word in selected_words]
-        
-        # Add digits if enabled
-        if use_digits:
-            selected_words.append(str(random.randint(10, 999)))
-        
-        # Add symbols if enabled
-        if use_symbols:
-            selected_words.append(random.choice(symbol_chars) + random.choice(symbol_chars))
-        
-        # Join words and truncate/pad to desired length
-        password = "".join(selected_words)
-        if len(password) > length:
-            password = password[:length]
-        elif len(password) < length:
-            # Pad with random characters
-            password += ''.join(random.choice(chars) for _ in range(length - len(password)))
-    
-    elif method == "pattern":
-        # Pattern-based password generation
-        if not pattern:
-            pattern = "AvAnDvD"  # Default pattern: Adjective-verb-Adjective-noun-Digit-verb-Digit
-        
-        password = ""
-        for char in pattern:
-            if char == 'A':
-                word = random.choice(ADJECTIVES)
-                password += word.capitalize() if use_uppercase else word
-            elif char == 'N':
-                word = random.choice(NOUNS)
-                password += word.capitalize() if use_uppercase else word
-            elif char == 'V':
-                word = random.choice(VERBS)
-                password += word.capitalize() if use_uppercase else word
-            elif char == 'C':
-                password += random.choice(uppercase_chars if use_uppercase else lowercase_chars)
-            elif char == 'c':
-                password += random.choice(lowercase_chars)
-            elif char == 'D':
-                if use_digits:
-                    password += random.choice(digit_chars)
-                else:
-                    password += random.choice(lowercase_chars)
-            elif char == 'S':
-                if use_symbols:
-                    password += random.choice(symbol_chars)
-                else:
-                    password += random.choice(lowercase_chars)
-            else:
-                password += char
-        
-        # Truncate to length if needed
-        if len(password) > length:
-            password = password[:length]
-        elif len(password) < length:
-            # Pad with random characters
-            password += ''.join(random.choice(chars) for _ in range(length - len(password)))
-    
-    elif method == "xkcd":
-        # XKCD style - four random words separated by a symbol
-        separator = random.choice(symbol_chars) if use_symbols else "-"
-        words = random.sample(COMMON_WORDS + ADJECTIVES + NOUNS, 4)
-        
-        # Capitalize if requested
-        if use_uppercase:
-            words = [word.capitalize() for word in words]
-            
-        # Add a number if requested
-        if use_digits:
-            words[-1] = words[-1] + str(random.randint(10, 99))
-            
-        password = separator.join(words)
-        
-        # Truncate if needed
-        if len(password) > length:
-            password = password[:length]
-    
-    elif method == "pin":
-        # PIN style - all digits
-        if use_digits:
-            password = ''.join(random.choice(digit_chars) for _ in range(length))
-        else:
-            # Fallback to lowercase if digits aren't allowed
-            password = ''.join(random.choice(lowercase_chars) for _ in range(length))
-    
+    profile = get_generator_profile(use_uppercase, use_lowercase, use_digits, use_symbols,
+                                    method, pattern, exclude_similar, exclude_ambiguous)
+    return generate_unbreached(profile, length)
+
+def generate_unbreached(profile, length):
+    """
+    Generates a password, rejecting and retrying ones found in the breach
+    corpus. After GENERATOR_MAX_ATTEMPTS the last attempt is returned, and
+    callers report it as breached.
+    """
+    for _ in range(GENERATOR_MAX_ATTEMPTS):
+        with metrics.stage('generation'):
+            password = profile.generate(length)
+        if not breach_count(password):
+            break
     return password
 
-def estimate_crack_time(password):
+def breach_count(password):
+    """How often the password appears in the breach corpus; None without an index"""
+    if breach_index is None:
+        return None
+    with metrics.stage('breach_lookup'):
+        return breach_index.count(password)
+
+def breach_fields(password):
+    """The breached/breach_count fields reported for a password"""
+    count = breach_count(password)
+    return {'breached': None if count is None else count > 0, 'breach_count': count}
+
+def generate_passwords(count, score=False, profile=None, **options):
     """
-    Estimates the time it would take to crack a password.
-    Returns a human-readable time string and score (0-4).
+    Generates a batch of passwords sharing one set of options.
+    The generator profile is compiled once for the whole batch, or passed
+    in ready-made. When score is set, each distinct password is scored
+    once and the results are returned alongside the passwords in the same
+    order; passwords too long for zxcvbn get None for every figure.
     """
-    # Use zxcvbn for password strength analysis
-    result = zxcvbn.zxcvbn(password)
-    
-    # Get crack time in human-readable format
-    crack_time = result['crack_times_display']['offline_slow_hashing_1e4_per_second']
-    
-    # Get score (0-4, where 0 is very weak and 4 is very strong)
-    score = result['score']
+    length = options.pop('length', 16)
+    if profile is None:
+        profile = get_generator_profile(**options)
+    passwords = [generate_unbreached(profile, length) for _ in range(count)]
+    
+    if not score:
+        return {'passwords': passwords}
+    
+    # Score each distinct password only once (short PINs repeat often)
+    scored = {}
+    for password in passwords:
+        if password not in scored:
+            try:
+                strength_info = estimate_crack_time(password)
+            except ValueError:
+                # Too long for zxcvbn, return it unscored
+                scored[password] = {'score': None, 'crack_time': None, 'entropy': None}
+                continue
+            scored[password] = {
+                'score': strength_info['score'],
+                'crack_time': strength_info['crack_time'],
+                'entropy': strength_info['entropy']
+            }
     
     return {
-        'crack_time': crack_time,
-        'score': score,
-        'feedback': result.get('feedback', {}),
-        'entropy': result['guesses_log10'],
-        'raw_result': result
+        'passwords': passwords,
+        'strength': [scored[password] for password in passwords]
     }
 
-def analyze_password_patterns(password):
-    """Analyze patterns in the password for additional insights"""
-    analysis = {
-        'length': len(password),
-        'character_sets': {
-            'uppercase': 0,
-            'lowercase': 0,
-            'digits': 0,
-            'symbols': 0
-        },
-        'repeating_chars': 0,
-        'sequential_chars': 0,
-        'keyboard_patterns': 0
+def estimate_crack_time(password, degrade=False):
+    """
+    Estimates the time it would take to crack a password.
+    Returns a human-readable time string and score (0-4).
+    Results are served from strength_cache when it is enabled. Cached
+    results are redacted, so raw_result then lacks the password and the
+    match sequence, on hits and misses alike. With degrade set, a
+    saturated or slow scoring pool yields DEGRADED_STRENGTH instead of
+    raising ScoringUnavailable.
+    """
+    try:
+        if strength_cache is None:
+            return score_shared(password)
+        
+        strength_info = strength_cache.get(password)
+        if strength_info is None:
+            strength_info = redact(score_shared(password))
+            strength_cache.put(password, strength_info)
+        return strength_info
+    except ScoringUnavailable as e:
+        if not degrade:
+            raise
+        metrics.registry.increment('padlock_degraded_responses_total')
+        logging.warning(f"Returning degraded strength result: {str(e)}")
+        return DEGRADED_STRENGTH
+
+def analytic_strength(entropy_bits):
+    """
+    Strength fields for a generated password from its analytic entropy,
+    in the same shape as summarize_strength but without running zxcvbn.
+    """
+    attack_times = time_estimates.estimate_attack_times(2 ** entropy_bits)
+    return {
+        'crack_time': attack_times['crack_times_display']['offline_slow_hashing_1e4_per_second'],
+        'score': attack_times['score'],
+        'feedback': {},
+        'entropy': entropy_bits * math.log10(2),
+        'raw_result': {},
+        'analytic': True
     }
-    
-    # Count character types
-    for char in password:
-        if char in string.ascii_uppercase:
-            analysis['character_sets']['uppercase'] += 1
-        elif char in string.ascii_lowercase:
-            analysis['character_sets']['lowercase'] += 1
-        elif char in string.digits:
-            analysis['character_sets']['digits'] += 1
-        else:
-            analysis['character_sets']['symbols'] += 1
-    
-    # Check for repeating characters (e.g., "aaa")
-    repeats = re.findall(r'(.)\1{2,}', password)
-    analysis['repeating_chars'] = len(repeats)
-    
-    # Check for sequential characters (e.g., "abc", "123")
-    sequences = [
-        'abcdefghijklmnopqrstuvwxyz',
-        'ABCDEFGHIJKLMNOPQRSTUVWXYZ',
-        '0123456789'
-    ]
-    
-    for seq in sequences:
-        for i in range(len(seq) - 2):
-            if seq[i:i+3] in password:
-                analysis['sequential_chars'] += 1
-    
-    # Check for common keyboard patterns (simplified)
-    keyboard_patterns = [
-        'qwerty', 'asdfgh', 'zxcvbn', '123456', 'qazwsx'
-    ]
-    
-    for pattern in keyboard_patterns:
-        if pattern in password.lower():
-            analysis['keyboard_patterns'] += 1
-    
-    return analysis
+
+def score_shared(password):
+    """score_password, run once for concurrent requests with the same password"""
+    if scoring_flight is None:
+        return score_password(password)
+    return scoring_flight.run(password, score_password, password)
+
+def score_password(password):
+    """Runs zxcvbn on a password and extracts the fields we report"""
+    # Refuse what zxcvbn would refuse before it costs a pool job
+    check_length(password)
+    
+    # Use zxcvbn for password strength analysis, in the pool when enabled
+    executor = get_scoring_executor()
+    if executor is not None:
+        with metrics.stage('zxcvbn_pool'):
+            return summarize_strength(executor.score(password))
+    return summarize_strength(run_zxcvbn(password))
 
 def get_password_suggestions(password_analysis, strength_info):
     """Generate suggestions based on password analysis"""
+    with metrics.stage('suggestions'):
+        return _password_suggestions(password_analysis, strength_info)
+
+def _password_suggestions(password_analysis, strength_info):
     suggestions = []
     
     # Use feedback from zxcvbn if available
@@ -300,81 +371,300 @@ def get_password_suggestions(password_analysis, strength_info):
     # Remove duplicates and return
     return list(set(suggestions))
 
-def add_to_history(password, strength_score, crack_time):
-    """Add a password to the session history"""
-    if 'password_history' not in session:
-        session['password_history'] = []
-    
-    # Add password with timestamp and truncate to latest 10
-    history_item = {
+def get_history_id(create=False):
+    """
+    Return the opaque id that keys this client's history.
+    The session cookie only ever carries this id; it is set once.
+    """
+    history_id = session.get('history_id')
+    if history_id is None and create:
+        history_id = session['history_id'] = secrets.token_urlsafe(16)
+    return history_id
+
+def make_history_item(password, strength_score, crack_time):
+    """A history entry for a generated password, stamped now"""
+    return {
         'password': password,
         'score': strength_score,
         'crack_time': crack_time,
         'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
+
+def add_to_history(password, strength_score, crack_time):
+    """Add a password to the session history"""
+    # The backend keeps the newest HISTORY_DEPTH items
+    history_store.append(get_history_id(create=True), make_history_item(password, strength_score, crack_time))
+
+def get_user_attributes(data):
+    """Username, e-mail and display name from a request payload, for similarity checks"""
+    return user_attributes(data.get('username'), data.get('email'), data.get('display_name'))
+
+def request_fields(data, known, compact, required=()):
+    """The FieldSelection for this request's fields= and compact options"""
+    return FieldSelection.from_request(data, request.args, known, compact, required)
+
+def build_check_result(password, strength_info, attributes=None, fields=EVERYTHING):
+    """
+    Builds the /check response body from a strength result.
+    With user attributes, also reports how closely the password resembles each.
+    Only the sections fields selects are computed; strength_info may be
+    None when it selects none of STRENGTH_FIELDS.
+    """
+    result = {}
+    
+    if strength_info is not None:
+        # Get score (0-4, where 0 is very weak and 4 is very strong)
+        score = strength_info['score']
+        result.update({
+            'crack_time': strength_info['crack_time'],
+            'score': score,
+            'entropy': strength_info['entropy'],
+            'common_password': is_common_password(strength_info)
+        })
+        if strength_info.get('degraded'):
+            result.update({'score_percent': 0, 'strength': "Unavailable", 'degraded': True})
+        else:
+            # Convert score to percentage for progress bar
+            result.update({
+                'score_percent': (score / 4) * 100,
+                'strength': STRENGTH_LABELS[score],
+                'degraded': False
+            })
     
-    # Add to front of list
-    session['password_history'].insert(0, history_item)
+    # Perform extended analysis
+    analysis = None
+    if fields.wants('analysis', 'feedback'):
+        analysis = result['analysis'] = analyze_password_patterns(password)
+    
+    # Check the local breach corpus
+    if fields.wants('breached', 'breach_count', 'feedback'):
+        result.update(breach_fields(password))
+    
+    # Compare against the user's own details
+    similarity = {}
+    if attributes and fields.wants('attribute_similarity', 'feedback'):
+        with metrics.stage('similarity'):
+            similarity = attribute_similarity(password, attributes)
+        result['attribute_similarity'] = similarity
+    
+    if fields.wants('feedback'):
+        # Get custom suggestions
+        suggestions = get_password_suggestions(analysis, strength_info)
+        
+        # Get common password check
+        if result['common_password']:
+            if "This is a commonly used password" not in suggestions:
+                suggestions.append("This is a commonly used password or pattern")
+        
+        if result['breached']:
+            suggestions.append("This password has appeared in a data breach, do not use it")
+        
+        if similarity and max(similarity.values()) >= SIMILARITY_WARNING:
+            suggestions.append("Avoid basing your password on your username, e-mail or name")
+        result['feedback'] = suggestions
     
-    # Limit to 10 items
-    session['password_history'] = session['password_history'][:10]
-    session.modified = True
+    return fields.project(result)
+
+@app.after_request
+def record_response(response):
+    """Label the request's timings with its route and status"""
+    timer = metrics.current_request()
+    if timer is not None:
+        timer.route = request.url_rule.rule if request.url_rule else 'unmatched'
+        timer.method = request.method
+        timer.status = response.status_code
+    return response
+
+@app.teardown_request
+def finish_request_timing(exc):
+    """Record the request's latency once it is done, streamed bodies included"""
+    timer = metrics.current_request()
+    if timer is not None and not timer.status:
+        timer.route = request.url_rule.rule if request.url_rule else 'unmatched'
+        timer.method = request.method
+        timer.status = 500
+    metrics.finish_request(timer)
+
+@app.after_request
+def compress_response(response):
+    """Encode larger JSON and text bodies with the best encoding the client accepts"""
+    if not responses.COMPRESSION_ENABLED or not responses.compressible(response.mimetype or ''):
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.status_code < 200 or response.status_code in (204, 304)):
+        return response
+    
+    encoding = responses.negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < responses.COMPRESS_MIN_SIZE:
+        return response
+    with metrics.stage('compression'):
+        response.set_data(responses.compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Latency summaries and cache and pool counters in the Prometheus text format"""
+    if not metrics.METRICS_ENABLED:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/')
 def index():
     """Renders the main page."""
     return render_template('index.html')
 
-@app.route('/generate', methods=['POST'])
-def generate():
-    """Generates a password based on user preferences."""
-    data = request.get_json() or {}
-    
-    # Get parameters with defaults
-    length = max(6, min(128, int(data.get('length', 16))))
-    use_uppercase = data.get('uppercase', True)
-    use_lowercase = data.get('lowercase', True)
-    use_digits = data.get('digits', True)
-    use_symbols = data.get('symbols', True)
-    method = data.get('method', 'random')
-    pattern = data.get('pattern', None)
-    exclude_similar = data.get('exclude_similar', False)
-    exclude_ambiguous = data.get('exclude_ambiguous', False)
+def parse_generation_options(data):
+    """Read generator options from a request payload, applying defaults"""
+    return {
+        'length': max(6, min(128, int(data.get('length', 16)))),
+        'use_uppercase': data.get('uppercase', True),
+        'use_lowercase': data.get('lowercase', True),
+        'use_digits': data.get('digits', True),
+        'use_symbols': data.get('symbols', True),
+        'method': data.get('method', 'random'),
+        'pattern': data.get('pattern', None),
+        'exclude_similar': data.get('exclude_similar', False),
+        'exclude_ambiguous': data.get('exclude_ambiguous', False)
+    }
+
+def parse_passphrase_options(data):
+    """Read passphrase options from a request payload, applying defaults"""
+    def optional_int(key):
+        return int(data[key]) if data.get(key) is not None else None
     
+    return {
+        'entropy_bits': max(20.0, min(256.0, float(data.get('entropy_bits', DEFAULT_ENTROPY_BITS)))),
+        'separators': str(data.get('separators', '-')),
+        'capitalize': str(data.get('capitalize', 'lower')),
+        'digits': max(0, min(8, int(data.get('digit_count', 0)))),
+        'min_word_length': optional_int('min_word_length'),
+        'max_word_length': optional_int('max_word_length'),
+        'part_of_speech': str(data['part_of_speech']) if data.get('part_of_speech') else None
+    }
+
+def request_generator(data):
+    """
+    The compiled profile and length for a request's generator options.
+    {"method": "passphrase"} selects the passphrase generator, which
+    targets entropy_bits instead of a length. A "policy" object selects
+    the policy generator, with the length moved into the policy's bounds
+    and the user's details forbidden unless the policy says otherwise.
+    """
+    if data.get('method') == 'passphrase':
+        return get_passphrase_profile(**parse_passphrase_options(data)), None
+    if data.get('policy') is not None:
+        policy = Policy.from_dict(data['policy'])
+        forbidden = policy.forbidden_substrings(get_user_attributes(data))
+        profile = PolicyProfile(policy, int(data.get('length', 16)), forbidden)
+        return profile, profile.length
+    options = parse_generation_options(data)
+    length = options.pop('length')
+    return get_generator_profile(**options), length
+
+def build_generate_result(data, fields=EVERYTHING):
+    """
+    Generates a password for a /generate payload and builds the response
+    body. Raises ValueError for invalid generator options. Sections fields
+    does not select are not computed; the password is always included.
+    """
     # Generate password
-    password = generate_password(
-        length=length,
-        use_uppercase=use_uppercase,
-        use_lowercase=use_lowercase,
-        use_digits=use_digits,
-        use_symbols=use_symbols,
-        method=method,
-        pattern=pattern,
-        exclude_similar=exclude_similar,
-        exclude_ambiguous=exclude_ambiguous
-    )
-    
-    # Estimate crack time
-    strength_info = estimate_crack_time(password)
+    profile, length = request_generator(data)
+    password = generate_unbreached(profile, length)
+    entropy_bits = getattr(profile, 'entropy', None)
+    result = {'password': password, 'entropy_bits': entropy_bits}
+    
+    strength_info = None
+    if fields.wants(*STRENGTH_FIELDS):
+        # Passphrases and policies know their entropy, so zxcvbn can be
+        # skipped when the caller asks for the analytic figure only, and is
+        # when the password is too long for it (a passphrase at a high
+        # entropy target, a policy with a long min_length). A policy with repeat or forbidden substring rules
+        # only estimates it, and an estimate is not offered as the
+        # password's strength.
+        exact = not isinstance(profile, PolicyProfile) or profile.exact
+        too_long = len(password) > MAX_PASSWORD_LENGTH
+        if entropy_bits is not None and exact and (too_long or not data.get('score', True)):
+            strength_info = analytic_strength(entropy_bits)
+        elif too_long:
+            # A long policy password with repeat or forbidden rules, or a
+            # long random one: nothing can score it, so it goes out unscored
+            strength_info = UNSCORED_STRENGTH
+        else:
+            # Estimate crack time
+            strength_info = estimate_crack_time(password, degrade=True)
+        result.update({
+            'crack_time': strength_info['crack_time'],
+            'score': strength_info['score'],
+            'entropy': strength_info['entropy'],
+            'degraded': bool(strength_info.get('degraded'))
+        })
     
     # Perform extended analysis
-    analysis = analyze_password_patterns(password)
+    if fields.wants('analysis', 'feedback'):
+        result['analysis'] = analyze_password_patterns(password)
     
     # Get custom suggestions
-    suggestions = get_password_suggestions(analysis, strength_info)
+    if fields.wants('feedback'):
+        result['feedback'] = get_password_suggestions(result['analysis'], strength_info)
+    
+    if fields.wants('breached', 'breach_count'):
+        result.update(breach_fields(password))
+    
+    # Report what the policy costs in entropy
+    if isinstance(profile, PolicyProfile) and fields.wants('policy'):
+        result['policy'] = profile.report()
+    
+    return result
+
+@app.route('/generate', methods=['POST'])
+def generate():
+    """Generates a password based on user preferences."""
+    data = request.get_json() or {}
+    
+    try:
+        fields = request_fields(data, GENERATE_FIELDS, GENERATE_COMPACT, GENERATE_REQUIRED)
+        result = build_generate_result(data, fields)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
     # Add to password history
-    add_to_history(password, strength_info['score'], strength_info['crack_time'])
+    add_to_history(result['password'], result.get('score'), result.get('crack_time'))
     
     # Return response
-    return jsonify({
-        'password': password,
-        'crack_time': strength_info['crack_time'],
-        'score': strength_info['score'],
-        'feedback': suggestions,
-        'entropy': strength_info['entropy'],
-        'analysis': analysis
-    })
+    return jsonify(fields.project(result))
+
+@app.route('/generate/batch', methods=['POST'])
+def generate_batch():
+    """Generates many passwords with the same options in one request."""
+    data = request.get_json() or {}
+    
+    try:
+        count = int(data.get('count', 10))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Count must be an integer"}), 400
+    
+    if count < 1 or count > BATCH_MAX_COUNT:
+        return jsonify({"error": f"Count must be between 1 and {BATCH_MAX_COUNT}"}), 400
+    
+    try:
+        profile, length = request_generator(data)
+        result = generate_passwords(count, score=bool(data.get('score', False)),
+                                    profile=profile, length=length)
+        result['count'] = count
+        result['entropy_bits'] = getattr(profile, 'entropy', None)
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except ScoringUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        logging.error(f"Error generating password batch: {str(e)}")
+        return jsonify({"error": f"Error generating password batch: {str(e)}"}), 500
 
 @app.route('/check', methods=['POST'])
 def check_password():
@@ -386,49 +676,72 @@ def check_password():
         return jsonify({"error": "No password provided"}), 400
     
     try:
-        # Estimate crack time using zxcvbn
-        strength_info = estimate_crack_time(password)
-        
-        # Perform extended analysis
-        analysis = analyze_password_patterns(password)
-        
-        # Get custom suggestions
-        suggestions = get_password_suggestions(analysis, strength_info)
-        
-        # Get common password check
-        common_password = False
-        if strength_info['raw_result'].get('guesses', 0) < 1000:
-            common_password = True
-            if "This is a commonly used password" not in suggestions:
-                suggestions.append("This is a commonly used password or pattern")
-        
-        # Get score (0-4, where 0 is very weak and 4 is very strong)
-        score = strength_info['score']
+        fields = request_fields(data, CHECK_FIELDS, CHECK_COMPACT)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        # Estimate crack time using zxcvbn, unless no field needs it
+        strength_info = None
+        if fields.wants(*STRENGTH_FIELDS):
+            strength_info = estimate_crack_time(password, degrade=True)
+        return jsonify(build_check_result(password, strength_info, get_user_attributes(data), fields))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error checking password: {str(e)}")
+        return jsonify({"error": f"Error checking password: {str(e)}"}), 500
+
+@app.route('/check/incremental', methods=['POST'])
+def check_password_incremental():
+    """
+    Evaluates a password from an edit delta against the previous check.
+    Send {"password": ...} to start, then {"token", "revision", "keep",
+    "append"} where keep is how many characters of the last checked password
+    are unchanged. A 409 response means the client should resend in full.
+    """
+    data = request.get_json() or {}
+    
+    try:
+        if 'password' in data:
+            token, evaluator = incremental_evaluators.create()
+            keep, append = 0, str(data['password'])
+        else:
+            token = data.get('token', '')
+            evaluator = incremental_evaluators.get(token)
+            keep, append = int(data.get('keep', 0)), str(data.get('append', ''))
+            if evaluator is None:
+                return jsonify({"error": "Unknown or expired token", "resync": True}), 409
         
-        # Convert score to percentage for progress bar
-        score_percent = (score / 4) * 100
+        with evaluator.lock:
+            if 'password' not in data and data.get('revision') != evaluator.revision:
+                return jsonify({"error": "Revision mismatch", "resync": True}), 409
+            result = evaluator.update(keep, append)
+            password = evaluator.password
+            revision = evaluator.revision
         
-        # Return the results
-        return jsonify({
-            'crack_time': strength_info['crack_time'],
-            'score': score,
-            'score_percent': score_percent,
-            'feedback': suggestions,
-            'entropy': strength_info['entropy'],
-            'analysis': analysis,
-            'common_password': common_password,
-            'strength': ["Very Weak", "Weak", "Fair", "Good", "Strong"][score]
-        })
+        response = {'token': token, 'revision': revision, 'length': len(password)}
+        if result is not None:
+            response.update(build_check_result(password, summarize_strength(result), get_user_attributes(data)))
+        return jsonify(response)
+    except ResyncRequired as e:
+        return jsonify({"error": str(e), "resync": True}), 409
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        logging.error(f"Error checking password: {str(e)}")
+        logging.error(f"Error checking password incrementally: {str(e)}")
         return jsonify({"error": f"Error checking password: {str(e)}"}), 500
 
 @app.route('/history', methods=['GET'])
 def get_history():
-    """Return password generation history"""
+    """Return password generation history, newest first, one page at a time"""
     try:
-        history = session.get('password_history', [])
-        return jsonify({'history': history})
+        page = max(1, request.args.get('page', 1, type=int))
+        per_page = max(1, min(100, request.args.get('per_page', 10, type=int)))
+        
+        history_id = get_history_id()
+        history, total = history_store.page(history_id, (page - 1) * per_page, per_page) if history_id else ([], 0)
+        return jsonify({'history': history, 'page': page, 'per_page': per_page, 'total': total})
     except Exception as e:
         logging.error(f"Error getting history: {str(e)}")
         return jsonify({"error": f"Error getting history: {str(e)}"}), 500
@@ -437,13 +750,92 @@ def get_history():
 def clear_history():
     """Clear password generation history"""
     try:
-        session['password_history'] = []
-        session.modified = True
+        history_id = get_history_id()
+        if history_id:
+            history_store.clear(history_id)
         return jsonify({'success': True})
     except Exception as e:
         logging.error(f"Error clearing history: {str(e)}")
         return jsonify({"error": f"Error clearing history: {str(e)}"}), 500
 
+def build_policy_validation(password, data):
+    """
+    The /policy/validate response body: the policy's violations for a
+    password, and the entropy the policy leaves at the password's length,
+    or None when no conforming password has that length. Raises
+    ValueError for an invalid policy.
+    """
+    policy = Policy.from_dict(data.get('policy') or {})
+    attributes = get_user_attributes(data)
+    violations = policy.validate(password, attributes)
+    
+    # PolicyProfile moves a length into the policy's bounds, which would
+    # report the entropy of some other length
+    entropy = None
+    if policy.fit_length(len(password)) == len(password):
+        entropy = PolicyProfile(policy, len(password), policy.forbidden_substrings(attributes)).report()
+    
+    return {
+        'valid': not violations,
+        'violations': violations,
+        'entropy': entropy
+    }
+
+@app.route('/policy/validate', methods=['POST'])
+def validate_policy():
+    """Check a password against a declarative password policy"""
+    data = request.get_json() or {}
+    password = data.get('password', '')
+    
+    if not password:
+        return jsonify({"error": "No password provided"}), 400
+    
+    try:
+        return jsonify(build_policy_validation(password, data))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error validating password policy: {str(e)}")
+        return jsonify({"error": f"Error validating password policy: {str(e)}"}), 500
+
+def build_analysis_result(password, data, fields=EVERYTHING):
+    """
+    The /analyze response body for a password and its request payload,
+    computing and returning only the sections fields selects
+    """
+    result = {}
+    
+    # Get comprehensive analysis
+    strength_info = None
+    if fields.wants('strength', 'patterns_detected'):
+        strength_info = estimate_crack_time(password, degrade=True)
+        result['strength'] = strength_info
+    
+    if fields.wants('basic_analysis', 'character_distribution', 'patterns_detected'):
+        with metrics.stage('pattern_analysis'):
+            scan = pattern_analyzer.scan(password)
+        result['basic_analysis'] = analyze_password_patterns(password, scan)
+        result['character_distribution'] = scan['character_distribution']
+    
+    # Check if it's a variation of the username, e-mail or name
+    if fields.wants('username_similarity', 'attribute_similarity'):
+        with metrics.stage('similarity'):
+            similarity = attribute_similarity(password, get_user_attributes(data))
+        result['username_similarity'] = similarity.get('username', 0)
+        result['attribute_similarity'] = similarity
+    
+    if fields.wants('breached', 'breach_count', 'patterns_detected'):
+        result.update(breach_fields(password))
+    
+    if fields.wants('patterns_detected'):
+        result['patterns_detected'] = dict(
+            scan['patterns'],
+            common_password=is_common_password(strength_info),
+            breached=result['breached']
+        )
+    
+    return fields.project(result)
+
 @app.route('/analyze', methods=['POST'])
 def deep_analyze():
     """Perform deep password analysis"""
@@ -454,84 +846,134 @@ def deep_analyze():
         return jsonify({"error": "No password provided"}), 400
     
     try:
-        # Get comprehensive analysis
-        strength_info = estimate_crack_time(password)
-        analysis = analyze_password_patterns(password)
-        
-        # Create a more detailed response
-        character_distribution = {}
-        for char in password:
-            if char in character_distribution:
-                character_distribution[char] += 1
-            else:
-                character_distribution[char] = 1
-        
-        # Check if it's a variation of the username
-        username = data.get('username', '')
-        username_similarity = 0
-        if username:
-            # Simple check for username being contained in password
-            if username.lower() in password.lower():
-                username_similarity = 100
-            else:
-                # Calculate similarity percentage (very simple algorithm)
-                common_chars = set(username.lower()) & set(password.lower())
-                if len(username) > 0:
-                    username_similarity = int((len(common_chars) / len(username)) * 100)
-        
-        return jsonify({
-            'basic_analysis': analysis,
-            'strength': strength_info,
-            'character_distribution': character_distribution,
-            'username_similarity': username_similarity,
-            'patterns_detected': {
-                'sequential': analysis['sequential_chars'] > 0,
-                'repeated': analysis['repeating_chars'] > 0,
-                'keyboard_pattern': analysis['keyboard_patterns'] > 0,
-                'common_password': strength_info['raw_result'].get('guesses', 0) < 1000
-            }
-        })
+        fields = request_fields(data, ANALYZE_FIELDS, ANALYZE_COMPACT)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        return jsonify(build_analysis_result(password, data, fields))
     except Exception as e:
         logging.error(f"Error analyzing password: {str(e)}")
         return jsonify({"error": f"Error analyzing password: {str(e)}"}), 500
 
+@app.route('/audit', methods=['POST'])
+def audit_upload():
+    """
+    Score a newline-delimited password list uploaded as the request body.
+    The body is read lazily (chunked uploads work) and results stream back
+    as NDJSON, ending with a summary record of aggregate histograms.
+    """
+    include_password = request.args.get('include_password', '').lower() in ('1', 'true', 'yes')
+    summary = audit.AuditSummary()
+    
+    def generate_results():
+        try:
+            results = audit.audit_passwords(
+                audit.read_passwords(request.stream),
+                summary,
+                include_password=include_password,
+                executor=audit.get_shared_executor()
+            )
+            yield from audit.iter_ndjson(results, summary)
+        except Exception as e:
+            logging.error(f"Error auditing passwords: {str(e)}")
+            yield json.dumps({"error": f"Error auditing passwords: {str(e)}"}) + "\n"
+    
+    return Response(stream_with_context(generate_results()), mimetype='application/x-ndjson')
+
+def export_row(password, score, crack_time, generated):
+    """One export record; score and crack_time may be None when unknown"""
+    return {
+        'password': password,
+        'strength': STRENGTH_LABELS[score] if score is not None else None,
+        'score': score,
+        'crack_time': crack_time,
+        'generated': generated
+    }
+
+def scored_export_row(password, generated, score=True):
+    """Export record for a password, scored unless score is False"""
+    if not score:
+        return export_row(password, None, None, generated)
+    try:
+        strength_info = estimate_crack_time(password, degrade=True)
+    except ValueError:
+        # Too long for zxcvbn, export it unscored
+        return export_row(password, None, None, generated)
+    return export_row(password, strength_info['score'], strength_info['crack_time'], generated)
+
+def build_export(data, history_id):
+    """
+    Plan an export for a request payload: returns (chunks, mimetype, file
+    extension) where chunks lazily yields the formatted download. Exports
+    the given passwords, or {"generate": N} fresh ones built from the usual
+    generator options, or else the history under history_id. Raises
+    ValueError for an invalid request.
+    """
+    format_type = data.get('format', 'text')
+    passwords = data.get('passwords', [])
+    score = bool(data.get('score', True))
+    
+    if format_type not in export.EXPORT_FORMATS:
+        raise ValueError('Unsupported format')
+    writer, mimetype, extension = export.EXPORT_FORMATS[format_type]
+    if format_type == 'csv' and data.get('escape_formulas'):
+        writer = functools.partial(export.iter_csv, escape_formulas=True)
+    
+    # One timestamp for the whole export
+    generated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    if 'generate' in data:
+        # Generate fresh passwords as they are written out
+        try:
+            count = int(data['generate'])
+        except (TypeError, ValueError):
+            raise ValueError("Generate count must be an integer")
+        if count < 1 or count > EXPORT_MAX_COUNT:
+            raise ValueError(f"Generate count must be between 1 and {EXPORT_MAX_COUNT}")
+        
+        profile, length = request_generator(data)
+        rows = (scored_export_row(generate_unbreached(profile, length), generated, score) for _ in range(count))
+    elif passwords:
+        rows = (scored_export_row(str(pwd), generated, score) for pwd in passwords)
+    else:
+        # If no passwords are explicitly provided, use the history, which
+        # already records each password's strength and when it was made
+        history = history_store.page(history_id)[0] if history_id else []
+        rows = (
+            export_row(item['password'], item.get('score'), item.get('crack_time'), item.get('timestamp'))
+            for item in history if item.get('password')
+        )
+    
+    def generate_export():
+        try:
+            yield from writer(rows)
+        except Exception as e:
+            # Headers are already sent, so the download just ends early
+            logging.error(f"Error exporting passwords: {str(e)}")
+    
+    return generate_export(), mimetype, extension
+
 @app.route('/export', methods=['POST'])
 def export_passwords():
-    """Export password list in different formats"""
+    """
+    Export passwords as a streamed text, CSV, JSON or NDJSON download.
+    Rows are produced one at a time, so memory stays flat however large
+    the export. Passwords are exported exactly as generated, so a CSV
+    password starting with =, +, - or @ can be run as a formula by a
+    spreadsheet that opens the file; {"escape_formulas": true} prefixes
+    those with a quote, which then has to be removed before use.
+    """
     try:
-        data = request.get_json()
-        format_type = data.get('format', 'text')
-        passwords = data.get('passwords', [])
-        
-        if not passwords:
-            # If no passwords are explicitly provided, use the history
-            history = session.get('password_history', [])
-            passwords = [item.get('password', '') for item in history if item.get('password')]
-        
-        if format_type == 'text':
-            # Simple text format
-            content = "\n".join(passwords)
-            return jsonify({'content': content, 'format': 'text'})
-        
-        elif format_type == 'csv':
-            # CSV format
-            csv_content = "Password,Strength,Generated\n"
-            for pwd in passwords:
-                csv_content += f"{pwd},N/A,{datetime.now().strftime('%Y-%m-%d')}\n"
-            return jsonify({'content': csv_content, 'format': 'csv'})
-        
-        elif format_type == 'json':
-            # JSON format
-            json_content = []
-            for pwd in passwords:
-                json_content.append({
-                    'password': pwd,
-                    'generated': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                })
-            return jsonify({'content': json_content, 'format': 'json'})
-        
-        else:
-            return jsonify({'error': 'Unsupported format'}), 400
+        data = request.get_json() or {}
+        chunks, mimetype, extension = build_export(data, get_history_id())
+        return Response(
+            stream_with_context(chunks),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename=passwords.{extension}'}
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logging.error(f"Error exporting passwords: {str(e)}")
         return jsonify({"error": f"Error exporting passwords: {str(e)}"}), 500
@@ -0,0 +1,433 @@
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from werkzeug.http import dump_cookie, parse_cookie
+
+import app as padlock
+import metrics
+import responses
+
+# ASGI entry point serving the JSON API with async handlers, for example
+# `uvicorn asgi:application`. Requests wait on the event loop, not on a
+# thread, so one process holds thousands of mostly idle connections; CPU
+# work runs in ASGI_EXECUTOR_THREADS threads (or the SCORING_WORKERS
+# process pool behind them), and concurrent /check requests are gathered
+# into micro-batches whose distinct passwords are scored side by side.
+
+# Threads running CPU work off the event loop
+EXECUTOR_THREADS = int(os.environ.get("ASGI_EXECUTOR_THREADS", min(32, (os.cpu_count() or 1) + 4)))
+
+# /check requests arriving within this many seconds form one batch, up to
+# BATCH_MAX_SIZE of them
+BATCH_WINDOW = float(os.environ.get("ASGI_BATCH_WINDOW", 0.002))
+BATCH_MAX_SIZE = int(os.environ.get("ASGI_BATCH_MAX_SIZE", 64))
+
+# Request bodies above this size are refused
+MAX_BODY_SIZE = int(os.environ.get("ASGI_MAX_BODY_SIZE", 1024 * 1024))
+
+# Export rows formatted per executor call while streaming
+EXPORT_CHUNK_ROWS = 256
+
+class HTTPError(Exception):
+    """Ends a request with a JSON error body"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class MicroBatcher:
+    """
+    Collects items submitted within a short window and hands them to
+    func together. func is a coroutine function that takes a list of
+    items and the context each was submitted from, and returns a list of
+    results in the same order, where an Exception instance fails only its
+    own item. It runs in a context of its own, so work done for one
+    request is only timed as part of it inside that request's context.
+    """
+
+    def __init__(self, func, window=BATCH_WINDOW, max_size=BATCH_MAX_SIZE):
+        self.func = func
+        self.window = window
+        self.max_size = max_size
+        self._pending = []
+        self._timer = None
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, contextvars.copy_context(), future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        self.items += len(batch)
+
+        loop = asyncio.get_running_loop()
+        job = loop.create_task(self.func([item for item, _, _ in batch], [context for _, context, _ in batch]),
+                               context=contextvars.Context())
+
+        def deliver(job):
+            error = job.exception()
+            results = [error] * len(batch) if error else job.result()
+            for (_, _, future), result in zip(batch, results):
+                if future.done():
+                    # The client went away while its batch ran
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+        job.add_done_callback(deliver)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'pending': len(self._pending)
+        }
+
+def batch_passwords(items):
+    """The distinct passwords of (password, attributes, fields) items that need scoring"""
+    return list(dict.fromkeys(password for password, _, fields in items
+                              if fields.wants(*padlock.STRENGTH_FIELDS)))
+
+def check_batch(items, contexts, strength):
+    """
+    Build /check results for (password, attributes, fields) items from
+    strength, the scored result (or the Exception scoring raised) of
+    each password in batch_passwords(items). Each result is built in
+    its request's context, so its stages are timed as part of it.
+    """
+    results = []
+    for (password, attributes, fields), context in zip(items, contexts):
+        try:
+            strength_info = None
+            if fields.wants(*padlock.STRENGTH_FIELDS):
+                strength_info = strength[password]
+                if isinstance(strength_info, Exception):
+                    raise strength_info
+            results.append(context.run(padlock.build_check_result, password, strength_info, attributes, fields))
+        except Exception as e:
+            results.append(e)
+    return results
+
+class Request:
+    """The parts of an ASGI HTTP request the handlers use"""
+
+    def __init__(self, scope, body):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        self.body = body
+        headers = scope.get('headers', [])
+        cookies = b'; '.join(value for name, value in headers if name == b'cookie')
+        self.cookies = parse_cookie(cookies.decode('latin-1'))
+        self.accept_encoding = b', '.join(value for name, value in headers if name == b'accept-encoding').decode('latin-1')
+
+    def json(self):
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except ValueError:
+            raise HTTPError(400, "Request body is not valid JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return data
+
+    def fields(self, data, known, compact, required=()):
+        """The FieldSelection for the body's or query's fields= and compact options"""
+        args = {name: values[0] for name, values in self.query.items()}
+        try:
+            return responses.FieldSelection.from_request(data, args, known, compact, required)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+
+    def query_int(self, name, default):
+        try:
+            return int(self.query[name][0])
+        except (KeyError, ValueError):
+            return default
+
+class PadlockASGI:
+    """
+    The /generate, /check, /analyze, /history and /export routes as an
+    ASGI application, sharing app.py's logic and stores. The history id
+    rides in the same signed session cookie the Flask app uses, so both
+    entry points can serve the same clients.
+    """
+
+    def __init__(self, executor_threads=EXECUTOR_THREADS):
+        self.executor = ThreadPoolExecutor(max_workers=executor_threads, thread_name_prefix='padlock-asgi')
+        self.check_batcher = MicroBatcher(self._check_batch)
+        flask_app = padlock.app
+        self._sessions = flask_app.session_interface.get_signing_serializer(flask_app)
+        self._session_cookie = flask_app.config['SESSION_COOKIE_NAME']
+        self._session_max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+        self.routes = {
+            ('POST', '/generate'): self.generate,
+            ('POST', '/check'): self.check,
+            ('POST', '/analyze'): self.analyze,
+            ('POST', '/policy/validate'): self.validate_policy,
+            ('GET', '/history'): self.history,
+            ('POST', '/history/clear'): self.clear_history,
+            ('POST', '/export'): self.export,
+            ('GET', '/metrics'): self.metrics,
+        }
+        metrics.registry.add_collector('padlock_asgi_check_batcher', self.check_batcher.stats,
+                                       counters=('batches', 'items'))
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        timer = metrics.start_request()
+        handler = self.routes.get((scope['method'], scope['path']))
+        route = scope['path'] if handler else 'unmatched'
+        if timer is not None:
+            timer.route = route
+            timer.method = scope['method']
+        status = 500
+        try:
+            if handler is None:
+                known = any(path == scope['path'] for _, path in self.routes)
+                raise HTTPError(405 if known else 404, "Method not allowed" if known else "Not found")
+            request = Request(scope, await self._read_body(receive))
+            status = await handler(request, send)
+        except HTTPError as e:
+            status = e.status
+            await self._send_json(send, status, {"error": str(e)})
+        except Exception as e:
+            logging.error(f"Error handling {scope['path']}: {str(e)}")
+            await self._send_json(send, 500, {"error": f"Internal error: {str(e)}"})
+        finally:
+            if timer is not None:
+                timer.status = status
+            metrics.finish_request(timer)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive):
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise HTTPError(400, "Client disconnected")
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY_SIZE:
+                raise HTTPError(413, "Request body too large")
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    async def _run(self, func, *args, context=None):
+        """
+        Run func(*args) on the executor in a copy of the current context
+        (or in context), so stages it times land on the request's timer
+        """
+        if context is None:
+            context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self.executor, context.run, func, *args)
+
+    async def _check_batch(self, items, contexts):
+        """
+        Score the distinct passwords of a /check batch side by side, each
+        in its own executor call so they spread over the executor threads
+        and the scoring pool, then build every result in one call. A
+        password is scored in the context of the first request for it.
+        """
+        passwords = batch_passwords(items)
+        first = {}
+        for (password, _, _), context in zip(items, contexts):
+            first.setdefault(password, context)
+        scored = await asyncio.gather(
+            *(self._run(padlock.estimate_crack_time, password, True, context=first[password])
+              for password in passwords),
+            return_exceptions=True)
+        return await self._run(check_batch, items, contexts, dict(zip(passwords, scored)))
+
+    async def _send_json(self, send, status, body, headers=(), request=None):
+        payload = responses.dumps(body)
+        headers = [(b'content-type', b'application/json')] + list(headers)
+        if responses.COMPRESSION_ENABLED:
+            headers.append((b'vary', b'Accept-Encoding'))
+            encoding = responses.negotiate_encoding(request.accept_encoding) if request is not None else None
+            if encoding is not None and len(payload) >= responses.COMPRESS_MIN_SIZE:
+                payload = responses.compress(payload, encoding)
+                headers.append((b'content-encoding', encoding.encode()))
+        headers.append((b'content-length', str(len(payload)).encode()))
+        headers.extend(self._server_timing())
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': payload})
+        return status
+
+    def _server_timing(self):
+        """The Server-Timing header for the current request, when enabled"""
+        timer = metrics.current_request()
+        if not metrics.SERVER_TIMING or timer is None:
+            return []
+        return [(b'server-timing', timer.server_timing().encode('latin-1'))]
+
+    def _history_id(self, request):
+        """The history id from the session cookie, or None"""
+        cookie = request.cookies.get(self._session_cookie)
+        if not cookie:
+            return None
+        try:
+            return self._sessions.loads(cookie, max_age=self._session_max_age).get('history_id')
+        except Exception:
+            # Expired or tampered with, like Flask treat it as a new session
+            return None
+
+    def _new_history_cookie(self):
+        """A fresh history id and the Set-Cookie header carrying it"""
+        history_id = secrets.token_urlsafe(16)
+        cookie = dump_cookie(self._session_cookie, self._sessions.dumps({'history_id': history_id}),
+                             httponly=True, path='/')
+        return history_id, (b'set-cookie', cookie.encode('latin-1'))
+
+    async def generate(self, request, send):
+        data = request.json()
+        fields = request.fields(data, padlock.GENERATE_FIELDS, padlock.GENERATE_COMPACT, padlock.GENERATE_REQUIRED)
+        try:
+            result = await self._run(padlock.build_generate_result, data, fields)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+
+        headers = []
+        history_id = self._history_id(request)
+        if history_id is None:
+            history_id, cookie = self._new_history_cookie()
+            headers.append(cookie)
+        item = padlock.make_history_item(result['password'], result.get('score'), result.get('crack_time'))
+        await self._run(padlock.history_store.append, history_id, item)
+        return await self._send_json(send, 200, fields.project(result), headers, request)
+
+    async def check(self, request, send):
+        data = request.json()
+        password = data.get('password', '')
+        if not password:
+            raise HTTPError(400, "No password provided")
+        fields = request.fields(data, padlock.CHECK_FIELDS, padlock.CHECK_COMPACT)
+        try:
+            result = await self.check_batcher.submit((password, padlock.get_user_attributes(data), fields))
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return await self._send_json(send, 200, result, request=request)
+
+    async def analyze(self, request, send):
+        data = request.json()
+        password = data.get('password', '')
+        if not password:
+            raise HTTPError(400, "No password provided")
+        fields = request.fields(data, padlock.ANALYZE_FIELDS, padlock.ANALYZE_COMPACT)
+        result = await self._run(padlock.build_analysis_result, password, data, fields)
+        return await self._send_json(send, 200, result, request=request)
+
+    async def validate_policy(self, request, send):
+        data = request.json()
+        password = data.get('password', '')
+        if not password:
+            raise HTTPError(400, "No password provided")
+        try:
+            result = await self._run(padlock.build_policy_validation, password, data)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return await self._send_json(send, 200, result, request=request)
+
+    async def history(self, request, send):
+        page = max(1, request.query_int('page', 1))
+        per_page = max(1, min(100, request.query_int('per_page', 10)))
+        history_id = self._history_id(request)
+        if history_id:
+            history, total = await self._run(padlock.history_store.page, history_id,
+                                             (page - 1) * per_page, per_page)
+        else:
+            history, total = [], 0
+        return await self._send_json(send, 200, {
+            'history': history, 'page': page, 'per_page': per_page, 'total': total
+        }, request=request)
+
+    async def clear_history(self, request, send):
+        history_id = self._history_id(request)
+        if history_id:
+            await self._run(padlock.history_store.clear, history_id)
+        return await self._send_json(send, 200, {'success': True})
+
+    async def export(self, request, send):
+        data = request.json()
+        try:
+            chunks, mimetype, extension = await self._run(padlock.build_export, data, self._history_id(request))
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', f'{mimetype}; charset=utf-8'.encode()),
+                        (b'content-disposition', f'attachment; filename=passwords.{extension}'.encode())]
+                       + self._server_timing()
+        })
+
+        def next_chunk():
+            # Format a run of rows per executor call rather than one per hop
+            parts = []
+            for part in chunks:
+                parts.append(part)
+                if len(parts) >= EXPORT_CHUNK_ROWS:
+                    break
+            return ''.join(parts)
+
+        while True:
+            text = await self._run(next_chunk)
+            if not text:
+                break
+            await send({'type': 'http.response.body', 'body': text.encode('utf-8'), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+        return 200
+
+    async def metrics(self, request, send):
+        if not metrics.METRICS_ENABLED:
+            raise HTTPError(404, "Metrics are disabled")
+        body = metrics.registry.render().encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'text/plain; version=0.0.4')]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+        return 200
+
+application = PadlockASGI()
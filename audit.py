@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from strength import analyze_password_patterns, is_common_password, run_zxcvbn, summarize_strength
+
+# Passwords per task sent to a worker process
+AUDIT_CHUNK_SIZE = int(os.environ.get("AUDIT_CHUNK_SIZE", 256))
+
+# Worker processes for audits; 0 scores in the calling process
+AUDIT_WORKERS = int(os.environ.get("AUDIT_WORKERS", os.cpu_count() or 1))
+
+# Longer lines are reported as errors rather than scored
+AUDIT_MAX_LENGTH = 72
+
+def read_passwords(stream, encoding='utf-8'):
+    """
+    Lazily yield (line_number, password) pairs from newline-delimited input.
+    Accepts text or binary streams; blank lines are skipped.
+    """
+    for line_number, line in enumerate(stream, 1):
+        if isinstance(line, bytes):
+            line = line.decode(encoding, errors='replace')
+        password = line.rstrip('\r\n')
+        if password:
+            yield line_number, password
+
+def score_chunk(chunk, include_password=False):
+    """
+    Score a list of (line_number, password) pairs. Runs in worker processes,
+    which are already the parallelism, so zxcvbn runs in-process here. A
+    password that fails to score is reported as an error row rather than
+    failing the whole audit.
+    """
+    results = []
+    for line_number, password in chunk:
+        result = {'line': line_number, 'length': len(password)}
+        if include_password:
+            result['password'] = password
+        if len(password) > AUDIT_MAX_LENGTH:
+            result['error'] = f"Password exceeds max length of {AUDIT_MAX_LENGTH} characters"
+            results.append(result)
+            continue
+
+        try:
+            strength_info = summarize_strength(run_zxcvbn(password))
+        except Exception as e:
+            result['error'] = f"Could not score password: {str(e)}"
+            results.append(result)
+            continue
+
+        analysis = analyze_password_patterns(password)
+        result.update({
+            'score': strength_info['score'],
+            'crack_time': strength_info['crack_time'],
+            'entropy': strength_info['entropy'],
+            'common_password': is_common_password(strength_info),
+            'character_sets': analysis['character_sets'],
+            'repeating_chars': analysis['repeating_chars'],
+            'sequential_chars': analysis['sequential_chars'],
+            'keyboard_patterns': analysis['keyboard_patterns']
+        })
+        results.append(result)
+    return results
+
+class AuditSummary:
+    """Running aggregates over audit results, constant memory per distinct length"""
+
+    def __init__(self):
+        self.total = 0
+        self.errors = 0
+        self.common = 0
+        self.scores = [0] * 5
+        self.lengths = Counter()
+
+    def add(self, result):
+        self.total += 1
+        self.lengths[result['length']] += 1
+        if 'error' in result:
+            self.errors += 1
+            return
+        self.scores[result['score']] += 1
+        if result['common_password']:
+            self.common += 1
+
+    def to_dict(self):
+        scored = self.total - self.errors
+        return {
+            'total': self.total,
+            'scored': scored,
+            'errors': self.errors,
+            'score_buckets': {str(score): count for score, count in enumerate(self.scores)},
+            'common_password_count': self.common,
+            'common_password_rate': self.common / scored if scored else 0.0,
+            'length_distribution': {str(length): count for length, count in sorted(self.lengths.items())}
+        }
+
+def chunked(iterable, size):
+    """Split an iterable into lists of at most size items, lazily"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def audit_passwords(passwords, summary, workers=AUDIT_WORKERS, chunk_size=AUDIT_CHUNK_SIZE,
+                    include_password=False, executor=None):
+    """
+    Score (line_number, password) pairs and yield results in input order.
+    At most two chunks per worker are in flight, so memory stays flat no
+    matter how long the input is. Every result is also added to summary.
+    """
+    chunks = chunked(passwords, chunk_size)
+
+    if executor is None and workers <= 0:
+        for chunk in chunks:
+            for result in score_chunk(chunk, include_password):
+                summary.add(result)
+                yield result
+        return
+
+    owns_executor = executor is None
+    if owns_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    max_in_flight = max(1, workers) * 2
+
+    try:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(score_chunk, chunk, include_password))
+            if len(pending) < max_in_flight:
+                continue
+            for result in pending.popleft().result():
+                summary.add(result)
+                yield result
+        while pending:
+            for result in pending.popleft().result():
+                summary.add(result)
+                yield result
+    finally:
+        if owns_executor:
+            executor.shutdown(cancel_futures=True)
+
+def iter_ndjson(results, summary):
+    """Encode results as NDJSON lines, ending with a summary record"""
+    for result in results:
+        yield json.dumps(result) + "\n"
+    yield json.dumps({'summary': summary.to_dict()}) + "\n"
+
+_shared_executor = None
+_shared_executor_lock = threading.Lock()
+
+def get_shared_executor():
+    """Process pool reused across /audit requests, created on first use"""
+    global _shared_executor
+    with _shared_executor_lock:
+        if _shared_executor is None and AUDIT_WORKERS > 0:
+            _shared_executor = ProcessPoolExecutor(max_workers=AUDIT_WORKERS)
+    return _shared_executor
@@ -0,0 +1,305 @@
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from analyzer import KEYBOARD_MIN_RUN, KeyboardLayout, username_similarity
+
+# Rows packed into one array at a time; bounds memory for any input size
+BATCH_CHUNK_SIZE = 65536
+
+# Rows up to this many characters are packed with the rest of their chunk;
+# longer ones are packed apart so one long line cannot widen every row
+MAX_PACKED_WIDTH = 256
+
+# Code points per array when packing the long rows of a chunk
+LONG_ROWS_CELLS = 1 << 20
+
+# Keys combining a row index and a code point, so one sort covers a chunk
+CODE_POINTS = 0x110000
+
+# Stands in for padding so it sorts after every real character
+PADDING = 0xFFFFFFFF
+
+# Bins for the Shannon entropy histogram, in bits per character
+ENTROPY_BINS = 32
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("The batch analyzer needs NumPy (pip install numpy)")
+
+def pack_passwords(passwords):
+    """
+    Pack strings into a fixed-width uint32 array of code points, one row
+    per string and zero padded, plus their lengths.
+    """
+    _require_numpy()
+    packed = np.array(passwords, dtype=str)
+    codes = packed.view(np.uint32).reshape(len(packed), packed.dtype.itemsize // 4)
+    return codes, np.char.str_len(packed).astype(np.int32)
+
+def _count_runs(mask, min_run):
+    """Per row, how many maximal runs of True are at least min_run long"""
+    if mask.shape[1] < min_run:
+        return np.zeros(mask.shape[0], dtype=np.int32)
+    # A window is full when min_run positions in a row are all True; each
+    # long enough run is one stretch of full windows, so count stretch starts
+    totals = np.zeros((mask.shape[0], mask.shape[1] + 1), dtype=np.int32)
+    np.cumsum(mask, axis=1, out=totals[:, 1:])
+    full = (totals[:, min_run:] - totals[:, :-min_run]) == min_run
+    starts = full.copy()
+    starts[:, 1:] &= ~full[:, :-1]
+    return starts.sum(axis=1, dtype=np.int32)
+
+def _first_occurrences(codes, lengths):
+    """
+    Sort each row and mark the first position of every distinct character.
+    Padding sorts last, so the first `length` positions of a row are still
+    its characters and the mask never marks padding.
+    """
+    valid = np.arange(codes.shape[1]) < lengths[:, None]
+    ordered = np.sort(np.where(valid, codes, PADDING), axis=1)
+    first = valid.copy()
+    first[:, 1:] &= ordered[:, 1:] != ordered[:, :-1]
+    return ordered, first
+
+def _shannon_entropy(first, lengths):
+    """
+    Shannon entropy in bits per character from a _first_occurrences mask.
+    Uses H = log2(n) - sum(c * log2(c)) / n over character counts c, where
+    each c * log2(c) is accumulated position by position along its run.
+    """
+    positions = np.arange(first.shape[1])
+    run_start = np.maximum.accumulate(np.where(first, positions, 0), axis=1)
+    rank = positions - run_start + 1
+    k = np.arange(first.shape[1] + 1, dtype=np.float64)
+    k_log_k = k * np.log2(np.maximum(k, 1))
+    step = np.diff(k_log_k, prepend=0.0)
+    valid = positions < lengths[:, None]
+    total = np.where(valid, step[rank], 0.0).sum(axis=1)
+    safe_lengths = np.maximum(lengths, 1)
+    return np.where(lengths > 0, np.log2(safe_lengths) - total / safe_lengths, 0.0)
+
+def _distinct_per_row(rows, codes, row_count):
+    """Per row, how many distinct code points appear in codes"""
+    keys = np.unique(rows.astype(np.int64) * CODE_POINTS + codes)
+    return np.bincount(keys // CODE_POINTS, minlength=row_count).astype(np.int32)
+
+class BatchAnalyzer:
+    """
+    Vectorized analysis of many passwords at once, returning columns.
+    Computes the same metrics as PatternAnalyzer.scan and more, one
+    NumPy operation over a whole chunk of rows at a time: character class
+    counts, Shannon entropy, repeated runs, ascending sequences, keyboard
+    runs and character-overlap similarity to a paired username column.
+    """
+
+    def __init__(self, layouts=None, keyboard_min_run=KEYBOARD_MIN_RUN):
+        _require_numpy()
+        if layouts is None:
+            layouts = [KeyboardLayout.from_zxcvbn('qwerty')]
+        self.keyboard_min_run = keyboard_min_run
+
+        # Direction of the step between each pair of ASCII keys per layout,
+        # -1 where they are not adjacent; other characters are never adjacent
+        self.directions = []
+        for layout in layouts:
+            directions = np.full((128, 128), -1, dtype=np.int8)
+            for pair, direction in layout.directions.items():
+                if ord(pair[0]) < 128 and ord(pair[1]) < 128:
+                    directions[ord(pair[0]), ord(pair[1])] = direction
+            self.directions.append(directions)
+
+    def analyze_packed(self, codes, lengths, usernames=None):
+        """Analyze an array from pack_passwords and return a dict of columns"""
+        rows, width = codes.shape
+        valid = np.arange(width) < lengths[:, None]
+
+        upper = (codes >= 65) & (codes <= 90)
+        lower = (codes >= 97) & (codes <= 122)
+        digit = (codes >= 48) & (codes <= 57)
+        uppercase = upper.sum(axis=1, dtype=np.int32)
+        lowercase = lower.sum(axis=1, dtype=np.int32)
+        digits = digit.sum(axis=1, dtype=np.int32)
+
+        # Shannon entropy from each row's character counts, found by sorting
+        # every row so equal characters sit together
+        _, first = _first_occurrences(codes, lengths)
+        entropy = _shannon_entropy(first, lengths)
+        distinct = first.sum(axis=1, dtype=np.int32)
+
+        # Neighbouring pairs that both lie inside the password
+        pairs = valid[:, 1:]
+        previous, current = codes[:, :-1], codes[:, 1:]
+
+        # Runs of one character ("aaa"); like the regex, newlines never match
+        same = pairs & (previous == current) & (current != 10)
+        repeating = _count_runs(same, 2)
+
+        # Ascending runs ("abc", "123") within one alphabet, counted once per
+        # distinct trigram by the code point it starts at
+        step = pairs & (current == previous + 1) & (
+            (upper[:, :-1] & upper[:, 1:]) | (lower[:, :-1] & lower[:, 1:]) | (digit[:, :-1] & digit[:, 1:])
+        )
+        trigram = step[:, :-1] & step[:, 1:]
+        trigram_rows, trigram_starts = np.nonzero(trigram)
+        sequential = _distinct_per_row(trigram_rows, codes[trigram_rows, trigram_starts], rows)
+
+        # Runs of neighbouring keys in one direction, counted once per run
+        # and layout
+        keyboard = np.zeros(rows, dtype=np.int32)
+        ascii_previous = np.where(previous < 128, previous, 0)
+        ascii_current = np.where(current < 128, current, 0)
+        for directions in self.directions:
+            steps = np.where(pairs, directions[ascii_previous, ascii_current], -1)
+            for direction in range(steps.max(initial=-1) + 1):
+                keyboard += _count_runs(steps == direction, self.keyboard_min_run - 1)
+
+        columns = {
+            'length': lengths,
+            'uppercase': uppercase,
+            'lowercase': lowercase,
+            'digits': digits,
+            'symbols': lengths - uppercase - lowercase - digits,
+            'distinct_chars': distinct,
+            'entropy': entropy,
+            'entropy_bits': entropy * lengths,
+            'repeating_chars': repeating,
+            'sequential_chars': sequential,
+            'keyboard_patterns': keyboard
+        }
+        if usernames is not None:
+            columns['username_similarity'] = self.username_similarity(codes, lengths, usernames)
+        return columns
+
+    def username_similarity(self, codes, lengths, usernames):
+        """
+        analyzer.username_similarity per row: 100 when the username is
+        in the password ignoring case, otherwise the share of username
+        characters that also occur in the password. 0 for empty usernames.
+        """
+        password_lower = np.char.lower(codes.view(f'U{codes.shape[1]}').ravel())
+        usernames = np.array(usernames, dtype=str)
+        username_lower = np.char.lower(usernames)
+        user_lengths = np.char.str_len(usernames)
+        user_codes, user_lower_lengths = pack_passwords(username_lower)
+        lower_codes, lower_lengths = pack_passwords(password_lower)
+
+        # Distinct username characters that also occur in the password, one
+        # username column at a time to keep memory at rows x password width
+        user_ordered, user_first = _first_occurrences(user_codes, user_lower_lengths)
+        shared = np.zeros(len(lengths), dtype=np.int32)
+        for column in range(user_ordered.shape[1]):
+            present = (lower_codes == user_ordered[:, column:column + 1]).any(axis=1)
+            shared += user_first[:, column] & present
+
+        # Same float arithmetic as the per-string version, so results match exactly
+        similarity = np.where(user_lengths > 0, shared / np.maximum(user_lengths, 1) * 100, 0)
+        contained = (np.char.find(password_lower, username_lower) >= 0) & (user_lengths > 0)
+        similarity = np.where(contained, 100, similarity.astype(np.int32))
+
+        # Outside ASCII, str.lower can change a string's length, which the
+        # fixed-width arrays cannot follow; redo those rare rows per string
+        for row in np.nonzero((codes >= 128).any(axis=1) | (user_codes >= 128).any(axis=1))[0].tolist():
+            password = codes[row, :lengths[row]].tobytes().decode('utf-32-le')
+            similarity[row] = username_similarity(str(usernames[row]), password)
+        return similarity
+
+    def _row_groups(self, chunk, user_chunk):
+        """
+        Row indices of a chunk, grouped for packing: every row up to
+        MAX_PACKED_WIDTH characters in one group, then the longer rows by
+        length in groups of at most LONG_ROWS_CELLS code points
+        """
+        widths = [len(password) for password in chunk]
+        if user_chunk is not None:
+            widths = [max(width, len(username)) for width, username in zip(widths, user_chunk)]
+        groups = [[row for row, width in enumerate(widths) if width <= MAX_PACKED_WIDTH]]
+        group = []
+        for row in sorted((row for row, width in enumerate(widths) if width > MAX_PACKED_WIDTH),
+                          key=widths.__getitem__):
+            if group and (len(group) + 1) * widths[row] > LONG_ROWS_CELLS:
+                groups.append(group)
+                group = []
+            group.append(row)
+        groups.append(group)
+        return [group for group in groups if group]
+
+    def _analyzed_chunks(self, passwords, usernames, chunk_size):
+        """
+        Yield (columns, packed) for each chunk of the input, where packed
+        lists the (codes, lengths) arrays its rows were analyzed in
+        """
+        passwords = iter(passwords)
+        usernames = iter(usernames) if usernames is not None else None
+        while True:
+            chunk = list(islice(passwords, chunk_size))
+            if not chunk:
+                return
+            user_chunk = list(islice(usernames, len(chunk))) if usernames is not None else None
+            if user_chunk is not None and len(user_chunk) != len(chunk):
+                raise ValueError("Passwords and usernames must have the same length")
+
+            groups = self._row_groups(chunk, user_chunk)
+            if len(groups) == 1:
+                # Nothing long, the whole chunk is one array in input order
+                codes, lengths = pack_passwords(chunk)
+                yield self.analyze_packed(codes, lengths, user_chunk), [(codes, lengths)]
+                continue
+
+            packed = []
+            parts = []
+            for group in groups:
+                codes, lengths = pack_passwords([chunk[row] for row in group])
+                group_users = [user_chunk[row] for row in group] if user_chunk is not None else None
+                packed.append((codes, lengths))
+                parts.append((group, self.analyze_packed(codes, lengths, group_users)))
+
+            # Put every group's rows back where they were in the chunk
+            columns = {}
+            for name in parts[0][1]:
+                column = np.empty(len(chunk), dtype=np.result_type(*(part[name] for _, part in parts)))
+                for group, part in parts:
+                    column[group] = part[name]
+                columns[name] = column
+            yield columns, packed
+
+    def iter_batches(self, passwords, usernames=None, chunk_size=BATCH_CHUNK_SIZE):
+        """Analyze an iterable of passwords lazily, yielding one dict of columns per chunk"""
+        for columns, _ in self._analyzed_chunks(passwords, usernames, chunk_size):
+            yield columns
+
+    def analyze(self, passwords, usernames=None, chunk_size=BATCH_CHUNK_SIZE):
+        """
+        Analyze a sequence of passwords, with an optional username per row.
+        Returns {'columns': {name: array}, 'histograms': {...}} where the
+        histograms cover lengths, entropy and code points over the batch.
+        """
+        batches = []
+        code_points = {}
+        for columns, packed in self._analyzed_chunks(passwords, usernames, chunk_size):
+            batches.append(columns)
+            for codes, lengths in packed:
+                counts = np.bincount(codes[np.arange(codes.shape[1]) < lengths[:, None]])
+                for value in np.flatnonzero(counts).tolist():
+                    code_points[value] = code_points.get(value, 0) + int(counts[value])
+
+        if not batches:
+            return {'columns': {}, 'histograms': {}}
+        columns = {name: np.concatenate([batch[name] for batch in batches]) for name in batches[0]}
+
+        entropy_counts, entropy_edges = np.histogram(columns['entropy'], bins=ENTROPY_BINS)
+        ordered = sorted(code_points)
+        return {
+            'columns': columns,
+            'histograms': {
+                'length': np.bincount(columns['length']),
+                'entropy': {'counts': entropy_counts, 'edges': entropy_edges},
+                'code_points': {
+                    'values': np.array(ordered, dtype=np.uint32),
+                    'counts': np.array([code_points[value] for value in ordered], dtype=np.int64)
+                }
+            }
+        }
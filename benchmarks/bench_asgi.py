@@ -0,0 +1,165 @@
+"""
+ASGI against WSGI serving of /check at high concurrency.
+
+Both run in this process with the same passwords. The ASGI application
+gets every request at once as a coroutine, the way an event loop server
+delivers them. The WSGI app gets the same requests through a pool of
+--wsgi-threads worker threads (like gunicorn's gthread worker), so
+requests beyond the pool size queue, and their latency includes the
+wait. --idle adds slow clients that hold a connection open without
+finishing their request body: a coroutine each under ASGI, a worker
+thread each under WSGI.
+
+Usage: python -m benchmarks.bench_asgi [--requests N] [--concurrency N]
+           [--wsgi-threads N] [--idle N]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app as padlock
+from asgi import PadlockASGI
+
+ALPHABET = string.ascii_letters + string.digits + "!@#$%"
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def make_passwords(count, seed):
+    """Mostly distinct passwords with some repeats, like concurrent keystroke checks"""
+    rng = random.Random(seed)
+    common = [''.join(rng.choice(ALPHABET) for _ in range(10)) for _ in range(20)]
+    return [
+        rng.choice(common) if rng.random() < 0.2
+        else ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(8, 20)))
+        for _ in range(count)
+    ]
+
+
+def report(label, latencies, elapsed):
+    print(f"{label:<10} {len(latencies) / elapsed:9.1f} req/s  p50 {percentile(latencies, 0.5):8.1f} ms  "
+          f"p99 {percentile(latencies, 0.99):8.1f} ms  max {max(latencies):8.1f} ms")
+
+
+async def asgi_request(application, path, body, idle_event=None):
+    """Call the ASGI application once; idle_event keeps the body from arriving until set"""
+    sent = False
+    status = None
+
+    async def receive():
+        nonlocal sent
+        if idle_event is not None:
+            await idle_event.wait()
+        if sent:
+            await asyncio.Event().wait()
+        sent = True
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await application({'type': 'http', 'method': 'POST', 'path': path, 'query_string': b'',
+                       'headers': [(b'content-type', b'application/json')]}, receive, send)
+    return status
+
+
+async def run_asgi(application, passwords, concurrency, idle):
+    release = asyncio.Event()
+    idle_tasks = [asyncio.ensure_future(asgi_request(application, '/check', b'{}', release)) for _ in range(idle)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def client(password):
+        async with semaphore:
+            start = time.perf_counter()
+            status = await asgi_request(application, '/check', json.dumps({'password': password}).encode())
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert status == 200, status
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(password) for password in passwords))
+    elapsed = time.perf_counter() - start
+    release.set()
+    await asyncio.gather(*idle_tasks)
+    return latencies, elapsed
+
+
+def run_wsgi(passwords, concurrency, threads, idle):
+    local = threading.local()
+    release = threading.Event()
+    latencies = []
+
+    def handle(password, submitted):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = padlock.app.test_client(use_cookies=False)
+        response = client.post('/check', json={'password': password})
+        assert response.status_code == 200, response.status_code
+        latencies.append((time.perf_counter() - submitted) * 1000)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        # A slow client holds its worker thread until its body arrives
+        for _ in range(idle):
+            pool.submit(release.wait)
+        start = time.perf_counter()
+        in_flight = threading.BoundedSemaphore(concurrency)
+        futures = []
+        for password in passwords:
+            in_flight.acquire()
+            future = pool.submit(handle, password, time.perf_counter())
+            future.add_done_callback(lambda _: in_flight.release())
+            futures.append(future)
+            if idle and len(futures) == 1:
+                # Let the idle clients go once they have held the pool for a while
+                threading.Timer(1.0, release.set).start()
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+        release.set()
+    return latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=500, help="requests in flight at once")
+    parser.add_argument('--wsgi-threads', type=int, default=16)
+    parser.add_argument('--idle', type=int, default=0, help="slow clients holding a connection open")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    passwords = make_passwords(args.requests, args.seed)
+    print(f"{args.requests} /check requests, {args.concurrency} in flight, {args.idle} idle clients")
+
+    # Warm both paths, then drop the score cache so neither run benefits
+    padlock.app.test_client().post('/check', json={'password': 'warm-up'})
+    if padlock.strength_cache is not None:
+        padlock.strength_cache.clear()
+
+    latencies, elapsed = run_wsgi(passwords, args.concurrency, args.wsgi_threads, args.idle)
+    report(f"WSGI x{args.wsgi_threads}", latencies, elapsed)
+
+    if padlock.strength_cache is not None:
+        padlock.strength_cache.clear()
+    application = PadlockASGI()
+    latencies, elapsed = asyncio.run(run_asgi(application, passwords, args.concurrency, args.idle))
+    report("ASGI", latencies, elapsed)
+    stats = application.check_batcher.stats()
+    print(f"ASGI scored {stats['items']} requests in {stats['batches']} batches "
+          f"({stats['items'] / max(1, stats['batches']):.1f} per batch)")
+
+
+if __name__ == '__main__':
+    main()
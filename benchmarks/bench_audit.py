@@ -0,0 +1,54 @@
+"""
+Throughput benchmark for the streaming audit pipeline.
+
+Audits a synthetic password list with increasing worker counts and
+reports passwords per second and peak RSS of the parent process, which
+should stay flat as the input grows.
+
+Usage: python -m benchmarks.bench_audit [--count N] [--workers 0,1,2,4]
+"""
+import argparse
+import logging
+import os
+import resource
+import secrets
+import string
+import time
+
+from audit import AuditSummary, audit_passwords
+
+ALPHABET = string.ascii_letters + string.digits + "!@#$%^&*"
+WORDS = ["password", "dragon", "monkey", "letmein", "sunshine", "summer"]
+
+
+def synthetic_passwords(count):
+    """Lazily yield a mix of random and dictionary-based passwords"""
+    for line_number in range(1, count + 1):
+        if line_number % 3:
+            password = ''.join(secrets.choice(ALPHABET) for _ in range(8 + line_number % 12))
+        else:
+            password = secrets.choice(WORDS) + str(line_number % 100)
+        yield line_number, password
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=5000)
+    parser.add_argument('--workers', default=f"0,1,2,{os.cpu_count() or 1}")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    for workers in sorted({int(w) for w in args.workers.split(',')}):
+        summary = AuditSummary()
+        start = time.perf_counter()
+        for _ in audit_passwords(synthetic_passwords(args.count), summary, workers=workers):
+            pass
+        elapsed = time.perf_counter() - start
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"workers={workers:<3} {elapsed:8.2f}s {args.count / elapsed:10.0f} passwords/s "
+              f"parent peak RSS {peak_rss:6.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Batch analyzer throughput against the per-string functions.
+
+Analyzes 1e4, 1e5 and 1e6 synthetic (password, username) rows with
+BatchAnalyzer and with the per-string path /analyze uses today
+(PatternAnalyzer.scan, the character distribution and
+username_similarity), and reports rows per second for each.
+
+Usage: python -m benchmarks.bench_batch_analysis [--sizes 10000,100000,1000000]
+"""
+import argparse
+import math
+import random
+import string
+import time
+
+from analyzer import PatternAnalyzer, username_similarity
+from batch_analyzer import BatchAnalyzer
+
+ALPHABET = string.ascii_letters + string.digits + "!@#$%^&*"
+WORDS = ["password", "qwerty", "dragon", "abc123", "letmein", "sunshine", "admin"]
+USERNAMES = ["admin", "jsmith", "maria", "root", "dragon", ""]
+
+
+def synthetic_rows(count, seed=7):
+    rng = random.Random(seed)
+    passwords, usernames = [], []
+    for index in range(count):
+        if index % 3:
+            passwords.append(''.join(rng.choice(ALPHABET) for _ in range(rng.randint(6, 24))))
+        else:
+            passwords.append(rng.choice(WORDS) + str(rng.randint(0, 9999)))
+        usernames.append(rng.choice(USERNAMES))
+    return passwords, usernames
+
+
+def per_string(analyzer, passwords, usernames):
+    """What the per-string code computes for each row"""
+    results = []
+    for password, username in zip(passwords, usernames):
+        scan = analyzer.scan(password)
+        length = len(password)
+        entropy = -sum(n / length * math.log2(n / length) for n in scan['character_distribution'].values())
+        results.append((scan, entropy, username_similarity(username, password)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    analyzer = PatternAnalyzer()
+    batch = BatchAnalyzer()
+    print(f"{'rows':>9} {'per-string rows/s':>18} {'batch rows/s':>13} {'speedup':>8}")
+    for size in (int(size) for size in args.sizes.split(',')):
+        passwords, usernames = synthetic_rows(size)
+
+        start = time.perf_counter()
+        per_string(analyzer, passwords, usernames)
+        scalar = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch.analyze(passwords, usernames)
+        vectorized = time.perf_counter() - start
+
+        print(f"{size:>9} {size / scalar:>18,.0f} {size / vectorized:>13,.0f} {scalar / vectorized:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Worker start-up time and memory with stock vs memory-mapped dictionaries.
+
+Each sample is a fresh interpreter that imports zxcvbn, the way every
+gunicorn worker does, and reports its import time, resident memory split
+into private (anonymous) and shared file-backed pages, and the time to
+score a fixed set of passwords.
+
+Usage: python -m benchmarks.bench_dictionaries [--runs N] [--dictionary PATH]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+WORKER = r"""
+import json, sys, time
+
+def rss():
+    fields = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'RssAnon', 'RssFile'):
+                fields[key] = int(value.split()[0]) / 1024
+    return fields
+
+start = time.perf_counter()
+if sys.argv[1]:
+    import dictionaries
+    dictionaries.install(sys.argv[1])
+import zxcvbn
+import_ms = (time.perf_counter() - start) * 1000
+after_import = rss()
+
+passwords = ['password1', 'Tr0ub4dor&3', 'correcthorsebatterystaple', 'JenniferSmith1987',
+             'qwertyuiop', 'p@ssw0rd!2024', 'x7#Kq9!vLm2$', 'iloveyou_sunshine']
+start = time.perf_counter()
+for _ in range(20):
+    for password in passwords:
+        zxcvbn.zxcvbn(password)
+check_ms = (time.perf_counter() - start) * 1000 / (20 * len(passwords))
+
+print(json.dumps({'import_ms': import_ms, 'check_ms': check_ms,
+                  'after_import': after_import, 'after_scoring': rss()}))
+"""
+
+
+def sample(dictionary_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, '-c', WORKER, dictionary_path or ''],
+        cwd=root, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def report(label, samples):
+    def median(getter):
+        return statistics.median(getter(s) for s in samples)
+
+    print(f"{label:<10} import {median(lambda s: s['import_ms']):7.1f} ms   "
+          f"check {median(lambda s: s['check_ms']):6.3f} ms   "
+          f"RSS {median(lambda s: s['after_scoring']['VmRSS']):6.1f} MB "
+          f"(private {median(lambda s: s['after_scoring']['RssAnon']):5.1f} MB, "
+          f"shared file {median(lambda s: s['after_scoring']['RssFile']):5.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--dictionary', help='existing dictionary file (built into a temp dir otherwise)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = args.dictionary
+        if path is None:
+            from zxcvbn.frequency_lists import FREQUENCY_LISTS
+            from zxcvbn.matching import build_ranked_dict
+            from dictionaries import build_dictionary_file
+
+            path = os.path.join(temp_dir, 'zxcvbn_dicts.bin')
+            build_dictionary_file(path, {
+                name: build_ranked_dict(words) for name, words in FREQUENCY_LISTS.items()
+            })
+        print(f"dictionary file: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+        report("stock", [sample(None) for _ in range(args.runs)])
+        report("mmap", [sample(path) for _ in range(args.runs)])
+
+
+if __name__ == '__main__':
+    main()
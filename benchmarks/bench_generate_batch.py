@@ -0,0 +1,60 @@
+"""
+Throughput benchmark for batch password generation.
+
+Compares N single-shot /generate requests against one /generate/batch
+request, both through the Flask test client and as direct function calls.
+
+Usage: python -m benchmarks.bench_generate_batch [--count N] [--method random]
+"""
+import argparse
+import logging
+import time
+
+import app as padlock
+
+
+def timed(label, count, func):
+    """Run func once and print passwords per second"""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed:8.3f}s {count / elapsed:12.0f} passwords/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--method', default='random')
+    parser.add_argument('--length', type=int, default=16)
+    args = parser.parse_args()
+
+    # Keep request logging out of the timings
+    logging.getLogger().setLevel(logging.WARNING)
+
+    client = padlock.app.test_client()
+    payload = {'method': args.method, 'length': args.length}
+    options = padlock.parse_generation_options(payload)
+
+    print(f"{args.count} passwords, method={args.method}, length={args.length}")
+
+    timed("generate_password() loop", args.count,
+          lambda: [padlock.generate_password(**options) for _ in range(args.count)])
+    timed("generate_passwords()", args.count,
+          lambda: padlock.generate_passwords(args.count, **options))
+    timed("generate_passwords(score=True)", args.count,
+          lambda: padlock.generate_passwords(args.count, score=True, **options))
+
+    def single_shot():
+        for _ in range(args.count):
+            client.post('/generate', json=payload)
+
+    timed("POST /generate x N", args.count, single_shot)
+    timed("POST /generate/batch", args.count,
+          lambda: client.post('/generate/batch', json=dict(payload, count=args.count)))
+    timed("POST /generate/batch (score)", args.count,
+          lambda: client.post('/generate/batch',
+                              json=dict(payload, count=args.count, score=True)))
+
+
+if __name__ == '__main__':
+    main()
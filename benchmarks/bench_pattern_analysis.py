@@ -0,0 +1,102 @@
+"""
+Microbenchmark for the single-pass pattern analyzer.
+
+Times PatternAnalyzer.scan() over random passwords from 8 to 4096
+characters and reports the cost per character, which should stay flat if
+the analyzer scales linearly. The multi-pass implementation it replaced is
+timed alongside for comparison. First checks keyboard-pattern detection
+against KEYBOARD_CASES, real walks next to ordinary words whose letters
+happen to sit on neighbouring keys, and exits 1 on any mismatch.
+
+Usage: python -m benchmarks.bench_pattern_analysis [--repeat N]
+"""
+import argparse
+import re
+import secrets
+import string
+import sys
+import timeit
+
+from analyzer import PatternAnalyzer
+
+ALPHABET = string.ascii_letters + string.digits + "!@#$%^&*()_-+=<>?"
+LENGTHS = [8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096]
+
+# Expected keyboard_patterns on qwerty. Walks keep one direction; the
+# words zig-zag between neighbouring keys and must not be flagged.
+KEYBOARD_CASES = {
+    'qwer': 1, 'asdf': 1, 'zxcvbn': 1, 'poiu': 1, '1qaz': 1, '2wsx': 1,
+    'QWERTY': 1, '!@#$': 1, 'qwer1234asdf': 3, 'Passqwer99': 1,
+    'were': 0, 'order': 0, 'research': 0, 'dresser': 0, 'tree': 0,
+    'sweater': 0, 'deserve': 0, 'pollution': 0, 'wrestler': 0, 'password': 0,
+}
+
+
+def multi_pass_analysis(password):
+    """The previous analyze_password_patterns plus the /analyze distribution loop"""
+    analysis = {'uppercase': 0, 'lowercase': 0, 'digits': 0, 'symbols': 0}
+    for char in password:
+        if char in string.ascii_uppercase:
+            analysis['uppercase'] += 1
+        elif char in string.ascii_lowercase:
+            analysis['lowercase'] += 1
+        elif char in string.digits:
+            analysis['digits'] += 1
+        else:
+            analysis['symbols'] += 1
+    repeats = len(re.findall(r'(.)\1{2,}', password))
+    sequential = 0
+    for seq in (string.ascii_lowercase, string.ascii_uppercase, string.digits):
+        for i in range(len(seq) - 2):
+            if seq[i:i+3] in password:
+                sequential += 1
+    keyboard = 0
+    for pattern in ('qwerty', 'asdfgh', 'zxcvbn', '123456', 'qazwsx'):
+        if pattern in password.lower():
+            keyboard += 1
+    distribution = {}
+    for char in password:
+        distribution[char] = distribution.get(char, 0) + 1
+    return analysis, repeats, sequential, keyboard, distribution
+
+
+def check_keyboard_cases(analyzer):
+    """Print any KEYBOARD_CASES the analyzer gets wrong; returns whether all passed"""
+    failures = 0
+    for password, expected in KEYBOARD_CASES.items():
+        found = analyzer.scan(password)['keyboard_patterns']
+        if found != expected:
+            failures += 1
+            print(f"keyboard_patterns({password!r}) = {found}, expected {expected}")
+    print(f"keyboard cases: {len(KEYBOARD_CASES) - failures}/{len(KEYBOARD_CASES)} ok\n")
+    return failures == 0
+
+
+def per_call(func, password, repeat):
+    """Best time per call in microseconds"""
+    number = max(1, 20000 // len(password))
+    best = min(timeit.repeat(lambda: func(password), number=number, repeat=repeat))
+    return best / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    analyzer = PatternAnalyzer()
+    passed = check_keyboard_cases(analyzer)
+    print(f"{'length':>6} {'scan us':>10} {'ns/char':>8} {'multi-pass us':>14} {'ns/char':>8}")
+    for length in LENGTHS:
+        password = ''.join(secrets.choice(ALPHABET) for _ in range(length))
+        scan = per_call(analyzer.scan, password, args.repeat)
+        legacy = per_call(multi_pass_analysis, password, args.repeat)
+        print(f"{length:>6} {scan:>10.1f} {scan * 1000 / length:>8.0f} "
+              f"{legacy:>14.1f} {legacy * 1000 / length:>8.0f}")
+
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Throughput of the buffered secure random source.
+
+Times random-method password generation through randomness.SecureRandom
+against the per-character loop it replaced, driven by both the insecure
+Mersenne Twister (random.Random) and os.urandom per call
+(random.SystemRandom). Uniformity is covered by tests/test_randomness.py.
+
+Usage: python -m benchmarks.bench_randomness [--count N] [--length N]
+"""
+import argparse
+import random
+import time
+
+from generator import get_profile
+from randomness import SecureRandom
+
+
+def legacy_random_password(profile, length, rng):
+    """The random method as it was, one rng.choice call per character"""
+    choice = rng.choice
+    buffer = [None] * length
+    if length >= 4:
+        positions = rng.sample(range(length), len(profile.required_pools))
+        for position, pool in zip(positions, profile.required_pools):
+            buffer[position] = choice(pool)
+    chars = profile.chars
+    for i in range(length):
+        if buffer[i] is None:
+            buffer[i] = choice(chars)
+    return ''.join(buffer)
+
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<44} {count / elapsed:12.0f} passwords/s")
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=50000, help="passwords per throughput run")
+    parser.add_argument('--length', type=int, default=16)
+    args = parser.parse_args()
+
+    profile = get_profile()
+    secure = SecureRandom()
+    print(f"random method, length {args.length}, {len(profile.chars)}-character pool")
+    insecure, system = random.Random(), random.SystemRandom()
+    mersenne = timed("per-character choice, random.Random", args.count,
+                     lambda: legacy_random_password(profile, args.length, insecure))
+    timed("per-character choice, random.SystemRandom", args.count,
+          lambda: legacy_random_password(profile, args.length, system))
+    buffered = timed("GeneratorProfile.generate, SecureRandom", args.count,
+                     lambda: profile.generate(args.length, secure))
+    print(f"SecureRandom vs random.Random: {buffered / mersenne:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
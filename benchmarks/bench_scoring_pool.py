@@ -0,0 +1,79 @@
+"""
+Tail latency of cheap routes while long passwords are being scored.
+
+Background threads keep posting 72-character passwords to /check while
+the main thread times GET /history. The run is repeated with zxcvbn in
+the web process and with the ScoringExecutor process pool.
+
+Usage: python -m benchmarks.bench_scoring_pool [--requests N] [--workers N]
+"""
+import argparse
+import logging
+import secrets
+import string
+import threading
+import time
+
+import app as padlock
+from scoring_pool import ScoringExecutor
+
+ALPHABET = string.ascii_letters + string.digits
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def measure(label, requests, background_threads):
+    stop = threading.Event()
+
+    def hammer():
+        client = padlock.app.test_client()
+        while not stop.is_set():
+            password = ''.join(secrets.choice(ALPHABET) for _ in range(72))
+            client.post('/check', json={'password': password})
+
+    threads = [threading.Thread(target=hammer, daemon=True) for _ in range(background_threads)]
+    for thread in threads:
+        thread.start()
+
+    client = padlock.app.test_client()
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.get('/history')
+        samples.append((time.perf_counter() - start) * 1000)
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(f"{label:<28} /history p50 {percentile(samples, 0.5):7.2f} ms  "
+          f"p99 {percentile(samples, 0.99):7.2f} ms  max {max(samples):7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=2)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+
+    padlock.set_scoring_executor(None)
+    measure("in-process scoring", args.requests, args.threads)
+
+    executor = ScoringExecutor(workers=args.workers, queue_size=args.workers * 4)
+    executor.warm_up()
+    padlock.set_scoring_executor(executor)
+    try:
+        measure(f"process pool ({args.workers} workers)", args.requests, args.threads)
+        print(executor.stats())
+    finally:
+        executor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Latency of leet-aware attribute similarity, typical and pathological.
+
+Times attribute_similarity for a typical /check (a short password against
+username, e-mail and display name) and for pathological 1000-character
+passwords and attributes, both similar and unrelated. The last case is the
+worst a /check client can trigger: zxcvbn caps passwords at 72 characters
+and user_attributes cuts attributes to MAX_ATTRIBUTE_LENGTH.
+
+Usage: python -m benchmarks.bench_similarity [--repeat N]
+"""
+import argparse
+import random
+import string
+import timeit
+
+from similarity import attribute_similarity, user_attributes
+
+ALPHABET = string.ascii_lowercase + string.digits
+
+
+def random_text(rng, length, alphabet=ALPHABET):
+    return ''.join(rng.choice(alphabet) for _ in range(length))
+
+
+def cases():
+    rng = random.Random(11)
+    typical = user_attributes('asmith', 'alice.smith@example.com', 'Alice Smith')
+    long_attribute = random_text(rng, 1000)
+    leeted = long_attribute.replace('a', '4').replace('e', '3').replace('o', '0')
+    return [
+        ("typical /check", "Sm1th2024!", typical),
+        ("typical, unrelated", "x7#Kq9!vLm2$", typical),
+        ("1000-char password", random_text(rng, 1000), typical),
+        ("1000 vs 1000, unrelated", random_text(rng, 1000), {'display_name': long_attribute}),
+        ("1000 vs 1000, leeted copy", leeted, {'display_name': long_attribute}),
+        ("1000 vs 1000, one alphabet", random_text(rng, 1000, 'ab'), {'display_name': random_text(rng, 1000, 'ab')}),
+        ("72 vs 1000 via /check", random_text(rng, 72), user_attributes(display_name=long_attribute)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'case':<28} {'best us':>10}  scores")
+    for label, password, attributes in cases():
+        number = 200 if len(password) < 100 else 5
+        best = min(timeit.repeat(lambda: attribute_similarity(password, attributes),
+                                 number=number, repeat=args.repeat)) / number
+        print(f"{label:<28} {best * 1e6:>10.1f}  {attribute_similarity(password, attributes)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Single-flight coalescing of concurrent identical /check requests.
+
+First a deterministic check: each round, --clients threads post the same
+password to /check at once (--distinct passwords per round), and the one
+zxcvbn call each password gets is held until every other request for it
+is waiting on that call. Every password must be scored exactly once and
+every client must get the same answer, or the script exits 1. Then a
+timed burst of identical requests with single-flight on and off, counting
+zxcvbn runs.
+
+Usage: python -m benchmarks.bench_single_flight [--clients N] [--rounds N] [--distinct N]
+"""
+import argparse
+import logging
+import secrets
+import string
+import sys
+import threading
+import time
+
+import app as padlock
+from single_flight import SingleFlight
+
+ALPHABET = string.ascii_letters + string.digits
+
+
+def random_password(length=24):
+    return ''.join(secrets.choice(ALPHABET) for _ in range(length))
+
+
+def counting_scorer(hold=None, timeout=10.0):
+    """
+    Wrap padlock.score_password to count calls per password. With hold, a
+    call waits until hold(password) callers are queued behind it.
+    """
+    score_password = padlock.score_password
+    calls = {}
+    lock = threading.Lock()
+
+    def score(password):
+        with lock:
+            calls[password] = calls.get(password, 0) + 1
+        if hold is not None:
+            deadline = time.monotonic() + timeout
+            while padlock.scoring_flight.waiting(password) < hold(password) and time.monotonic() < deadline:
+                time.sleep(0.001)
+        return score_password(password)
+
+    return score, calls
+
+
+def burst(passwords):
+    """Post every password to /check from its own thread, all at once"""
+    barrier = threading.Barrier(len(passwords))
+    results = [None] * len(passwords)
+
+    def client(index, password):
+        test_client = padlock.app.test_client(use_cookies=False)
+        barrier.wait()
+        response = test_client.post('/check', json={'password': password})
+        results[index] = (response.status_code, response.data)
+
+    threads = [threading.Thread(target=client, args=(i, password)) for i, password in enumerate(passwords)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def verify(clients, rounds, distinct):
+    """Rounds of concurrent duplicates; returns whether every password was scored once"""
+    passed = True
+    original = padlock.score_password
+    for round_number in range(1, rounds + 1):
+        passwords = [random_password() for _ in range(distinct)]
+        requests = [passwords[i % distinct] for i in range(clients * distinct)]
+        score, calls = counting_scorer(hold=lambda password: requests.count(password) - 1)
+        padlock.score_password = score
+        try:
+            results, _ = burst(requests)
+        finally:
+            padlock.score_password = original
+
+        answers = {}
+        for password, (status, body) in zip(requests, results):
+            answers.setdefault(password, set()).add(body if status == 200 else status)
+        ok = (all(calls.get(password) == 1 for password in passwords)
+              and all(len(answers[password]) == 1 and isinstance(next(iter(answers[password])), bytes)
+                      for password in passwords))
+        passed = passed and ok
+        print(f"round {round_number}: {len(requests)} requests, {distinct} passwords, "
+              f"zxcvbn calls {sorted(calls.values())}  {'ok' if ok else 'FAIL'}")
+    return passed
+
+
+def timed_burst(label, clients):
+    score, calls = counting_scorer()
+    original = padlock.score_password
+    padlock.score_password = score
+    try:
+        results, elapsed = burst([random_password(40)] * clients)
+    finally:
+        padlock.score_password = original
+    statuses = {status for status, _ in results}
+    print(f"{label:<18} {clients} identical requests in {elapsed * 1000:8.1f} ms, "
+          f"zxcvbn calls {sum(calls.values())}, statuses {sorted(statuses)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32, help="concurrent requests per password")
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--distinct', type=int, default=2, help="different passwords per round")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    # Results must come from scoring, not from the cache
+    padlock.strength_cache = None
+    padlock.scoring_flight = SingleFlight()
+    padlock.app.test_client().post('/check', json={'password': 'warm-up'})
+
+    passed = verify(args.clients, args.rounds, args.distinct)
+    print()
+
+    timed_burst("single-flight", args.clients)
+    padlock.scoring_flight = None
+    timed_burst("no single-flight", args.clients)
+
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
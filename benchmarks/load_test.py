@@ -0,0 +1,435 @@
+"""
+Reproducible load test of the HTTP API with a realistic request mix.
+
+Replays a seeded mix of /generate (every method), /check with passwords
+of realistic lengths, /analyze and /export against the app in-process
+(Flask test client), a gunicorn server started for the run, or any URL.
+Reports throughput, latency percentiles per scenario and resident memory
+per worker, saves the results as JSON and can compare them against an
+earlier run, exiting non-zero on a regression.
+
+Usage: python -m benchmarks.load_test [--target inprocess|gunicorn|URL]
+           [--requests N | --duration S] [--concurrency N] [--seed N]
+           [--mix check=40,generate=35,analyze=15,export=10]
+           [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import socket
+import string
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+GENERATION_METHODS = ("random", "memorable", "pattern", "xkcd", "pin", "passphrase")
+
+DEFAULT_MIX = "check=40,generate=35,analyze=15,export=10"
+
+# Password lengths for /check and /analyze: (shortest, longest, weight),
+# roughly the shape of leaked password corpora with a tail of passphrases
+LENGTH_DISTRIBUTION = (
+    (4, 7, 15),
+    (8, 10, 40),
+    (11, 14, 25),
+    (15, 20, 12),
+    (21, 40, 6),
+    (41, 72, 2),
+)
+
+WORDS = ("password", "dragon", "monkey", "summer", "shadow", "sunshine", "football",
+         "princess", "welcome", "master", "hello", "freedom", "letmein", "charlie",
+         "tiger", "river", "garden", "castle", "orange", "purple", "winter", "secret")
+
+KEYBOARD_RUNS = ("qwerty", "asdfgh", "zxcvbn", "1qaz2wsx", "qazwsx", "poiuyt")
+
+PASSWORD_CHARS = string.ascii_letters + string.digits + "!@#$%^&*()_-+="
+
+# A regression is a p95 latency rise or a throughput drop beyond this share
+DEFAULT_THRESHOLD = 0.10
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def sample_password(rng):
+    """A password of a realistic length and shape"""
+    low, high, _ = rng.choices(LENGTH_DISTRIBUTION, weights=[w for _, _, w in LENGTH_DISTRIBUTION])[0]
+    length = rng.randint(low, high)
+    style = rng.random()
+    if style < 0.45:
+        # Words with digits and maybe a symbol, the most common shape
+        parts = []
+        while sum(map(len, parts)) < length:
+            word = rng.choice(WORDS)
+            parts.append(word.capitalize() if rng.random() < 0.3 else word)
+            if rng.random() < 0.5:
+                parts.append(str(rng.randint(0, 2024)))
+        password = ''.join(parts)
+    elif style < 0.55:
+        password = rng.choice(KEYBOARD_RUNS) * 12
+    else:
+        password = ''.join(rng.choice(PASSWORD_CHARS) for _ in range(length))
+    return password[:length]
+
+
+def build_request(scenario, rng):
+    """(name, method, path, payload) for one request of a scenario"""
+    if scenario == "generate":
+        method = rng.choice(GENERATION_METHODS)
+        payload = {'method': method, 'length': rng.choice((8, 12, 16, 20, 32))}
+        if method == "pin":
+            payload['length'] = rng.choice((6, 8))
+        if method == "passphrase":
+            payload = {'method': method, 'entropy_bits': rng.choice((50, 60, 80))}
+        return f"generate:{method}", 'POST', '/generate', payload
+    if scenario == "check":
+        return "check", 'POST', '/check', {'password': sample_password(rng)}
+    if scenario == "analyze":
+        return "analyze", 'POST', '/analyze', {'password': sample_password(rng), 'username': rng.choice(WORDS)}
+    if scenario == "export":
+        payload = {'generate': rng.choice((10, 100)), 'format': rng.choice(('csv', 'json', 'ndjson'))}
+        return "export", 'POST', '/export', payload
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+def build_plan(mix, count, seed):
+    """The same request sequence for every run with the same seed"""
+    rng = random.Random(seed)
+    scenarios = list(mix)
+    weights = [mix[name] for name in scenarios]
+    return [build_request(rng.choices(scenarios, weights=weights)[0], rng) for _ in range(count)]
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        mix[name.strip()] = float(weight or 1)
+    for name in mix:
+        build_request(name, random.Random(0))
+    return mix
+
+
+class InProcessTarget:
+    """The app in this process through the Flask test client, one client per thread"""
+
+    name = "inprocess"
+
+    def __init__(self):
+        import app as padlock
+        self.app = padlock.app
+        self._local = threading.local()
+
+    def request(self, method, path, payload):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client(use_cookies=False)
+        response = client.open(path, method=method, json=payload)
+        response.get_data()
+        return response.status_code
+
+    def worker_memory(self):
+        return {str(os.getpid()): rss_kib(os.getpid())}
+
+    def close(self):
+        pass
+
+
+class HTTPTarget:
+    """A running server, one keep-alive connection per thread"""
+
+    name = "http"
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.base = parts.path.rstrip('/')
+        self.server_pid = None
+        self._local = threading.local()
+
+    def request(self, method, path, payload):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        body = json.dumps(payload)
+        try:
+            connection.request(method, self.base + path, body=body,
+                               headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            # Reconnect next time; the failure counts as a 599
+            connection.close()
+            self._local.connection = None
+            return 599
+        return response.status
+
+    def worker_memory(self):
+        """RSS per gunicorn worker when this run started the server"""
+        if self.server_pid is None:
+            return {}
+        return {str(pid): rss_kib(pid) for pid in child_pids(self.server_pid)}
+
+    def close(self):
+        pass
+
+
+class GunicornTarget(HTTPTarget):
+    """A gunicorn server on a free local port, started and stopped by the run"""
+
+    name = "gunicorn"
+
+    def __init__(self, workers, threads):
+        port = free_port()
+        super().__init__(f"http://127.0.0.1:{port}")
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--threads', str(threads),
+             '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app'],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        self.server_pid = self.process.pid
+        self._wait_ready()
+
+    def _wait_ready(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("gunicorn exited during start-up (is it installed?)")
+            try:
+                socket.create_connection((self.host, self.port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError("gunicorn did not start listening in time")
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait(timeout=30)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def rss_kib(pid):
+    """Resident set size of a process in KiB, None when unavailable"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    if pid == os.getpid():
+        # ru_maxrss is a peak, and in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return None
+
+
+def child_pids(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def run(target, plan, concurrency, duration=None, warmup=0):
+    """
+    Send the plan from concurrency threads. With a duration, the plan is
+    replayed in a loop until time is up, otherwise it is sent once.
+    Returns {scenario: [(latency seconds, status), ...]} and the wall time.
+    """
+    for name, method, path, payload in plan[:warmup]:
+        target.request(method, path, payload)
+
+    lock = threading.Lock()
+    position = warmup
+    results = {}
+    deadline = time.perf_counter() + duration if duration else None
+
+    def next_request():
+        nonlocal position
+        with lock:
+            if deadline is None and position >= len(plan):
+                return None
+            item = plan[position % len(plan)]
+            position += 1
+            return item
+
+    def worker():
+        samples = {}
+        while deadline is None or time.perf_counter() < deadline:
+            item = next_request()
+            if item is None:
+                break
+            name, method, path, payload = item
+            start = time.perf_counter()
+            status = target.request(method, path, payload)
+            samples.setdefault(name, []).append((time.perf_counter() - start, status))
+        with lock:
+            for name, values in samples.items():
+                results.setdefault(name, []).extend(values)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def summarize(samples, elapsed):
+    latencies = [latency * 1000 for latency, _ in samples]
+    statuses = {}
+    for _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, status in samples if status >= 400),
+        'statuses': statuses,
+        'throughput': len(samples) / elapsed,
+        'latency_ms': {
+            'mean': sum(latencies) / len(latencies),
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'max': max(latencies)
+        }
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(results):
+    print(f"{results['target']} target, {results['concurrency']} threads, "
+          f"{results['elapsed']:.1f}s, seed {results['seed']}")
+    print(f"{'scenario':<22}{'requests':>9}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in sorted(results['scenarios'].items()) + [('total', results['total'])]:
+        latency = stats['latency_ms']
+        print(f"{name:<22}{stats['requests']:>9}{stats['errors']:>8}{stats['throughput']:>10.1f}"
+              f"{latency['p50']:>10.2f}{latency['p95']:>10.2f}{latency['p99']:>10.2f}")
+    for pid, rss in results['memory_kib'].items():
+        print(f"worker {pid}: {rss / 1024:.1f} MiB resident" if rss else f"worker {pid}: RSS unavailable")
+
+
+def compare(baseline, current, threshold):
+    """Print per-scenario changes; returns the scenarios that regressed"""
+    regressions = []
+    print(f"\nAgainst {baseline.get('revision') or 'baseline'} ({baseline['timestamp']}):")
+    print(f"{'scenario':<22}{'req/s':>18}{'p95 ms':>20}")
+    names = sorted(set(baseline['scenarios']) & set(current['scenarios'])) + ['total']
+    for name in names:
+        before = baseline['total'] if name == 'total' else baseline['scenarios'][name]
+        after = current['total'] if name == 'total' else current['scenarios'][name]
+        throughput = after['throughput'] / before['throughput'] - 1
+        p95 = after['latency_ms']['p95'] / before['latency_ms']['p95'] - 1
+        regressed = throughput < -threshold or p95 > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<22}{after['throughput']:>10.1f} {throughput:+7.1%}"
+              f"{after['latency_ms']['p95']:>12.2f} {p95:+7.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--target', default='inprocess',
+                        help="inprocess, gunicorn, or the base URL of a running server")
+    parser.add_argument('--requests', type=int, default=2000, help="size of the request plan")
+    parser.add_argument('--duration', type=float, help="replay the plan for this many seconds instead")
+    parser.add_argument('--warmup', type=int, default=50, help="requests sent before timing starts")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument('--threads', type=int, default=1, help="gunicorn threads per worker")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--mix', default=DEFAULT_MIX)
+    parser.add_argument('-o', '--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="earlier results JSON to compare against")
+    parser.add_argument('--input', help="compare this results JSON instead of running")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input) as f:
+            results = json.load(f)
+    else:
+        mix = parse_mix(args.mix)
+        plan = build_plan(mix, args.requests + args.warmup, args.seed)
+
+        if args.target == 'inprocess':
+            target = InProcessTarget()
+            # Importing the app configures logging; keep access logs out of the timings
+            logging.getLogger().setLevel(logging.ERROR)
+        elif args.target == 'gunicorn':
+            target = GunicornTarget(args.workers, args.threads)
+        else:
+            target = HTTPTarget(args.target)
+
+        try:
+            samples, elapsed = run(target, plan, args.concurrency, args.duration, args.warmup)
+            memory = target.worker_memory()
+        finally:
+            target.close()
+
+        results = {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'target': args.target,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+            'mix': mix,
+            'elapsed': elapsed,
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count()
+            },
+            'scenarios': {name: summarize(values, elapsed) for name, values in samples.items()},
+            'total': summarize([value for values in samples.values() for value in values], elapsed),
+            'memory_kib': memory
+        }
+
+    report(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+import hashlib
+import heapq
+import logging
+import math
+import mmap
+import os
+import struct
+import tempfile
+
+# Local breach corpus lookups. The index file, all little-endian:
+#   header   magic, format version, hash algorithm, digest size, record
+#            count, Bloom filter size and probe count, section offsets
+#   bloom    Bloom filter bits over every digest, checked first so most
+#            misses never touch the records
+#   prefix   65537 record indexes, where each 2-byte digest prefix starts
+#   records  sorted (digest, count) records, binary searched per prefix
+BREACH_MAGIC = b'PADLOCKB'
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct('<8sHHIQQIQQQ')
+COUNT = struct.Struct('<I')
+PREFIX = struct.Struct('<Q')
+PREFIX_ENTRIES = 65537
+
+ALGORITHMS = {'sha1': 1, 'ntlm': 2}
+DIGEST_SIZES = {'sha1': 20, 'ntlm': 16}
+
+# Where the app looks for the index, unset to skip breach checks
+BREACH_INDEX_PATH = os.environ.get("BREACH_INDEX_PATH")
+
+# Records sorted in memory per run when building from unsorted input
+BUILD_RUN_SIZE = 1000000
+
+def _md4_python(data):
+    """MD4 (RFC 1320), for OpenSSL builds that no longer provide it"""
+    def rotate(x, n):
+        x &= 0xFFFFFFFF
+        return ((x << n) | (x >> (32 - n))) & 0xFFFFFFFF
+
+    length = len(data)
+    data = data + b'\x80' + b'\0' * ((55 - length) % 64) + struct.pack('<Q', length * 8)
+    a, b, c, d = 0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476
+
+    for offset in range(0, len(data), 64):
+        x = struct.unpack_from('<16I', data, offset)
+        aa, bb, cc, dd = a, b, c, d
+
+        # Round 1
+        for k in range(16):
+            s = (3, 7, 11, 19)[k % 4]
+            f = (b & c) | (~b & d)
+            a, b, c, d = d, rotate(a + f + x[k], s), b, c
+        # Round 2
+        for k in range(16):
+            s = (3, 5, 9, 13)[k % 4]
+            index = (k % 4) * 4 + k // 4
+            g = (b & c) | (b & d) | (c & d)
+            a, b, c, d = d, rotate(a + g + x[index] + 0x5A827999, s), b, c
+        # Round 3
+        for k in range(16):
+            s = (3, 9, 11, 15)[k % 4]
+            index = (0, 8, 4, 12, 2, 10, 6, 14, 1, 9, 5, 13, 3, 11, 7, 15)[k]
+            h = b ^ c ^ d
+            a, b, c, d = d, rotate(a + h + x[index] + 0x6ED9EBA1, s), b, c
+
+        a = (a + aa) & 0xFFFFFFFF
+        b = (b + bb) & 0xFFFFFFFF
+        c = (c + cc) & 0xFFFFFFFF
+        d = (d + dd) & 0xFFFFFFFF
+
+    return struct.pack('<4I', a, b, c, d)
+
+def _md4(data):
+    try:
+        return hashlib.new('md4', data).digest()
+    except ValueError:
+        return _md4_python(data)
+
+def password_digest(password, algorithm):
+    """Hash a password the way breach corpora list it: SHA-1 of UTF-8 or NTLM"""
+    if algorithm == 'sha1':
+        return hashlib.sha1(password.encode('utf-8')).digest()
+    if algorithm == 'ntlm':
+        return _md4(password.encode('utf-16-le'))
+    raise ValueError(f"Unknown hash algorithm: {algorithm}")
+
+def _bloom_positions(digest, bits, probes):
+    """Bloom filter bit positions; digests are uniform, so no rehashing is needed"""
+    h1 = int.from_bytes(digest[:8], 'little')
+    h2 = int.from_bytes(digest[8:16], 'little') | 1
+    return [(h1 + i * h2) % bits for i in range(probes)]
+
+class BreachIndex:
+    """
+    Memory-mapped breach corpus index.
+    A lookup hashes the password, checks a handful of Bloom filter bits and
+    only for possible hits binary searches the records sharing its 2-byte
+    prefix. Everything stays in the page cache, so RSS does not grow with
+    the corpus.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, algorithm, self.digest_size, self.records, self._bloom_bits,
+         self._bloom_probes, self._bloom_offset, self._prefix_offset,
+         self._records_offset) = HEADER.unpack_from(self._mmap, 0)
+        if magic != BREACH_MAGIC or version != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} breach index")
+
+        self.algorithm = {code: name for name, code in ALGORITHMS.items()}[algorithm]
+        self._record_size = self.digest_size + COUNT.size
+
+    def _maybe_contains(self, digest):
+        buffer, offset = self._mmap, self._bloom_offset
+        for position in _bloom_positions(digest, self._bloom_bits, self._bloom_probes):
+            if not buffer[offset + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def digest_count(self, digest):
+        """How often a digest appears in the corpus, 0 when it does not"""
+        if not self._maybe_contains(digest):
+            return 0
+
+        buffer, size = self._mmap, self._record_size
+        prefix = self._prefix_offset + ((digest[0] << 8) | digest[1]) * PREFIX.size
+        low = PREFIX.unpack_from(buffer, prefix)[0]
+        high = PREFIX.unpack_from(buffer, prefix + PREFIX.size)[0]
+        while low < high:
+            middle = (low + high) // 2
+            start = self._records_offset + middle * size
+            found = buffer[start:start + self.digest_size]
+            if found < digest:
+                low = middle + 1
+            elif found > digest:
+                high = middle
+            else:
+                return COUNT.unpack_from(buffer, start + self.digest_size)[0]
+        return 0
+
+    def count(self, password):
+        """How often a password appears in the corpus, 0 when it does not"""
+        return self.digest_count(password_digest(password, self.algorithm))
+
+def read_hashes(lines):
+    """
+    Parse "HASH" or "HASH:COUNT" lines (the Have I Been Pwned format) into
+    (digest, count) pairs. Blank lines are skipped.
+    """
+    for line_number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('ascii', errors='replace')
+        line = line.strip()
+        if not line:
+            continue
+        digest, _, count = line.partition(':')
+        try:
+            yield bytes.fromhex(digest), int(count) if count else 1
+        except ValueError:
+            raise ValueError(f"Line {line_number}: expected HASH or HASH:COUNT")
+
+def _write_run(records, directory):
+    """Sort one run of records and spill it to a temporary file"""
+    records.sort()
+    with tempfile.NamedTemporaryFile('wb', dir=directory, delete=False) as f:
+        for record in records:
+            f.write(record)
+    return f.name
+
+def _read_run(path, record_size):
+    with open(path, 'rb') as f:
+        while True:
+            record = f.read(record_size)
+            if not record:
+                return
+            yield record
+
+def build_breach_index(path, hashes, algorithm=None, false_positive_rate=0.01,
+                       run_size=BUILD_RUN_SIZE, temp_dir=None):
+    """
+    Build an index from (digest, count) pairs in any order.
+    Input is sorted in runs of run_size records spilled to disk and merged,
+    so memory is bounded by the run size rather than the corpus. Repeated
+    digests are merged by adding their counts. The algorithm is inferred
+    from the digest size when not given. Returns the number of records.
+    """
+    digest_size = DIGEST_SIZES.get(algorithm)
+    with tempfile.TemporaryDirectory(dir=temp_dir) as run_dir:
+        runs = []
+        run = []
+        total = 0
+        for digest, count in hashes:
+            if digest_size is None:
+                algorithm = {size: name for name, size in DIGEST_SIZES.items()}.get(len(digest))
+                if algorithm is None:
+                    raise ValueError(f"Cannot infer hash algorithm from a {len(digest)}-byte digest")
+                digest_size = len(digest)
+            if len(digest) != digest_size:
+                raise ValueError(f"Expected {digest_size}-byte {algorithm} digests, got {len(digest)} bytes")
+            run.append(digest + COUNT.pack(min(count, 0xFFFFFFFF)))
+            total += 1
+            if len(run) >= run_size:
+                runs.append(_write_run(run, run_dir))
+                run = []
+        if run:
+            runs.append(_write_run(run, run_dir))
+        if digest_size is None:
+            raise ValueError("No hashes to index")
+
+        record_size = digest_size + COUNT.size
+        bloom_bits = max(64, math.ceil(-total * math.log(false_positive_rate) / math.log(2) ** 2))
+        bloom_probes = max(1, round(bloom_bits / total * math.log(2)))
+        bloom_offset = HEADER.size
+        prefix_offset = bloom_offset + (bloom_bits + 7) // 8
+        records_offset = prefix_offset + PREFIX_ENTRIES * PREFIX.size
+
+        # Size the file for the worst case (no duplicates) and fill it
+        # through a writable mapping, trimming the tail at the end
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w+b') as f:
+            f.truncate(records_offset + total * record_size)
+            output = mmap.mmap(f.fileno(), 0)
+            try:
+                records = 0
+                next_prefix = 0
+                previous, previous_count = None, 0
+
+                def flush_record(digest, count):
+                    nonlocal records, next_prefix
+                    prefix = (digest[0] << 8) | digest[1]
+                    while next_prefix <= prefix:
+                        PREFIX.pack_into(output, prefix_offset + next_prefix * PREFIX.size, records)
+                        next_prefix += 1
+                    for position in _bloom_positions(digest, bloom_bits, bloom_probes):
+                        output[bloom_offset + (position >> 3)] |= 1 << (position & 7)
+                    start = records_offset + records * record_size
+                    output[start:start + digest_size] = digest
+                    COUNT.pack_into(output, start + digest_size, count)
+                    records += 1
+
+                merged = heapq.merge(*(_read_run(run_path, record_size) for run_path in runs))
+                for record in merged:
+                    digest = record[:digest_size]
+                    count = COUNT.unpack_from(record, digest_size)[0]
+                    if digest == previous:
+                        previous_count = min(previous_count + count, 0xFFFFFFFF)
+                        continue
+                    if previous is not None:
+                        flush_record(previous, previous_count)
+                    previous, previous_count = digest, count
+                flush_record(previous, previous_count)
+
+                while next_prefix < PREFIX_ENTRIES:
+                    PREFIX.pack_into(output, prefix_offset + next_prefix * PREFIX.size, records)
+                    next_prefix += 1
+                HEADER.pack_into(
+                    output, 0, BREACH_MAGIC, FORMAT_VERSION, ALGORITHMS[algorithm], digest_size,
+                    records, bloom_bits, bloom_probes, bloom_offset, prefix_offset, records_offset
+                )
+                output.flush()
+            finally:
+                output.close()
+            f.truncate(records_offset + records * record_size)
+        os.replace(temp_path, path)
+    return records
+
+def breach_index_from_env():
+    """Open the index at BREACH_INDEX_PATH, or None when unset or unreadable"""
+    if not BREACH_INDEX_PATH:
+        return None
+    try:
+        return BreachIndex(BREACH_INDEX_PATH)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Breach checks disabled: {str(e)}")
+        return None
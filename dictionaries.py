@@ -0,0 +1,234 @@
+import logging
+import mmap
+import os
+import struct
+import sys
+import types
+import zlib
+from collections.abc import Mapping
+
+# Precompiled zxcvbn frequency dictionaries, mapped read-only into every
+# worker. All dictionaries share one table, since zxcvbn looks every
+# substring up in each of them in turn. Layout, all little-endian:
+#   header     magic, format version, dictionary count, slot count,
+#              section offsets, longest word in bytes, word count
+#   names      per dictionary: name and word count
+#   table      open-addressed hash table, one slot per (string offset,
+#              length, entry); entry 0 marks an empty slot
+#   ranks      per entry, the word's rank in every dictionary, 0 if absent
+#   strings    the UTF-8 words the slots point into
+DICTIONARY_MAGIC = b'PADLOCKD'
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct('<8sHHIQQQII')
+NAME = struct.Struct('<32sI')
+SLOT = struct.Struct('<III')
+
+# Where app workers look for the precompiled file, unset to use stock zxcvbn
+DICTIONARY_PATH = os.environ.get("ZXCVBN_DICTIONARY_PATH")
+
+# Substrings whose ranks are remembered between the per-dictionary lookups
+LOOKUP_CACHE_SIZE = 8192
+
+def _slot_count(size):
+    """Smallest power of two keeping the table at most half full"""
+    slots = 1
+    while slots < size * 2:
+        slots <<= 1
+    return slots
+
+class DictionaryFile:
+    """
+    A precompiled dictionary file mapped into memory.
+    Pages are only read when a lookup lands on them and are shared by every
+    process mapping the file through the page cache.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, count, slots, self._table_offset, self._ranks_offset,
+         self._strings_offset, self._max_length, self.size) = HEADER.unpack_from(self._mmap, 0)
+        if magic != DICTIONARY_MAGIC or version != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} dictionary file")
+
+        self._mask = slots - 1
+        self._ranks = struct.Struct(f'<{count}I')
+        self._missing = (0,) * count
+        self._cache = {}
+
+        self.dictionaries = {}
+        for index in range(count):
+            name, size = NAME.unpack_from(self._mmap, HEADER.size + index * NAME.size)
+            name = name.rstrip(b'\0').decode('utf-8')
+            self.dictionaries[name] = MappedDictionary(self, index, size)
+
+    def lookup(self, word):
+        """Ranks of a word in every dictionary, all 0 when it is in none"""
+        ranks = self._cache.get(word)
+        if ranks is not None:
+            return ranks
+
+        ranks = self._missing
+        encoded = word.encode('utf-8')
+        if len(encoded) <= self._max_length:
+            buffer = self._mmap
+            slot = zlib.crc32(encoded) & self._mask
+            while True:
+                offset, length, entry = SLOT.unpack_from(buffer, self._table_offset + slot * SLOT.size)
+                if entry == 0:
+                    break
+                if length == len(encoded):
+                    start = self._strings_offset + offset
+                    if buffer[start:start + length] == encoded:
+                        ranks = self._ranks.unpack_from(
+                            buffer, self._ranks_offset + (entry - 1) * self._ranks.size
+                        )
+                        break
+                slot = (slot + 1) & self._mask
+
+        # Emptied wholesale when full; it only has to span one password
+        if len(self._cache) >= LOOKUP_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[word] = ranks
+        return ranks
+
+    def words(self):
+        """Yield (word, ranks) for every word in the file"""
+        buffer = self._mmap
+        for slot in range(self._mask + 1):
+            offset, length, entry = SLOT.unpack_from(buffer, self._table_offset + slot * SLOT.size)
+            if entry:
+                start = self._strings_offset + offset
+                ranks = self._ranks.unpack_from(buffer, self._ranks_offset + (entry - 1) * self._ranks.size)
+                yield buffer[start:start + length].decode('utf-8'), ranks
+
+class MappedDictionary(Mapping):
+    """
+    Read-only word -> rank view of one dictionary in a DictionaryFile.
+    Supports what zxcvbn's matchers use (`in` and `[]`) without building a
+    Python dict per dictionary.
+    """
+
+    def __init__(self, dictionary_file, index, size):
+        self._file = dictionary_file
+        self._cache = dictionary_file._cache
+        self._index = index
+        self._size = size
+
+    def __contains__(self, word):
+        # The hot path: a dict hit for every dictionary after the first
+        ranks = self._cache.get(word)
+        if ranks is None:
+            if not isinstance(word, str):
+                return False
+            ranks = self._file.lookup(word)
+        return ranks[self._index] != 0
+
+    def __getitem__(self, word):
+        rank = self._file.lookup(word)[self._index] if isinstance(word, str) else 0
+        if rank == 0:
+            raise KeyError(word)
+        return rank
+
+    def __iter__(self):
+        for word, ranks in self._file.words():
+            if ranks[self._index]:
+                yield word
+
+    def __len__(self):
+        return self._size
+
+def build_dictionary_file(path, ranked_dictionaries):
+    """
+    Write ranked dictionaries ({name: {word: rank}}) in the mapped format.
+    The file is written next to path and renamed into place, so workers
+    that already mapped the old file keep a consistent view of it.
+    """
+    names = list(ranked_dictionaries)
+    for name in names:
+        if len(name.encode('utf-8')) > NAME.size - 4:
+            raise ValueError(f"Dictionary name {name!r} is longer than {NAME.size - 4} bytes")
+
+    # Every word with its rank in each dictionary
+    entries = {}
+    for index, name in enumerate(names):
+        for word, rank in ranked_dictionaries[name].items():
+            if rank <= 0:
+                raise ValueError(f"Rank of {word!r} in {name} must be positive")
+            entries.setdefault(word, [0] * len(names))[index] = rank
+
+    slots = _slot_count(len(entries))
+    mask = slots - 1
+    table = bytearray(slots * SLOT.size)
+    ranks = bytearray()
+    strings = bytearray()
+    rank_record = struct.Struct(f'<{len(names)}I')
+    for entry, (word, word_ranks) in enumerate(entries.items(), 1):
+        encoded = word.encode('utf-8')
+        slot = zlib.crc32(encoded) & mask
+        while SLOT.unpack_from(table, slot * SLOT.size)[2]:
+            slot = (slot + 1) & mask
+        SLOT.pack_into(table, slot * SLOT.size, len(strings), len(encoded), entry)
+        ranks += rank_record.pack(*word_ranks)
+        strings += encoded
+
+    table_offset = HEADER.size + NAME.size * len(names)
+    ranks_offset = table_offset + len(table)
+    strings_offset = ranks_offset + len(ranks)
+    max_length = max((len(word.encode('utf-8')) for word in entries), default=0)
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(
+            DICTIONARY_MAGIC, FORMAT_VERSION, len(names), slots,
+            table_offset, ranks_offset, strings_offset, max_length, len(entries)
+        ))
+        for name in names:
+            f.write(NAME.pack(name.encode('utf-8'), len(ranked_dictionaries[name])))
+        f.write(table)
+        f.write(ranks)
+        f.write(strings)
+    os.replace(temp_path, path)
+
+_installed = None
+_env_checked = False
+
+def install(path):
+    """
+    Serve zxcvbn's ranked dictionaries from a precompiled file.
+    Called before zxcvbn is first imported, this also keeps zxcvbn from
+    loading its frequency_lists module, which is where the start-up time
+    and per-process memory go. The mapped dictionaries replace the
+    contents of matching.RANKED_DICTIONARIES in place, since zxcvbn's
+    matchers hold that dict as a default argument.
+    """
+    global _installed
+    if _installed is not None:
+        return
+    dictionary_file = DictionaryFile(path)
+
+    if 'zxcvbn.matching' not in sys.modules and 'zxcvbn.frequency_lists' not in sys.modules:
+        stub = types.ModuleType('zxcvbn.frequency_lists')
+        stub.FREQUENCY_LISTS = {}
+        sys.modules['zxcvbn.frequency_lists'] = stub
+
+    from zxcvbn import matching
+    matching.RANKED_DICTIONARIES.clear()
+    matching.RANKED_DICTIONARIES.update(dictionary_file.dictionaries)
+    _installed = dictionary_file
+
+def install_from_env():
+    """Install the file at ZXCVBN_DICTIONARY_PATH if it is set and readable"""
+    global _env_checked
+    if _env_checked or not DICTIONARY_PATH:
+        return _installed is not None
+    _env_checked = True
+    try:
+        install(DICTIONARY_PATH)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Using stock zxcvbn dictionaries: {str(e)}")
+        return False
+    return True
@@ -0,0 +1,68 @@
+import csv
+import json
+
+# Column order for CSV exports, keys of each export row
+EXPORT_FIELDS = ('password', 'strength', 'score', 'crack_time', 'generated')
+CSV_HEADER = ('Password', 'Strength', 'Score', 'Crack Time', 'Generated')
+
+class _LineBuffer:
+    """File-like object that hands back what csv.writer writes instead of storing it"""
+
+    def write(self, value):
+        return value
+
+def iter_text(rows):
+    """One password per line"""
+    for row in rows:
+        yield row['password'] + "\n"
+
+# Leading characters a spreadsheet reads as the start of a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Columns holding credentials, exported byte for byte unless asked otherwise
+SECRET_FIELDS = ('password',)
+
+def csv_cell(value, escape=True):
+    """
+    A value for a CSV cell. With escape, text a spreadsheet would run as a
+    formula (CSV injection) is prefixed with a quote so it stays a string;
+    the quote then becomes part of the value.
+    """
+    if value is None:
+        return ''
+    if escape and isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def iter_csv(rows, escape_formulas=False):
+    """
+    CSV with a header row, quoted by the csv module. Formula cells are
+    escaped in every column but the passwords, which are only escaped
+    with escape_formulas, as the escaped text is no longer the password.
+    """
+    writer = csv.writer(_LineBuffer())
+    yield writer.writerow(CSV_HEADER)
+    escape = [escape_formulas or field not in SECRET_FIELDS for field in EXPORT_FIELDS]
+    for row in rows:
+        yield writer.writerow([csv_cell(row[field], escaped) for field, escaped in zip(EXPORT_FIELDS, escape)])
+
+def iter_json(rows):
+    """A single JSON array, written one element at a time"""
+    separator = "[\n"
+    for row in rows:
+        yield separator + json.dumps(row)
+        separator = ",\n"
+    yield "[]\n" if separator == "[\n" else "\n]\n"
+
+def iter_ndjson(rows):
+    """One JSON object per line"""
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+# Format name -> (writer, mimetype, file extension)
+EXPORT_FORMATS = {
+    'text': (iter_text, 'text/plain', 'txt'),
+    'csv': (iter_csv, 'text/csv', 'csv'),
+    'json': (iter_json, 'application/json', 'json'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson', 'ndjson'),
+}
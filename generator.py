@@ -0,0 +1,226 @@
+import os
+import string
+from functools import lru_cache
+
+from randomness import secure_random
+
+# Word lists for different password generation methods
+COMMON_WORDS = ["apple", "orange", "banana", "grape", "melon", "cherry", "lemon",
+             "kiwi", "peach", "plum", "mango", "berry", "pear", "lime", "fig"]
+
+ADJECTIVES = ["happy", "brave", "calm", "wise", "kind", "quick", "bold", "bright",
+           "clever", "fierce", "gentle", "grand", "lively", "noble", "proud"]
+
+NOUNS = ["tiger", "river", "mountain", "ocean", "forest", "eagle", "castle",
+         "garden", "island", "journey", "legend", "meteor", "planet", "shadow", "thunder"]
+
+VERBS = ["runs", "jumps", "flies", "builds", "creates", "dreams", "explores",
+         "fights", "grows", "holds", "leads", "moves", "seeks", "shines", "wins"]
+
+GENERATION_METHODS = ("random", "memorable", "pattern", "xkcd", "pin")
+
+# Default pattern: Adjective-verb-Adjective-noun-Digit-verb-Digit
+DEFAULT_PATTERN = "AvAnDvD"
+
+# How many compiled profiles to keep around
+PROFILE_CACHE_SIZE = int(os.environ.get("GENERATOR_PROFILE_CACHE_SIZE", 256))
+
+# Longest pattern a client may send; patterns are part of the profile cache key
+MAX_PATTERN_LENGTH = int(os.environ.get("GENERATOR_MAX_PATTERN_LENGTH", 64))
+
+def build_character_pools(use_uppercase=True, use_lowercase=True, use_digits=True,
+                          use_symbols=True, exclude_similar=False, exclude_ambiguous=False):
+    """
+    Builds the character pools used by the generator.
+    Returns a dict with one entry per character set plus the combined pool.
+    """
+    # Define character sets
+    uppercase_chars = string.ascii_uppercase
+    lowercase_chars = string.ascii_lowercase
+    digit_chars = string.digits
+    symbol_chars = "!@#$%^&*()_-+=<>?"
+
+    # Apply exclusions
+    if exclude_similar:
+        # Remove similar characters like l/1/I, 0/O, etc.
+        chars_to_remove = "il1Lo0O"
+        uppercase_chars = ''.join(c for c in uppercase_chars if c not in chars_to_remove)
+        lowercase_chars = ''.join(c for c in lowercase_chars if c not in chars_to_remove)
+        digit_chars = ''.join(c for c in digit_chars if c not in chars_to_remove)
+
+    if exclude_ambiguous:
+        # Remove potentially confusing symbols
+        ambiguous_symbols = "{}[]()/'\"\\`~,;:.<>"
+        symbol_chars = ''.join(c for c in symbol_chars if c not in ambiguous_symbols)
+
+    # Create the character pool based on user preferences
+    chars = ""
+    if use_uppercase:
+        chars += uppercase_chars
+    if use_lowercase:
+        chars += lowercase_chars
+    if use_digits:
+        chars += digit_chars
+    if use_symbols:
+        chars += symbol_chars
+
+    # Fallback to lowercase if no options are selected
+    if not chars:
+        chars = lowercase_chars
+
+    return {
+        'uppercase': uppercase_chars,
+        'lowercase': lowercase_chars,
+        'digits': digit_chars,
+        'symbols': symbol_chars,
+        'all': chars
+    }
+
+class GeneratorProfile:
+    """
+    A compiled set of generator options.
+    Character pools, word pools and pattern tokens are worked out once when
+    the profile is built, so generate() only has to draw random values.
+    """
+
+    def __init__(self, use_uppercase=True, use_lowercase=True, use_digits=True,
+                 use_symbols=True, method="random", pattern=None,
+                 exclude_similar=False, exclude_ambiguous=False):
+        if method not in GENERATION_METHODS:
+            raise ValueError(f"Unknown generation method: {method}")
+
+        self.method = method
+        self.use_uppercase = use_uppercase
+        self.use_digits = use_digits
+        self.use_symbols = use_symbols
+
+        pools = build_character_pools(use_uppercase, use_lowercase, use_digits,
+                                      use_symbols, exclude_similar, exclude_ambiguous)
+        # Kept as strings so whole runs can be drawn with rng.string()
+        self.uppercase = pools['uppercase']
+        self.lowercase = pools['lowercase']
+        self.digits = pools['digits']
+        self.symbols = pools['symbols']
+        self.chars = pools['all']
+
+        # One pool per selected set, each must appear at least once
+        self.required_pools = tuple(
+            pool for enabled, pool in (
+                (use_uppercase, self.uppercase),
+                (use_lowercase, self.lowercase),
+                (use_digits, self.digits),
+                (use_symbols, self.symbols)
+            ) if enabled and pool
+        )
+        self.required_sets = tuple(frozenset(pool) for pool in self.required_pools)
+
+        # Word pools with capitalization already applied
+        self.common_words = self._words(COMMON_WORDS)
+        self.xkcd_words = self._words(COMMON_WORDS + ADJECTIVES + NOUNS)
+
+        self.tokens = self._parse_pattern(pattern or DEFAULT_PATTERN) if method == "pattern" else ()
+
+    def _words(self, words):
+        """Apply the profile's capitalization to a word list"""
+        if self.use_uppercase:
+            return tuple(word.capitalize() for word in words)
+        return tuple(words)
+
+    def _parse_pattern(self, pattern):
+        """
+        Turns a pattern string into a token list.
+        Each token is a tuple of candidates; literals are single-item tuples.
+        """
+        letter_pool = self.uppercase if self.use_uppercase else self.lowercase
+        token_pools = {
+            'A': self._words(ADJECTIVES),
+            'N': self._words(NOUNS),
+            'V': self._words(VERBS),
+            'C': letter_pool,
+            'c': self.lowercase,
+            'D': self.digits if self.use_digits else self.lowercase,
+            'S': self.symbols if self.use_symbols else self.lowercase
+        }
+        return tuple(token_pools.get(char, (char,)) for char in pattern)
+
+    def _fit(self, password, length, rng):
+        """Truncate or pad a password to the requested length"""
+        if len(password) > length:
+            return password[:length]
+        if len(password) < length:
+            return password + rng.string(self.chars, length - len(password))
+        return password
+
+    def generate(self, length=16, rng=secure_random):
+        """
+        Generate one password of the given length.
+        rng is a randomness.SecureRandom; character runs are drawn in bulk
+        with rng.string() rather than one call per character.
+        """
+        choice = rng.choice
+
+        if self.method == "random":
+            # Draw whole passwords until one has a character from each selected
+            # set, which makes every such password equally likely
+            if length < 4:
+                return rng.string(self.chars, length)
+            # Short passwords are rejected more often, so draw several at once
+            candidates = max(1, 64 // length)
+            while True:
+                block = rng.string(self.chars, length * candidates)
+                for start in range(0, len(block), length):
+                    password = block[start:start + length]
+                    for required in self.required_sets:
+                        if required.isdisjoint(password):
+                            break
+                    else:
+                        return password
+
+        if self.method == "pin":
+            return rng.string(self.digits if self.use_digits else self.lowercase, length)
+
+        if self.method == "pattern":
+            return self._fit(''.join([choice(token) for token in self.tokens]), length, rng)
+
+        if self.method == "memorable":
+            num_words = max(2, length // 6)
+            parts = rng.sample(self.common_words, min(num_words, len(self.common_words)))
+            if self.use_digits:
+                parts.append(str(rng.randint(10, 999)))
+            if self.use_symbols:
+                parts.append(choice(self.symbols) + choice(self.symbols))
+            return self._fit(''.join(parts), length, rng)
+
+        # XKCD style - four random words separated by a symbol
+        separator = choice(self.symbols) if self.use_symbols else "-"
+        words = rng.sample(self.xkcd_words, 4)
+        if self.use_digits:
+            words[-1] = words[-1] + str(rng.randint(10, 99))
+        return separator.join(words)[:length]
+
+def get_profile(use_uppercase=True, use_lowercase=True, use_digits=True,
+                use_symbols=True, method="random", pattern=None,
+                exclude_similar=False, exclude_ambiguous=False):
+    """
+    Return the compiled profile for an option tuple, building it on first
+    use. Patterns longer than MAX_PATTERN_LENGTH raise ValueError before
+    they reach the cache.
+    """
+    if pattern is not None and len(pattern) > MAX_PATTERN_LENGTH:
+        raise ValueError(f"Pattern must be at most {MAX_PATTERN_LENGTH} characters")
+    return _cached_profile(use_uppercase, use_lowercase, use_digits, use_symbols,
+                           method, pattern, exclude_similar, exclude_ambiguous)
+
+@lru_cache(maxsize=PROFILE_CACHE_SIZE)
+def _cached_profile(use_uppercase, use_lowercase, use_digits, use_symbols,
+                    method, pattern, exclude_similar, exclude_ambiguous):
+    return GeneratorProfile(
+        use_uppercase=use_uppercase,
+        use_lowercase=use_lowercase,
+        use_digits=use_digits,
+        use_symbols=use_symbols,
+        method=method,
+        pattern=pattern,
+        exclude_similar=exclude_similar,
+        exclude_ambiguous=exclude_ambiguous
+    )
@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+
+# How many entries each history keeps
+HISTORY_DEPTH = int(os.environ.get("HISTORY_DEPTH", 10))
+
+class MemoryHistoryBackend:
+    """
+    Per-session history kept in process memory.
+    Each session is a bounded deque, so append and trim are O(1). The
+    number of sessions is capped too, dropping the least recently used.
+    History is per process; use the SQLite backend with several workers.
+    """
+
+    def __init__(self, depth=HISTORY_DEPTH, max_sessions=10000):
+        self.depth = depth
+        self.max_sessions = max_sessions
+        self._histories = OrderedDict()
+        self._lock = threading.Lock()
+
+    def append(self, session_id, item):
+        with self._lock:
+            history = self._histories.get(session_id)
+            if history is None:
+                history = self._histories[session_id] = deque(maxlen=self.depth)
+                while len(self._histories) > self.max_sessions:
+                    self._histories.popitem(last=False)
+            self._histories.move_to_end(session_id)
+            history.appendleft(item)
+
+    def page(self, session_id, offset=0, limit=None):
+        """Return (items, total) with the newest entry first"""
+        with self._lock:
+            history = list(self._histories.get(session_id, ()))
+        end = None if limit is None else offset + limit
+        return history[offset:end], len(history)
+
+    def clear(self, session_id):
+        with self._lock:
+            self._histories.pop(session_id, None)
+
+class SQLiteHistoryBackend:
+    """
+    History stored in SQLite in WAL mode, shared by every worker process.
+    Each append is written through in one short transaction that also
+    trims the session back to the configured depth, so an entry is
+    visible to every worker as soon as append returns and nothing is
+    lost on restart. With WAL and synchronous=NORMAL a commit is an
+    append to the log, not an fsync.
+    """
+
+    def __init__(self, path, depth=HISTORY_DEPTH):
+        self.depth = depth
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                password TEXT NOT NULL,
+                score INTEGER,
+                crack_time TEXT,
+                timestamp TEXT NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS history_session ON history (session_id, id)"
+        )
+
+    def append(self, session_id, item):
+        """Insert an entry and trim its session, in one transaction"""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT INTO history (session_id, password, score, crack_time, timestamp) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (session_id, item['password'], item['score'], item['crack_time'], item['timestamp'])
+            )
+            self._conn.execute(
+                "DELETE FROM history WHERE session_id = ? AND id <= ("
+                "SELECT id FROM history WHERE session_id = ? "
+                "ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (session_id, session_id, self.depth)
+            )
+
+    def page(self, session_id, offset=0, limit=None):
+        """Return (items, total) with the newest entry first"""
+        with self._lock:
+            total = self._conn.execute(
+                "SELECT COUNT(*) FROM history WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                "SELECT password, score, crack_time, timestamp FROM history "
+                "WHERE session_id = ? ORDER BY id DESC LIMIT ? OFFSET ?",
+                (session_id, -1 if limit is None else limit, offset)
+            ).fetchall()
+        items = [
+            {'password': password, 'score': score, 'crack_time': crack_time, 'timestamp': timestamp}
+            for password, score, crack_time, timestamp in rows
+        ]
+        return items, total
+
+    def clear(self, session_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM history WHERE session_id = ?", (session_id,))
+
+def history_from_env():
+    """Build the history backend named by HISTORY_BACKEND (memory or sqlite)"""
+    backend = os.environ.get("HISTORY_BACKEND", "memory").lower()
+    if backend == "sqlite":
+        return SQLiteHistoryBackend(os.environ.get("HISTORY_DB_PATH", "history.db"))
+    if backend == "memory":
+        return MemoryHistoryBackend()
+    raise ValueError(f"Unknown history backend: {backend}")
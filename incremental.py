@@ -0,0 +1,184 @@
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from zxcvbn import feedback, matching, scoring, time_estimates
+
+# zxcvbn refuses longer inputs, keep the incremental path consistent with it
+MAX_PASSWORD_LENGTH = 72
+
+# How many live evaluators to keep and how long an idle one survives
+MAX_SESSIONS = int(os.environ.get("INCREMENTAL_MAX_SESSIONS", 1024))
+SESSION_TTL = float(os.environ.get("INCREMENTAL_SESSION_TTL", 600))
+
+# Matchers that scan the whole password left to right. Extending the input
+# can change their earlier matches, so they are rerun on every update. They
+# are linear in the password length, unlike the dictionary matchers.
+LINEAR_MATCHERS = (
+    matching.spatial_match,
+    matching.repeat_match,
+    matching.sequence_match,
+    matching.regex_match,
+    matching.date_match,
+)
+
+class ResyncRequired(Exception):
+    """Raised when a delta does not apply to the evaluator's current state"""
+
+def _dictionary_matches(password, start, ranked_dictionaries, reverse=False):
+    """
+    Dictionary matches whose last character is at index start or later.
+    Mirrors zxcvbn's dictionary_match and reverse_dictionary_match, but only
+    looks at substrings ending in the new part of the password.
+    """
+    matches = []
+    password_lower = password.lower()
+    for dictionary_name, ranked_dict in ranked_dictionaries.items():
+        for j in range(start, len(password)):
+            for i in range(j + 1):
+                word = password_lower[i:j + 1]
+                if reverse:
+                    word = word[::-1]
+                if word in ranked_dict:
+                    matches.append({
+                        'pattern': 'dictionary',
+                        'i': i,
+                        'j': j,
+                        'token': password[i:j + 1],
+                        'matched_word': word,
+                        'rank': ranked_dict[word],
+                        'dictionary_name': dictionary_name,
+                        'reversed': reverse,
+                        'l33t': False,
+                    })
+    return matches
+
+def _l33t_matches(password, start, subs, ranked_dictionaries):
+    """l33t matches ending at index start or later, as zxcvbn's l33t_match builds them"""
+    matches = []
+    for sub in subs:
+        if not sub:
+            break
+        subbed_password = matching.translate(password, sub)
+        for match in _dictionary_matches(subbed_password, start, ranked_dictionaries):
+            token = password[match['i']:match['j'] + 1]
+            if token.lower() == match['matched_word'] or len(token) < 2:
+                # only keep matches that contain an actual substitution
+                continue
+            match_sub = {subbed: char for subbed, char in sub.items() if subbed in token}
+            match['l33t'] = True
+            match['token'] = token
+            match['sub'] = match_sub
+            match['sub_display'] = ', '.join(
+                ["%s -> %s" % (k, v) for k, v in match_sub.items()]
+            )
+            matches.append(match)
+    return matches
+
+class IncrementalEvaluator:
+    """
+    Keeps zxcvbn match state for one password as it is being typed.
+    Dictionary, reverse dictionary and l33t matches for the unchanged prefix
+    are kept between updates, so only substrings ending in the edited tail
+    are looked up. The cheap linear matchers and the scoring DP are rerun.
+    """
+
+    def __init__(self):
+        self.password = ''
+        self.revision = 0
+        self.dictionary_matches = []
+        self.l33t_subtable = {}
+        self.l33t_subs = []
+        self.l33t_matches = []
+        self.lock = threading.Lock()
+
+    def update(self, keep, append):
+        """
+        Keep the first `keep` characters, append `append` and rescore.
+        Returns a result dict shaped like zxcvbn.zxcvbn()'s, or None once
+        the password has been deleted down to nothing.
+        """
+        if keep < 0 or keep > len(self.password):
+            raise ResyncRequired(f"Cannot keep {keep} of {len(self.password)} characters")
+
+        password = self.password[:keep] + append
+        if len(password) > MAX_PASSWORD_LENGTH:
+            raise ValueError(f"Password exceeds max length of {MAX_PASSWORD_LENGTH} characters.")
+
+        start = datetime.now()
+        ranked_dictionaries = matching.RANKED_DICTIONARIES
+
+        # Matches that end inside the kept prefix are still valid
+        dictionary_matches = [m for m in self.dictionary_matches if m['j'] < keep]
+        dictionary_matches.extend(_dictionary_matches(password, keep, ranked_dictionaries))
+        dictionary_matches.extend(_dictionary_matches(password, keep, ranked_dictionaries, reverse=True))
+
+        # The l33t substitutions depend on which characters appear anywhere in
+        # the password, so start over whenever that set changes
+        subtable = matching.relevant_l33t_subtable(password, matching.L33T_TABLE)
+        if subtable == self.l33t_subtable:
+            l33t_matches = [m for m in self.l33t_matches if m['j'] < keep]
+            l33t_matches.extend(_l33t_matches(password, keep, self.l33t_subs, ranked_dictionaries))
+        else:
+            self.l33t_subtable = subtable
+            self.l33t_subs = matching.enumerate_l33t_subs(subtable)
+            l33t_matches = _l33t_matches(password, 0, self.l33t_subs, ranked_dictionaries)
+
+        self.password = password
+        self.dictionary_matches = dictionary_matches
+        self.l33t_matches = l33t_matches
+        self.revision += 1
+
+        if not password:
+            return None
+
+        # The DP caches guesses on the match objects and those depend on the
+        # full password length, so it gets copies of the kept matches
+        matches = [dict(m) for m in dictionary_matches]
+        matches.extend(dict(m) for m in l33t_matches)
+        for matcher in LINEAR_MATCHERS:
+            matches.extend(matcher(password))
+        matches.sort(key=lambda m: (m['i'], m['j']))
+
+        result = scoring.most_guessable_match_sequence(password, matches)
+        result['calc_time'] = datetime.now() - start
+        result.update(time_estimates.estimate_attack_times(result['guesses']))
+        result['feedback'] = feedback.get_feedback(result['score'], result['sequence'])
+        return result
+
+class EvaluatorStore:
+    """Bounded, idle-expiring map of session tokens to evaluators"""
+
+    def __init__(self, max_sessions=MAX_SESSIONS, ttl=SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self):
+        """Start a new evaluator and return (token, evaluator)"""
+        token = secrets.token_urlsafe(16)
+        evaluator = IncrementalEvaluator()
+        with self._lock:
+            self._sessions[token] = (time.monotonic(), evaluator)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return token, evaluator
+
+    def get(self, token):
+        """Return the evaluator for a token, or None if unknown or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(token)
+            if entry is None:
+                return None
+            last_used, evaluator = entry
+            if now - last_used > self.ttl:
+                del self._sessions[token]
+                return None
+            self._sessions[token] = (now, evaluator)
+            self._sessions.move_to_end(token)
+            return evaluator
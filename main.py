@@ -0,0 +1,147 @@
+import argparse
+import sys
+
+def run_audit(args):
+    """Stream an audit of a newline-delimited password list as NDJSON"""
+    from audit import AuditSummary, audit_passwords, iter_ndjson, read_passwords
+
+    source = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    summary = AuditSummary()
+
+    try:
+        results = audit_passwords(
+            read_passwords(source, args.encoding),
+            summary,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            include_password=args.include_password
+        )
+        if args.summary_only:
+            for _ in results:
+                pass
+            results = ()
+        for line in iter_ndjson(results, summary):
+            output.write(line)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+def run_build_dictionaries(args):
+    """Precompile zxcvbn's frequency lists into the mmap-able dictionary format"""
+    from zxcvbn.frequency_lists import FREQUENCY_LISTS
+    from zxcvbn.matching import build_ranked_dict
+    from dictionaries import build_dictionary_file
+
+    build_dictionary_file(args.output, {
+        name: build_ranked_dict(words) for name, words in FREQUENCY_LISTS.items()
+    })
+    print(f"Wrote {len(FREQUENCY_LISTS)} dictionaries to {args.output}")
+
+def run_build_breach_index(args):
+    """Build a memory-mapped breach index from a SHA-1 or NTLM hash list"""
+    from breach import build_breach_index, read_hashes
+
+    source = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    try:
+        records = build_breach_index(
+            args.output,
+            read_hashes(source),
+            algorithm=args.algorithm,
+            false_positive_rate=args.fp_rate,
+            run_size=args.run_size,
+            temp_dir=args.temp_dir
+        )
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+    print(f"Indexed {records} hashes in {args.output}")
+
+def run_batch_stats(args):
+    """Write per-password statistics for a password list as CSV, one chunk at a time"""
+    import csv
+    from batch_analyzer import BatchAnalyzer
+
+    source = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    users = open(args.usernames, 'rb') if args.usernames else None
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+
+    try:
+        # Keep blank lines so usernames stay paired with their passwords
+        passwords = (line.decode(args.encoding, errors='replace').rstrip('\r\n') for line in source)
+        usernames = None
+        if users is not None:
+            usernames = (line.decode(args.encoding, errors='replace').rstrip('\r\n') for line in users)
+
+        writer = csv.writer(output)
+        header = None
+        for columns in BatchAnalyzer().iter_batches(passwords, usernames, args.chunk_size):
+            if header is None:
+                header = list(columns)
+                writer.writerow(header)
+            writer.writerows(zip(*(columns[name].tolist() for name in header)))
+    finally:
+        for stream in (source, users, output):
+            if stream is not None and stream not in (sys.stdin.buffer, sys.stdout):
+                stream.close()
+
+def build_parser():
+    from audit import AUDIT_CHUNK_SIZE, AUDIT_WORKERS
+
+    parser = argparse.ArgumentParser(prog='padlock', description='Padlock command line tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    audit = commands.add_parser('audit', help='score a newline-delimited password list')
+    audit.add_argument('input', help="password list, or '-' for stdin")
+    audit.add_argument('-o', '--output', default='-', help="NDJSON output file (default: stdout)")
+    audit.add_argument('-w', '--workers', type=int, default=AUDIT_WORKERS,
+                       help='worker processes, 0 to score in-process')
+    audit.add_argument('--chunk-size', type=int, default=AUDIT_CHUNK_SIZE,
+                       help='passwords per worker task')
+    audit.add_argument('--encoding', default='utf-8', help='input encoding')
+    audit.add_argument('--include-password', action='store_true',
+                       help='echo each password in its result record')
+    audit.add_argument('--summary-only', action='store_true',
+                       help='only write the final summary record')
+    audit.set_defaults(func=run_audit)
+
+    from batch_analyzer import BATCH_CHUNK_SIZE
+
+    stats = commands.add_parser('batch-stats', help='vectorized character statistics as CSV (needs NumPy)')
+    stats.add_argument('input', help="password list, or '-' for stdin")
+    stats.add_argument('--usernames', help='username list paired line by line with the passwords')
+    stats.add_argument('-o', '--output', default='-', help='CSV output file (default: stdout)')
+    stats.add_argument('--chunk-size', type=int, default=BATCH_CHUNK_SIZE, help='rows analyzed at a time')
+    stats.add_argument('--encoding', default='utf-8', help='input encoding')
+    stats.set_defaults(func=run_batch_stats)
+
+    build = commands.add_parser('build-dictionaries',
+                                help='precompile the zxcvbn dictionaries for ZXCVBN_DICTIONARY_PATH')
+    build.add_argument('-o', '--output', default='zxcvbn_dicts.bin', help='dictionary file to write')
+    build.set_defaults(func=run_build_dictionaries)
+
+    from breach import BUILD_RUN_SIZE
+
+    breach = commands.add_parser('build-breach-index',
+                                 help='index a HASH[:COUNT] list for BREACH_INDEX_PATH')
+    breach.add_argument('input', help="hash list, in any order, or '-' for stdin")
+    breach.add_argument('-o', '--output', default='breach.idx', help='index file to write')
+    breach.add_argument('--algorithm', choices=['sha1', 'ntlm'],
+                        help='hash algorithm (default: inferred from the hash length)')
+    breach.add_argument('--fp-rate', type=float, default=0.01,
+                        help='Bloom filter false positive rate')
+    breach.add_argument('--run-size', type=int, default=BUILD_RUN_SIZE,
+                        help='hashes sorted in memory at a time')
+    breach.add_argument('--temp-dir', help='where to spill sorted runs (default: system temp)')
+    breach.set_defaults(func=run_build_breach_index)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
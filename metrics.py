@@ -0,0 +1,290 @@
+import contextvars
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Set METRICS_ENABLED=0 to turn timing off entirely
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+
+# Add a Server-Timing header with the stage breakdown to every response
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "0") == "1"
+
+# Logging: level, "text" or "json" lines, and the share of records below
+# WARNING that are kept (warnings and errors are always logged)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", 1.0))
+
+# Prefix for every exported metric name
+METRIC_PREFIX = "padlock"
+
+# Latency buckets grow by 2**(1/8), so a quantile is off by under 5%,
+# from a microsecond up to about two minutes
+BUCKET_MIN = 1e-6
+BUCKETS_PER_DOUBLING = 8
+BUCKET_COUNT = 27 * BUCKETS_PER_DOUBLING
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+class Summary:
+    """
+    Latency distribution in fixed log-spaced buckets.
+    Observing is one bucket increment, whatever the traffic, and the
+    quantiles are read back from the bucket counts.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (BUCKET_COUNT + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        if value <= BUCKET_MIN:
+            bucket = 0
+        else:
+            bucket = min(BUCKET_COUNT, int(math.log2(value / BUCKET_MIN) * BUCKETS_PER_DOUBLING) + 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile, 0 when empty"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return BUCKET_MIN * 2 ** (bucket / BUCKETS_PER_DOUBLING)
+        return BUCKET_MIN * 2 ** (BUCKET_COUNT / BUCKETS_PER_DOUBLING)
+
+def _labels(labels, extra=None):
+    """Render a Prometheus label set, escaping values"""
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    rendered = []
+    for name, value in items:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        rendered.append(f'{name}="{value}"')
+    return "{" + ",".join(rendered) + "}"
+
+class MetricsRegistry:
+    """
+    Process-wide latency summaries and counters, plus collectors that
+    report other components' stats() dicts, rendered in the Prometheus
+    text format.
+    """
+
+    def __init__(self):
+        self._summaries = {}
+        self._counters = {}
+        self._help = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = Summary()
+            summary.observe(value)
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def add_collector(self, prefix, stats, counters=()):
+        """
+        Export a stats() callable: each numeric value becomes prefix_key,
+        as a counter for keys in counters and a gauge otherwise.
+        """
+        self._collectors.append((prefix, stats, frozenset(counters)))
+
+    def quantiles(self, name, **labels):
+        """{quantile: seconds} for one summary, empty when nothing was observed"""
+        with self._lock:
+            summary = self._summaries.get((name, tuple(sorted(labels.items()))))
+            return {q: summary.quantile(q) for q in QUANTILES} if summary else {}
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def header(name, kind):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            summaries = sorted(self._summaries.items())
+            counters = sorted(self._counters.items())
+            snapshots = [
+                (labels, [summary.quantile(q) for q in QUANTILES], summary.sum, summary.count)
+                for (_, labels), summary in summaries
+            ]
+
+        previous = None
+        for ((name, _), _), (labels, values, total, count) in zip(summaries, snapshots):
+            if name != previous:
+                header(name, "summary")
+                previous = name
+            for q, value in zip(QUANTILES, values):
+                lines.append(f"{name}{_labels(labels, ('quantile', q))} {value:.6g}")
+            lines.append(f"{name}_sum{_labels(labels)} {total:.6g}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+
+        previous = None
+        for (name, labels), value in counters:
+            if name != previous:
+                header(name, "counter")
+                previous = name
+            lines.append(f"{name}{_labels(labels)} {value}")
+
+        for prefix, stats, counter_keys in self._collectors:
+            for key, value in stats().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                if key in counter_keys:
+                    header(f"{prefix}_{key}_total", "counter")
+                    lines.append(f"{prefix}_{key}_total {value}")
+                else:
+                    header(f"{prefix}_{key}", "gauge")
+                    lines.append(f"{prefix}_{key} {value}")
+
+        return "\n".join(lines) + "\n"
+
+# Shared by every module in the process
+registry = MetricsRegistry()
+registry.describe(f"{METRIC_PREFIX}_request_seconds", "Request latency by route, method and status")
+registry.describe(f"{METRIC_PREFIX}_stage_seconds", "Time spent in each stage of a request")
+
+class RequestTimer:
+    """Stage durations for one request, in the order they first ran"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.route = ""
+        self.method = ""
+        self.status = 0
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def server_timing(self):
+        """The Server-Timing header value, durations in milliseconds"""
+        parts = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.stages.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ", ".join(parts)
+
+_current = contextvars.ContextVar('request_timer', default=None)
+
+def start_request():
+    """Begin timing a request in the current context"""
+    timer = RequestTimer() if METRICS_ENABLED else None
+    _current.set(timer)
+    return timer
+
+def current_request():
+    """The RequestTimer of the request being handled, or None"""
+    return _current.get()
+
+def finish_request(timer):
+    """Record a finished request's latency and stages and stop timing it"""
+    _current.set(None)
+    if timer is None:
+        return
+    elapsed = timer.elapsed()
+    registry.observe(f"{METRIC_PREFIX}_request_seconds", elapsed,
+                     route=timer.route, method=timer.method, status=timer.status)
+    for stage_name, seconds in timer.stages.items():
+        registry.observe(f"{METRIC_PREFIX}_stage_seconds", seconds, route=timer.route, stage=stage_name)
+
+    if access_log.isEnabledFor(logging.INFO):
+        access_log.info(
+            f"{timer.method} {timer.route} {timer.status} {elapsed * 1000:.1f}ms",
+            extra={'fields': {
+                'route': timer.route,
+                'method': timer.method,
+                'status': timer.status,
+                'duration_ms': round(elapsed * 1000, 3),
+                'stages_ms': {name: round(seconds * 1000, 3) for name, seconds in timer.stages.items()}
+            }}
+        )
+
+@contextmanager
+def stage(name):
+    """
+    Time a block as one stage of the current request.
+    Outside a request the time goes straight to the stage summary.
+    """
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        timer = _current.get()
+        if timer is not None:
+            timer.add(name, elapsed)
+        else:
+            registry.observe(f"{METRIC_PREFIX}_stage_seconds", elapsed, route="", stage=name)
+
+# One record per finished request, at INFO so sampling applies to it
+access_log = logging.getLogger("padlock.access")
+
+class SamplingFilter(logging.Filter):
+    """Keeps a random share of records below WARNING and every record above"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with any extra 'fields' merged in"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def configure_logging(level=LOG_LEVEL, log_format=LOG_FORMAT, sample_rate=LOG_SAMPLE_RATE):
+    """
+    Configure the root logger from LOG_LEVEL, LOG_FORMAT and LOG_SAMPLE_RATE.
+    The filter sits on the handler, so dropped records are never formatted.
+    """
+    handler = logging.StreamHandler()
+    if log_format == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+    if sample_rate < 1.0:
+        handler.addFilter(SamplingFilter(sample_rate))
+    logging.basicConfig(level=level, handlers=[handler], force=True)
@@ -0,0 +1,203 @@
+import math
+import os
+import string
+from array import array
+from functools import lru_cache
+
+from generator import PROFILE_CACHE_SIZE
+from randomness import secure_random
+
+# Optional wordlist file, one word per line as "word", "word<TAB>tag" or in
+# the EFF dice format "11111<TAB>word"; unset to derive one from zxcvbn
+WORDLIST_PATH = os.environ.get("PASSPHRASE_WORDLIST")
+
+# How many of the most frequent English words to take from zxcvbn
+WORDLIST_SIZE = int(os.environ.get("PASSPHRASE_WORDLIST_SIZE", 8192))
+
+# zxcvbn dictionaries the default wordlist is drawn from
+SOURCE_DICTIONARIES = ("english_wikipedia", "us_tv_and_film")
+
+# Word lengths kept from zxcvbn: long enough to type, short enough to remember
+SOURCE_MIN_LENGTH = 3
+SOURCE_MAX_LENGTH = 9
+
+CAPITALIZATION = ("lower", "title", "random")
+
+# Default target for passphrases, in bits
+DEFAULT_ENTROPY_BITS = 60
+
+def _usable(word):
+    """Words whose first letter has a case, so capitalization always changes them"""
+    return bool(word) and word[:1].islower() and word.isalpha()
+
+class WordList:
+    """
+    A deduplicated wordlist in compact storage.
+    Words are kept as one UTF-8 blob with an array of offsets, and indexed
+    by length and by part-of-speech tag as arrays of word numbers, so even
+    a large list costs a few bytes per word rather than a str object each.
+    """
+
+    def __init__(self, entries):
+        blob = bytearray()
+        self._offsets = array('I', [0])
+        self._by_length = {}
+        self._by_tag = {}
+        self._selections = {}
+
+        seen = set()
+        for word, tag in entries:
+            word = word.lower()
+            if not _usable(word) or word in seen:
+                continue
+            seen.add(word)
+            number = len(self._offsets) - 1
+            blob += word.encode('utf-8')
+            self._offsets.append(len(blob))
+            self._by_length.setdefault(len(word), array('I')).append(number)
+            if tag:
+                self._by_tag.setdefault(tag.lower(), array('I')).append(number)
+        self._blob = bytes(blob)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def word(self, number):
+        return self._blob[self._offsets[number]:self._offsets[number + 1]].decode('utf-8')
+
+    @property
+    def tags(self):
+        return sorted(self._by_tag)
+
+    def select(self, min_length=None, max_length=None, part_of_speech=None):
+        """Word numbers matching a length range and tag, worked out once per filter"""
+        key = (min_length, max_length, part_of_speech)
+        selection = self._selections.get(key)
+        if selection is not None:
+            return selection
+
+        if part_of_speech:
+            if part_of_speech.lower() not in self._by_tag:
+                raise ValueError(f"The wordlist has no words tagged {part_of_speech!r}")
+            tagged = set(self._by_tag[part_of_speech.lower()])
+        else:
+            tagged = None
+
+        selection = array('I')
+        for length in sorted(self._by_length):
+            if (min_length and length < min_length) or (max_length and length > max_length):
+                continue
+            words = self._by_length[length]
+            selection.extend(words if tagged is None else (n for n in words if n in tagged))
+        self._selections[key] = selection
+        return selection
+
+def read_wordlist(lines):
+    """Parse wordlist lines into (word, tag) pairs, skipping blanks and comments"""
+    for line in lines:
+        fields = line.split()
+        if not fields or fields[0].startswith('#'):
+            continue
+        # EFF lists number each word with its dice roll
+        if fields[0].isdigit() and len(fields) > 1:
+            fields = fields[1:]
+        yield fields[0], fields[1] if len(fields) > 1 else None
+
+def zxcvbn_words(size=WORDLIST_SIZE):
+    """
+    The size most frequent words across zxcvbn's English dictionaries.
+    Read through matching.RANKED_DICTIONARIES, so this also works when the
+    dictionaries are served from a precompiled file.
+    """
+    from zxcvbn.matching import RANKED_DICTIONARIES
+
+    best = {}
+    for name in SOURCE_DICTIONARIES:
+        for word, rank in RANKED_DICTIONARIES[name].items():
+            if SOURCE_MIN_LENGTH <= len(word) <= SOURCE_MAX_LENGTH and _usable(word):
+                if rank < best.get(word, rank + 1):
+                    best[word] = rank
+    ranked = sorted(best, key=lambda word: (best[word], word))
+    return [(word, None) for word in ranked[:size]]
+
+_default_wordlist = None
+
+def default_wordlist():
+    """The wordlist from PASSPHRASE_WORDLIST or zxcvbn, loaded on first use"""
+    global _default_wordlist
+    if _default_wordlist is None:
+        if WORDLIST_PATH:
+            with open(WORDLIST_PATH, encoding='utf-8') as f:
+                _default_wordlist = WordList(read_wordlist(f))
+        else:
+            _default_wordlist = WordList(zxcvbn_words())
+    return _default_wordlist
+
+class PassphraseProfile:
+    """
+    A compiled set of passphrase options.
+    Picks just enough words to reach entropy_bits, every random choice made
+    uniformly by randomness.secure_random, so `entropy` is the exact
+    strength of each passphrase against an attacker who knows the wordlist
+    and the options.
+    """
+
+    def __init__(self, wordlist, entropy_bits=DEFAULT_ENTROPY_BITS, separators="-",
+                 capitalize="lower", digits=0, min_word_length=None,
+                 max_word_length=None, part_of_speech=None):
+        if capitalize not in CAPITALIZATION:
+            raise ValueError(f"Unknown capitalization: {capitalize}")
+        if any(char.isalpha() for char in separators):
+            raise ValueError("Separators must not contain letters")
+        # Words have to stay recoverable from the passphrase, or different
+        # picks can spell the same text and the entropy is overstated
+        if not separators and capitalize != "title":
+            raise ValueError("Passphrases without separators need title capitalization")
+        if digits < 0:
+            raise ValueError("Digits must not be negative")
+
+        self.wordlist = wordlist
+        self.words = wordlist.select(min_word_length, max_word_length, part_of_speech)
+        if len(self.words) < 2:
+            raise ValueError("Too few words match the passphrase options")
+        # Repeated separators would count twice towards the entropy
+        self.separators = tuple(dict.fromkeys(separators)) or ("",)
+        self.capitalize = capitalize
+        self.digits = digits
+
+        word_bits = math.log2(len(self.words)) + (1 if capitalize == "random" else 0)
+        fixed_bits = math.log2(len(self.separators)) + digits * math.log2(10)
+        self.word_count = max(1, math.ceil((entropy_bits - fixed_bits) / word_bits))
+        self.entropy = self.word_count * word_bits + fixed_bits
+
+    def generate(self, length=None, rng=secure_random):
+        """Generate one passphrase; length is ignored, the word count follows from the entropy"""
+        words, word = self.words, self.wordlist.word
+        parts = [word(words[i]) for i in rng.indices(len(words), self.word_count)]
+
+        if self.capitalize == "title":
+            parts = [part.capitalize() for part in parts]
+        elif self.capitalize == "random":
+            flips = rng.getrandbits(len(parts))
+            parts = [part.capitalize() if flips >> i & 1 else part for i, part in enumerate(parts)]
+
+        if self.digits:
+            parts.append(rng.string(string.digits, self.digits))
+
+        separator = rng.choice(self.separators)
+        return separator.join(parts)
+
+@lru_cache(maxsize=PROFILE_CACHE_SIZE)
+def get_passphrase_profile(entropy_bits=DEFAULT_ENTROPY_BITS, separators="-", capitalize="lower",
+                           digits=0, min_word_length=None, max_word_length=None, part_of_speech=None):
+    """Return the compiled passphrase profile for an option tuple, building it on first use"""
+    return PassphraseProfile(
+        default_wordlist(),
+        entropy_bits=entropy_bits,
+        separators=separators,
+        capitalize=capitalize,
+        digits=digits,
+        min_word_length=min_word_length,
+        max_word_length=max_word_length,
+        part_of_speech=part_of_speech
+    )
@@ -0,0 +1,357 @@
+import math
+from functools import lru_cache
+
+from generator import build_character_pools
+from randomness import secure_random
+from similarity import MIN_PART_LENGTH
+
+# Character classes in the order counts are assigned
+CLASSES = ("uppercase", "lowercase", "digits", "symbols")
+
+# Policy keys and their defaults; every key is optional in a request
+POLICY_DEFAULTS = {
+    'min_length': 8,
+    'max_length': 128,
+    'uppercase': True,
+    'lowercase': True,
+    'digits': True,
+    'symbols': True,
+    'symbol_set': None,
+    'exclude_similar': False,
+    'exclude_ambiguous': False,
+    'min_uppercase': 0,
+    'min_lowercase': 0,
+    'min_digits': 0,
+    'min_symbols': 0,
+    'max_uppercase': None,
+    'max_lowercase': None,
+    'max_digits': None,
+    'max_symbols': None,
+    'max_repeat': None,
+    'forbidden': (),
+    'forbid_user_attributes': True,
+}
+
+# Longest password a policy may ask for
+MAX_POLICY_LENGTH = 128
+
+# Whole-password restarts before a policy is declared unsatisfiable
+MAX_RESTARTS = 100
+
+class Policy:
+    """
+    A declarative password policy: length bounds, which character sets
+    may be used, minimum and maximum counts per set, a limit on identical
+    consecutive characters and forbidden substrings (compared ignoring
+    case). Build one with Policy.from_dict; invalid policies raise
+    ValueError.
+    """
+
+    def __init__(self, **options):
+        for key, value in options.items():
+            setattr(self, key, value)
+
+        pools = build_character_pools(self.uppercase, self.lowercase, self.digits, self.symbols,
+                                      self.exclude_similar, self.exclude_ambiguous)
+        if self.symbol_set is not None:
+            pools['symbols'] = ''.join(char for char in dict.fromkeys(self.symbol_set)
+                                       if not char.isalnum() and not char.isspace())
+        # A forbidden single character can never be used, so it leaves the
+        # alphabet outright and the counts over the pools stay exact
+        banned = {item.lower() for item in self.forbidden if len(item) == 1}
+        self.pools = tuple(''.join(char for char in pools[name] if char.lower() not in banned)
+                           if getattr(self, name) else '' for name in CLASSES)
+        self.minimums = tuple(getattr(self, f'min_{name}') for name in CLASSES)
+        self.maximums = tuple(getattr(self, f'max_{name}') for name in CLASSES)
+        self.alphabet = ''.join(self.pools)
+        self._check()
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a policy from a request payload, applying defaults"""
+        if not isinstance(data, dict):
+            raise ValueError("Policy must be an object")
+        unknown = set(data) - set(POLICY_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown policy settings: {', '.join(sorted(unknown))}")
+
+        options = dict(POLICY_DEFAULTS)
+        try:
+            for key, value in data.items():
+                default = POLICY_DEFAULTS[key]
+                if value is None:
+                    options[key] = None if default is None or key == 'symbol_set' else default
+                elif isinstance(default, bool):
+                    options[key] = bool(value)
+                elif key == 'forbidden':
+                    if isinstance(value, str):
+                        value = [value]
+                    options[key] = tuple(str(item) for item in value if str(item))
+                elif key == 'symbol_set':
+                    options[key] = str(value)
+                else:
+                    options[key] = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid value for policy setting {key}")
+        return cls(**options)
+
+    def _check(self):
+        if not 1 <= self.min_length <= self.max_length <= MAX_POLICY_LENGTH:
+            raise ValueError(f"Policy lengths must satisfy 1 <= min_length <= max_length <= {MAX_POLICY_LENGTH}")
+        if not self.alphabet:
+            raise ValueError("Policy allows no characters")
+        for name, pool, minimum, maximum in zip(CLASSES, self.pools, self.minimums, self.maximums):
+            if minimum < 0 or (maximum is not None and maximum < minimum):
+                raise ValueError(f"Invalid bounds for {name}")
+            if minimum and not pool:
+                raise ValueError(f"Policy requires {name} but allows none")
+        if sum(self.minimums) > self.max_length:
+            raise ValueError("Policy minimums add up to more than max_length")
+        if self.capacity() < self.min_length:
+            raise ValueError("Policy maximums add up to less than min_length")
+        if self.max_repeat is not None and self.max_repeat < 1:
+            raise ValueError("max_repeat must be at least 1")
+
+    def capacity(self):
+        """The longest password the per-set maximums allow"""
+        return sum(0 if not pool else self.max_length if maximum is None else maximum
+                   for pool, maximum in zip(self.pools, self.maximums))
+
+    def forbidden_substrings(self, attributes=None):
+        """
+        Lowercased forbidden substrings, plus the user's details when
+        forbid_user_attributes is set (attributes as built by
+        similarity.user_attributes)
+        """
+        forbidden = {item.lower() for item in self.forbidden}
+        if attributes and self.forbid_user_attributes:
+            for variants in attributes.values():
+                forbidden.update(variant.lower() for variant in variants if len(variant) >= MIN_PART_LENGTH)
+        return tuple(sorted(forbidden))
+
+    def fit_length(self, length):
+        """A requested length moved into the policy's bounds"""
+        return max(self.min_length, sum(self.minimums), min(self.max_length, self.capacity(), int(length)))
+
+    def class_of(self, char):
+        """Index into CLASSES for a character; anything not a letter or digit is a symbol"""
+        if 'A' <= char <= 'Z':
+            return 0
+        if 'a' <= char <= 'z':
+            return 1
+        if '0' <= char <= '9':
+            return 2
+        return 3
+
+    def validate(self, password, attributes=None):
+        """
+        Check a password against the policy. Returns a list of violations,
+        each {'rule', 'message'}; empty when the password conforms.
+        """
+        violations = []
+
+        def violation(rule, message):
+            violations.append({'rule': rule, 'message': message})
+
+        if len(password) < self.min_length:
+            violation('min_length', f"Must be at least {self.min_length} characters")
+        if len(password) > self.max_length:
+            violation('max_length', f"Must be at most {self.max_length} characters")
+
+        counts = [0] * len(CLASSES)
+        for char in password:
+            counts[self.class_of(char)] += 1
+        invalid = [char for char in dict.fromkeys(password) if char not in self.alphabet]
+        if invalid:
+            violation('characters', f"Must not contain \"{''.join(invalid)}\"")
+        for index, name in enumerate(CLASSES):
+            if counts[index] and not self.pools[index]:
+                violation(name, f"Must not contain {name}")
+            if counts[index] < self.minimums[index]:
+                violation(f'min_{name}', f"Must contain at least {self.minimums[index]} {name}")
+            if self.maximums[index] is not None and counts[index] > self.maximums[index]:
+                violation(f'max_{name}', f"Must contain at most {self.maximums[index]} {name}")
+
+        if self.max_repeat is not None:
+            run = 0
+            for i, char in enumerate(password):
+                run = run + 1 if i and char == password[i - 1] else 1
+                if run > self.max_repeat:
+                    violation('max_repeat', f"Must not repeat a character more than {self.max_repeat} times in a row")
+                    break
+
+        lowered = password.lower()
+        for item in self.forbidden_substrings(attributes):
+            if item in lowered:
+                violation('forbidden', f"Must not contain \"{item}\"")
+        return violations
+
+@lru_cache(maxsize=256)
+def _count_table(pool_sizes, minimums, maximums, length):
+    """
+    ways[c][r]: how many strings of length r use only classes c.. with
+    each class count inside its bounds, weighting each class count by the
+    ways to pick its characters and positions. ways[0][length] counts
+    every password with a conforming composition.
+    """
+    classes = len(pool_sizes)
+    ways = [[0] * (length + 1) for _ in range(classes + 1)]
+    ways[classes][0] = 1
+    for c in range(classes - 1, -1, -1):
+        high = length if maximums[c] is None else maximums[c]
+        if pool_sizes[c] == 0:
+            high = 0
+        for remaining in range(length + 1):
+            total = 0
+            for k in range(minimums[c], min(high, remaining) + 1):
+                total += math.comb(remaining, k) * pool_sizes[c] ** k * ways[c + 1][remaining - k]
+            ways[c][remaining] = total
+    return ways
+
+class PolicyProfile:
+    """
+    Generates passwords conforming to a policy at one length, in one pass.
+
+    Counted placement: how many characters each set contributes is drawn
+    with probability proportional to the number of passwords with that
+    composition, so every composition inside the bounds is weighted
+    exactly as in a uniform draw over conforming passwords. A constrained
+    shuffle then lays the counts out position by position, and each
+    character is checked as it is placed against the repeat limit and the
+    forbidden substrings, drawing again from the allowed characters
+    instead of regenerating the whole password. forbidden defaults to
+    the policy's own list, without any user details.
+    """
+
+    def __init__(self, policy, length, forbidden=None):
+        self.policy = policy
+        self.length = policy.fit_length(length)
+        self.forbidden = policy.forbidden_substrings() if forbidden is None else tuple(forbidden)
+        self._longest_forbidden = max((len(item) for item in self.forbidden), default=0)
+        self._ways = _count_table(tuple(len(pool) for pool in policy.pools), policy.minimums,
+                                  policy.maximums, self.length)
+        if self._ways[0][self.length] == 0:
+            raise ValueError("No password of this length satisfies the policy")
+        report = self.report()
+        self.entropy = report['entropy_bits']
+        self.exact = report['exact']
+
+    def _counts(self, rng):
+        """Draw how many characters each class contributes"""
+        counts = []
+        remaining = self.length
+        policy = self.policy
+        for c, pool in enumerate(policy.pools):
+            target = rng.randbelow(self._ways[c][remaining])
+            k = policy.minimums[c]
+            while True:
+                weight = math.comb(remaining, k) * len(pool) ** k * self._ways[c + 1][remaining - k]
+                if target < weight:
+                    break
+                target -= weight
+                k += 1
+            counts.append(k)
+            remaining -= k
+        return counts
+
+    def _allowed(self, char, password, tail):
+        """Whether char can come next without breaking the repeat limit or a forbidden substring"""
+        max_repeat = self.policy.max_repeat
+        if max_repeat is not None and len(password) >= max_repeat:
+            if all(previous == char for previous in password[-max_repeat:]):
+                return False
+        if self.forbidden:
+            candidate = tail + char.lower()
+            for item in self.forbidden:
+                if candidate.endswith(item):
+                    return False
+        return True
+
+    def _attempt(self, rng):
+        """One pass at a conforming password, None when it paints itself into a corner"""
+        counts = self._counts(rng)
+        pools = self.policy.pools
+        password = []
+        tail = ''
+        for remaining in range(self.length, 0, -1):
+            # A uniformly shuffled layout of the counts, drawn one position at a time
+            target = rng.randbelow(remaining)
+            c = 0
+            while target >= counts[c]:
+                target -= counts[c]
+                c += 1
+
+            char = rng.choice(pools[c])
+            if not self._allowed(char, password, tail):
+                # Redraw from what is still allowed here, in this class first
+                # and then in any other class with characters left to place
+                others = [other for other in range(len(counts)) if other != c and counts[other]]
+                rng.shuffle(others)
+                char = None
+                for candidate in [c] + others:
+                    allowed = [option for option in pools[candidate] if self._allowed(option, password, tail)]
+                    if allowed:
+                        c, char = candidate, rng.choice(allowed)
+                        break
+                if char is None:
+                    return None
+
+            counts[c] -= 1
+            password.append(char)
+            # Only the last characters can still start a forbidden substring
+            if self._longest_forbidden > 1:
+                tail = (tail + char.lower())[1 - self._longest_forbidden:]
+        return ''.join(password)
+
+    def generate(self, length=None, rng=secure_random):
+        """Generate one conforming password; length is fixed by the profile"""
+        for _ in range(MAX_RESTARTS):
+            password = self._attempt(rng)
+            if password is not None:
+                return password
+        raise ValueError("Could not satisfy the policy at this length")
+
+    def report(self):
+        """
+        How much entropy the policy leaves and removes, in bits, against
+        a uniform draw of the same length from the policy's alphabet.
+        The composition figure is exact, and forbidden single characters
+        are already gone from the alphabet. The repeat and forbidden
+        substring figures are first-order estimates that treat positions
+        as independent; 'exact' is False when either applies, and the
+        estimate never exceeds the count of conforming compositions.
+        """
+        policy = self.policy
+        alphabet = len(policy.alphabet)
+        unconstrained = self.length * math.log2(alphabet)
+        composition = math.log2(self._ways[0][self.length])
+
+        repeat = 0.0
+        if policy.max_repeat is not None and self.length > policy.max_repeat and alphabet > 1:
+            repeat = -(self.length - policy.max_repeat) * math.log2(1 - alphabet ** -policy.max_repeat)
+
+        letters = {char.lower() for char in policy.alphabet}
+        forbidden = 0.0
+        for item in self.forbidden:
+            if len(item) > self.length or any(char not in letters for char in item):
+                continue
+            chance = 1.0
+            for char in item:
+                chance *= sum(1 for option in policy.alphabet if option.lower() == char) / alphabet
+            if chance < 1:
+                forbidden -= (self.length - len(item) + 1) * math.log2(1 - chance)
+
+        entropy = min(composition, max(0.0, composition - repeat - forbidden))
+        return {
+            'length': self.length,
+            'alphabet_size': alphabet,
+            'unconstrained_bits': unconstrained,
+            'entropy_bits': entropy,
+            'exact': not repeat and not forbidden,
+            'removed_bits': unconstrained - entropy,
+            'removed_by': {
+                'composition': unconstrained - composition,
+                'max_repeat': repeat,
+                'forbidden': forbidden
+            }
+        }
@@ -0,0 +1,171 @@
+import os
+import random
+import threading
+from array import array
+
+# Bytes read from os.urandom per refill; one syscall serves many passwords
+BUFFER_SIZE = int(os.environ.get("RANDOM_BUFFER_SIZE", 65536))
+
+# Alphabets whose bytes.translate tables are kept around
+TABLE_CACHE_SIZE = 256
+
+class SecureRandom(random.Random):
+    """
+    Cryptographically secure random source reading os.urandom in large
+    blocks. The buffer is consumed under a lock and thrown away in forked
+    children (see the end of this module), so no two processes or calls
+    ever see the same bytes.
+
+    Overriding getrandbits and random makes every random.Random method
+    (choice, sample, randint, shuffle) draw from the buffer with the
+    standard library's own unbiased rejection sampling. indices() and
+    string() add bulk draws that reject and map whole blocks at once.
+    """
+
+    def __init__(self, buffer_size=BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._buffer = b''
+        self._position = 0
+        self._tables = {}
+        super().__init__()
+
+    def seed(self, *args, **kwargs):
+        """Ignored, like SystemRandom: the source cannot be seeded"""
+
+    def getstate(self):
+        raise NotImplementedError("SecureRandom has no state to save")
+
+    def setstate(self, state):
+        raise NotImplementedError("SecureRandom has no state to restore")
+
+    def randbytes(self, n):
+        """n random bytes from the buffer, refilling it from os.urandom as needed"""
+        with self._lock:
+            end = self._position + n
+            if end > len(self._buffer):
+                self._buffer = self._buffer[self._position:] + os.urandom(max(self.buffer_size, n))
+                self._position, end = 0, n
+            data = self._buffer[self._position:end]
+            self._position = end
+            return data
+
+    def getrandbits(self, k):
+        if k < 0:
+            raise ValueError("number of bits must be non-negative")
+        if k == 0:
+            return 0
+        return int.from_bytes(self.randbytes((k + 7) // 8), 'little') >> (-k % 8)
+
+    def random(self):
+        return self.getrandbits(53) * 2 ** -53
+
+    def randbelow(self, n):
+        """A uniform integer in [0, n)"""
+        if n <= 0:
+            raise ValueError("n must be positive")
+        return self._randbelow(n)
+
+    def _index_table(self, n):
+        """
+        bytes.translate arguments mapping a random byte to an index below n
+        (n <= 256): bytes at or above the largest multiple of n are deleted,
+        so every index is equally likely.
+        """
+        key = ('indices', n)
+        table = self._tables.get(key)
+        if table is None:
+            limit = 256 - 256 % n
+            table = (bytes(b % n for b in range(256)), bytes(range(limit, 256)))
+            self._cache_table(key, table)
+        return table
+
+    def _string_table(self, alphabet):
+        """
+        Like _index_table, mapping straight to the alphabet's Latin-1 bytes.
+        Returns None for alphabets that do not fit in a byte.
+        """
+        table = self._tables.get(alphabet)
+        if table is None:
+            n = len(alphabet)
+            if n <= 256 and max(alphabet) <= '\xff':
+                limit = 256 - 256 % n
+                encoded = alphabet.encode('latin-1')
+                table = (bytes(encoded[b % n] for b in range(256)), bytes(range(limit, 256)))
+            else:
+                table = ()
+            self._cache_table(alphabet, table)
+        return table or None
+
+    def _cache_table(self, key, table):
+        if len(self._tables) >= TABLE_CACHE_SIZE:
+            self._tables.clear()
+        self._tables[key] = table
+
+    def _translated(self, table, delete, k):
+        """k accepted bytes, drawing blocks sized by the acceptance rate"""
+        accepted = 256 - len(delete)
+        result = b''
+        while len(result) < k:
+            wanted = k - len(result)
+            # Expected draw plus slack, so one block almost always suffices
+            draw = wanted * 256 // accepted + 8
+            result += self.randbytes(draw).translate(table, delete)
+        return result[:k]
+
+    def indices(self, n, k):
+        """
+        k independent uniform integers in [0, n), for a pool of any size.
+        Pools up to 256 map bytes through one translate call; larger ones
+        mask 16- or 32-bit words to the next power of two and reject any
+        that land at or above n.
+        """
+        if n <= 0:
+            raise ValueError("n must be positive")
+        if k <= 0:
+            return []
+        if n == 1:
+            return [0] * k
+        if n <= 256:
+            table, delete = self._index_table(n)
+            return list(self._translated(table, delete, k))
+        if n > 1 << 32:
+            return [self._randbelow(n) for _ in range(k)]
+
+        typecode = 'H' if n <= 1 << 16 else 'I'
+        mask = (1 << (n - 1).bit_length()) - 1
+        result = []
+        while len(result) < k:
+            words = array(typecode)
+            # At least half of the masked words are accepted
+            words.frombytes(self.randbytes((k - len(result)) * 2 * words.itemsize + 8 * words.itemsize))
+            result.extend(value for value in (word & mask for word in words) if value < n)
+        return result[:k]
+
+    def choices_from(self, population, k):
+        """k independent uniform picks from a sequence, with replacement"""
+        return [population[i] for i in self.indices(len(population), k)]
+
+    def string(self, alphabet, k):
+        """
+        A string of k characters drawn uniformly from alphabet. Alphabets of
+        up to 256 Latin-1 characters take the bytes.translate path, which
+        turns a block of random bytes into characters without a Python-level
+        call per character.
+        """
+        if not alphabet:
+            raise ValueError("Cannot draw from an empty alphabet")
+        if k <= 0:
+            return ''
+        table = self._string_table(alphabet)
+        if table is not None:
+            return self._translated(table[0], table[1], k).decode('latin-1')
+        return ''.join(self.choices_from(alphabet, k))
+
+# Shared by every generation path
+secure_random = SecureRandom()
+
+# A forked child must never reuse its parent's buffered bytes, and would
+# deadlock on a lock another thread held at fork time, so it starts afresh
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=lambda: secure_random.__init__(secure_random.buffer_size))
@@ -0,0 +1,158 @@
+import datetime
+import decimal
+import gzip
+import json
+import os
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import parse_accept_header
+
+# Compress response bodies for clients that accept it (set to 0 to disable,
+# for example behind a proxy that compresses)
+COMPRESSION_ENABLED = os.environ.get("RESPONSE_COMPRESSION", "1") != "0"
+
+# Bodies smaller than this are sent as they are; compressing them costs
+# more than it saves
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+
+# Fast settings: responses are small and latency matters more than ratio
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", 5))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", 4))
+
+# Encodings offered to clients, in order of preference
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+def _default(value):
+    """
+    Encode the values zxcvbn leaves in its raw result: calc_time is a
+    timedelta, some guess counts are Decimals and regex matches carry the
+    re.Match that found them.
+    """
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, re.Match):
+        return value.group(0)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(obj):
+    """
+    Serialize obj to compact JSON bytes, with orjson when it is installed.
+    orjson refuses integers beyond 64 bits, which zxcvbn's guess counts
+    reach for long passwords; those documents go through the json module.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(obj, default=_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask JSON provider serializing through dumps(), so jsonify does too"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj) + b"\n", mimetype=self.mimetype)
+
+def negotiate_encoding(accept_encoding):
+    """The best encoding both sides support for an Accept-Encoding header, or None"""
+    if not COMPRESSION_ENABLED or not accept_encoding:
+        return None
+    return parse_accept_header(accept_encoding).best_match(ENCODINGS)
+
+def compressible(mimetype):
+    return mimetype == 'application/json' or mimetype.startswith('text/')
+
+def compress(body, encoding):
+    """body compressed with a negotiated encoding"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+def _truthy(value):
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes")
+    return bool(value)
+
+class FieldSelection:
+    """
+    The response fields a request asked for, with ?fields=a,b.c (or a
+    "fields" list in the body) and compact mode. Handlers ask wants()
+    before computing a section, so unrequested work is skipped rather
+    than computed and dropped, and project() trims the result to the
+    selection. A dotted name selects one key of a nested object.
+    """
+
+    def __init__(self, fields=None):
+        self.fields = None if fields is None else tuple(fields)
+        self.top = None if fields is None else {field.split('.', 1)[0] for field in self.fields}
+
+    @classmethod
+    def from_request(cls, data, query, known, compact, required=()):
+        """
+        The selection for a request body and its query parameters (a dict
+        of single values). known lists the endpoint's top-level fields,
+        compact the ones compact mode keeps and required the ones every
+        selection includes. Raises ValueError for fields the endpoint does
+        not have.
+        """
+        fields = data.get('fields', query.get('fields'))
+        if fields is None:
+            if not _truthy(data.get('compact', query.get('compact', False))):
+                return EVERYTHING
+            fields = compact
+        elif isinstance(fields, str):
+            fields = [field.strip() for field in fields.split(',') if field.strip()]
+        elif not isinstance(fields, list) or not all(isinstance(field, str) for field in fields):
+            raise ValueError("fields must be a list of field names or a comma-separated string")
+
+        unknown = sorted({field.split('.', 1)[0] for field in fields} - set(known))
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return cls(tuple(dict.fromkeys([*required, *fields])))
+
+    def wants(self, *names):
+        """Whether any of the named top-level fields is selected"""
+        return self.top is None or any(name in self.top for name in names)
+
+    def project(self, result):
+        """The selected parts of a result; fields that were not computed are left out"""
+        if self.fields is None:
+            return result
+        projected = {}
+        whole = {field for field in self.fields if '.' not in field}
+        for field in self.fields:
+            name, _, rest = field.partition('.')
+            if name not in result:
+                continue
+            value = result[name]
+            if not rest or name in whole or not isinstance(value, dict):
+                projected[name] = value
+            elif rest in value:
+                projected.setdefault(name, {})[rest] = value[rest]
+        return projected
+
+# Every field, computed and returned as before
+EVERYTHING = FieldSelection()
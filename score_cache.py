@@ -0,0 +1,106 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# zxcvbn result keys worth caching. The password itself and the match
+# sequence (which holds substrings of it) are left out.
+CACHED_RAW_KEYS = ('guesses', 'guesses_log10', 'score', 'crack_times_seconds',
+                   'crack_times_display', 'feedback', 'calc_time')
+
+def redact(strength_info):
+    """
+    A copy of a strength result safe to hold for the cache TTL: raw_result
+    keeps only CACHED_RAW_KEYS, so no plaintext survives in the cache
+    """
+    raw_result = strength_info.get('raw_result') or {}
+    return dict(strength_info, raw_result={key: raw_result[key] for key in CACHED_RAW_KEYS if key in raw_result})
+
+class ScoreCache:
+    """
+    Bounded, TTL-evicting LRU cache for password strength results.
+    Entries are keyed on an HMAC of the password so the plaintext is never
+    used as a key. The cached values are whatever the caller stores, so
+    callers should store redact()ed results rather than raw zxcvbn output.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300, key=None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self._key = key or os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def make_key(self, password):
+        """Keyed hash of a password, used as the cache key"""
+        return hmac.new(self._key, password.encode('utf-8', 'surrogatepass'),
+                        hashlib.sha256).digest()
+
+    def get(self, password):
+        """Return the cached value for a password, or None"""
+        key = self.make_key(password)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, password, value):
+        """Store a value, evicting the least recently used entry when full"""
+        key = self.make_key(password)
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return the cache counters"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+def cache_from_env():
+    """
+    Build the strength cache from environment settings.
+    Returns None unless ZXCVBN_CACHE_ENABLED is set.
+    """
+    if os.environ.get("ZXCVBN_CACHE_ENABLED", "").lower() not in ("1", "true", "yes"):
+        return None
+
+    key = os.environ.get("ZXCVBN_CACHE_KEY")
+    return ScoreCache(
+        max_entries=int(os.environ.get("ZXCVBN_CACHE_MAX_ENTRIES", 10000)),
+        ttl=float(os.environ.get("ZXCVBN_CACHE_TTL", 300)),
+        key=key.encode('utf-8') if key else None
+    )
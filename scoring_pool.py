@@ -0,0 +1,125 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+# Spawned workers import this module first, map the dictionaries there too
+import dictionaries
+dictionaries.install_from_env()
+
+import zxcvbn
+
+class ScoringUnavailable(Exception):
+    """Raised when the pool is saturated or a result misses its deadline"""
+
+def _warm_worker():
+    """Pool initializer: run zxcvbn once so its dictionaries are loaded"""
+    zxcvbn.zxcvbn("warm-up")
+
+def _ping():
+    return os.getpid()
+
+def _picklable(matches):
+    """Replace the re.Match objects zxcvbn keeps on regex matches with their text"""
+    for match in matches:
+        if 'regex_match' in match:
+            match['regex_match'] = match['regex_match'].group(0)
+        if 'base_matches' in match:
+            _picklable(match['base_matches'])
+    return matches
+
+def run_zxcvbn(password):
+    """Score one password in a worker process"""
+    result = zxcvbn.zxcvbn(password)
+    _picklable(result['sequence'])
+    return result
+
+class ScoringExecutor:
+    """
+    Persistent process pool for zxcvbn scoring.
+    Keeps CPU-bound scoring off the web worker so it never holds the GIL
+    there. At most workers + queue_size jobs are accepted at once; beyond
+    that, and when a result misses its deadline, ScoringUnavailable is
+    raised so the caller can answer with a degraded response instead.
+    """
+
+    def __init__(self, workers=2, queue_size=8, timeout=2.0):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker)
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def warm_up(self):
+        """Start every worker process now rather than on the first request"""
+        for future in [self._pool.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def _release(self, future):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def score(self, password, timeout=None):
+        """Return the zxcvbn result for a password, or raise ScoringUnavailable"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ScoringUnavailable("Scoring queue is full")
+
+        with self._lock:
+            self.in_flight += 1
+            self.submitted += 1
+        future = self._pool.submit(run_zxcvbn, password)
+        future.add_done_callback(self._release)
+
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            # The job keeps its slot until it finishes, which is the backpressure
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise ScoringUnavailable("Scoring deadline exceeded")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'in_flight': self.in_flight,
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(cancel_futures=True)
+
+def executor_from_env():
+    """
+    Build and warm the scoring pool when SCORING_WORKERS is set.
+    Returns None (score in-process) otherwise, and always inside processes
+    started by multiprocessing so pools are never nested. Processes forked
+    after the pool exists must not use it either; app.py forgets it in
+    forked children, which start their own on first use.
+    """
+    workers = int(os.environ.get("SCORING_WORKERS", 0))
+    if workers <= 0 or multiprocessing.parent_process() is not None:
+        return None
+
+    executor = ScoringExecutor(
+        workers=workers,
+        queue_size=int(os.environ.get("SCORING_QUEUE_SIZE", workers * 4)),
+        timeout=float(os.environ.get("SCORING_TIMEOUT", 2.0))
+    )
+    executor.warm_up()
+    logging.info(f"Started scoring pool with {workers} workers")
+    return executor
@@ -0,0 +1,215 @@
+import os
+import re
+
+from zxcvbn.matching import L33T_TABLE
+
+# Similarity below this percentage is reported as 0, which also bounds how
+# many edits a comparison has to consider before it can stop early
+SIMILARITY_FLOOR = int(os.environ.get("SIMILARITY_FLOOR", 50))
+
+# At or above this percentage a password counts as based on the attribute
+SIMILARITY_WARNING = int(os.environ.get("SIMILARITY_WARNING", 70))
+
+# Shorter attributes only match exactly (after de-leeting); one edit in a
+# three-letter name matches far too much
+MIN_FUZZY_LENGTH = 4
+
+# Attribute parts shorter than this are not compared on their own
+MIN_PART_LENGTH = 3
+
+# Attributes are cut to this length, which bounds the bit vectors and so
+# the cost of a comparison whatever a client sends
+MAX_ATTRIBUTE_LENGTH = 128
+
+# Every character a character may stand for, itself included: "4" -> a,
+# "1" -> i or l. Built from zxcvbn's l33t table.
+LEET_LETTERS = {}
+for _letter, _subs in L33T_TABLE.items():
+    for _sub in _subs:
+        LEET_LETTERS.setdefault(_sub, {_sub}).add(_letter)
+
+# Separators that split e-mail local parts and display names into words
+PART_SEPARATORS = re.compile(r'[\s._+\-]+')
+
+class Pattern:
+    """
+    One attribute compiled for bit-parallel comparison.
+    Bit i of a match mask is set when the character matches position i of
+    the attribute. Characters match when they are equal ignoring case or
+    one can stand for the other in leetspeak, so "4l1c3" matches "alice".
+    """
+
+    def __init__(self, text):
+        self.text = text.lower()
+        self.length = len(self.text)
+        self._masks = {}
+        for position, char in enumerate(self.text):
+            for letter in LEET_LETTERS.get(char, (char,)):
+                self._masks[letter] = self._masks.get(letter, 0) | (1 << position)
+
+    def match_masks(self, text):
+        """Match mask for each character of a lowercased text"""
+        by_char = {}
+        for char in set(text):
+            mask = 0
+            for letter in LEET_LETTERS.get(char, (char,)):
+                mask |= self._masks.get(letter, 0)
+            by_char[char] = mask
+        return [by_char[char] for char in text]
+
+def _osa(m, masks, cutoff, substring):
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent
+    transpositions) with Hyyro's bit-parallel recurrence, between a pattern
+    of length m and a text given as its Pattern.match_masks, one column of
+    the DP per character of text. Python integers act as bit vectors of any
+    width, so each column costs a few big-int operations, not m cell
+    updates. With substring set the pattern may align anywhere in text
+    (zero cost to skip text on either side). Returns cutoff + 1 as soon as
+    the distance is known to exceed cutoff.
+    """
+    n = len(masks)
+    if m == 0:
+        return 0 if substring else min(n, cutoff + 1)
+    if not substring and abs(m - n) > cutoff:
+        return cutoff + 1
+
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    carry_in = 0 if substring else 1
+    vp, vn, d0, previous_eq = mask, 0, 0, 0
+    distance = best = m
+
+    for j, eq in enumerate(masks):
+        transposed = ((~d0 & eq) << 1) & previous_eq
+        d0 = ((((eq & vp) + vp) ^ vp) | eq | vn | transposed) & mask
+        hp = vn | (~(d0 | vp) & mask)
+        hn = d0 & vp
+        if hp & last:
+            distance += 1
+        elif hn & last:
+            distance -= 1
+
+        if substring:
+            if distance < best:
+                best = distance
+                if best == 0:
+                    return 0
+        elif distance - (n - j - 1) > cutoff:
+            # The last row changes by at most one per remaining column
+            return cutoff + 1
+
+        hp = ((hp << 1) | carry_in) & mask
+        hn = (hn << 1) & mask
+        vp = hn | (~(d0 | hp) & mask)
+        vn = hp & d0
+        previous_eq = eq
+
+    result = best if substring else distance
+    return result if result <= cutoff else cutoff + 1
+
+def osa_distance(a, b, cutoff=None):
+    """Leet-aware OSA distance between two strings, capped at cutoff + 1"""
+    pattern = Pattern(a)
+    if cutoff is None:
+        cutoff = max(pattern.length, len(b))
+    return _osa(pattern.length, pattern.match_masks(b.lower()), cutoff, substring=False)
+
+def substring_distance(attribute, text, cutoff=None):
+    """Fewest edits turning attribute into some substring of text, capped at cutoff + 1"""
+    pattern = Pattern(attribute)
+    if cutoff is None:
+        cutoff = pattern.length
+    return _osa(pattern.length, pattern.match_masks(text.lower()), cutoff, substring=True)
+
+def _similarity(pattern, password, floor):
+    """Percent similarity of a lowercased password to a compiled attribute"""
+    m, n = pattern.length, len(password)
+    if m == 0 or n == 0:
+        return 0
+    if pattern.text in password:
+        return 100
+
+    def allowed(length):
+        # Most edits that still leave the score at or above floor
+        return (length * (100 - floor)) // 100 if m >= MIN_FUZZY_LENGTH else 0
+
+    masks = pattern.match_masks(password)
+
+    # The attribute somewhere inside the password ("xx4l1c3_99"); at
+    # least m - n edits are needed when the attribute is the longer one
+    best = 0
+    limit = allowed(m)
+    if m - n <= limit:
+        distance = _osa(m, masks, limit, substring=True)
+        if distance <= limit:
+            best = 100 - distance * 100 // m
+
+    # The password as a whole being an edited attribute ("ecila" vs "alice"),
+    # skipped when the length difference alone keeps it from doing better
+    longest = max(m, n)
+    limit = min(allowed(longest), (100 - best) * longest // 100)
+    if abs(m - n) <= limit:
+        distance = _osa(m, masks, limit, substring=False)
+        if distance <= limit:
+            best = max(best, 100 - distance * 100 // longest)
+
+    return best if best >= floor else 0
+
+def similarity(password, attribute, floor=SIMILARITY_FLOOR):
+    """
+    How closely a password resembles one user attribute, 0-100.
+    Takes the better of the attribute aligned inside the password and the
+    whole password against the attribute, both leet-aware.
+    """
+    return _similarity(Pattern(attribute), password.lower(), floor)
+
+def attribute_similarity(password, attributes, floor=SIMILARITY_FLOOR):
+    """
+    Compare one password against many user attributes at once.
+    attributes maps a name to a string or a list of variants, as built by
+    user_attributes; each name gets the best score of its variants. The
+    password is lowercased once, a variant shared by several attributes is
+    scored once, and every comparison stops as soon as it cannot reach floor.
+    """
+    password = password.lower()
+    scored = {}
+    scores = {}
+    for name, variants in attributes.items():
+        if isinstance(variants, str):
+            variants = [variants]
+        scores[name] = 0
+        for variant in variants:
+            variant = variant.lower()
+            if variant not in scored:
+                scored[variant] = _similarity(Pattern(variant), password, floor)
+            scores[name] = max(scores[name], scored[variant])
+            if scores[name] == 100:
+                break
+    return scores
+
+def _parts(text):
+    """The text with separators removed, then each word long enough on its own"""
+    words = [word for word in PART_SEPARATORS.split(text) if word]
+    variants = [''.join(words)] if words else []
+    variants.extend(word for word in words if len(word) >= MIN_PART_LENGTH and word != variants[0])
+    return variants
+
+def user_attributes(username=None, email=None, display_name=None):
+    """
+    Build attribute variants for attribute_similarity: the username, the
+    e-mail local part (without any +tag) and the display name, plus the
+    words of the latter two. Each is cut to MAX_ATTRIBUTE_LENGTH.
+    """
+    attributes = {}
+    if username:
+        attributes['username'] = [str(username)[:MAX_ATTRIBUTE_LENGTH]]
+    if email:
+        variants = _parts(str(email).split('@', 1)[0].split('+', 1)[0][:MAX_ATTRIBUTE_LENGTH])
+        if variants:
+            attributes['email'] = variants
+    if display_name:
+        variants = _parts(str(display_name)[:MAX_ATTRIBUTE_LENGTH])
+        if variants:
+            attributes['display_name'] = variants
+    return attributes
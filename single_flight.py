@@ -0,0 +1,93 @@
+import hashlib
+import hmac
+import os
+import threading
+
+class _Call:
+    """One in-flight call and the outcome its waiters share"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical work. While a call for a password is
+    running, later callers for the same password wait for its outcome
+    instead of repeating it, so a burst of identical checks costs one
+    zxcvbn run. Calls are keyed on an HMAC of the password so the
+    plaintext is never held in the in-flight table. Nothing is kept once
+    a call finishes; keeping results is ScoreCache's job.
+    """
+
+    def __init__(self, key=None):
+        self._key = key or os.urandom(32)
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def make_key(self, password):
+        """Keyed hash of a password, used as the in-flight key"""
+        return hmac.new(self._key, password.encode('utf-8', 'surrogatepass'),
+                        hashlib.sha256).digest()
+
+    def run(self, password, func, *args):
+        """
+        Return func(*args), or the outcome of the identical call already
+        running for this password. Exceptions reach every waiter.
+        """
+        key = self.make_key(password)
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def waiting(self, password):
+        """How many callers are waiting on the running call for a password"""
+        with self._lock:
+            call = self._calls.get(self.make_key(password))
+            return call.waiters if call is not None else 0
+
+    def stats(self):
+        """Return the coalescing counters"""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'calls': self.calls,
+                'coalesced': self.coalesced
+            }
+
+def single_flight_from_env():
+    """
+    Build the scoring single-flight table from environment settings.
+    Returns None when SINGLE_FLIGHT_ENABLED is 0.
+    """
+    if os.environ.get("SINGLE_FLIGHT_ENABLED", "1") == "0":
+        return None
+    return SingleFlight()
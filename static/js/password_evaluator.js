@@ -822,7 +822,7 @@ document.addEventListener("DOMContentLoaded", function () {
       updateHistoryDisplay();
       
       // Then try to clear on server
-      fetch("/clear-history", {
+      fetch("/history/clear", {
         method: "POST",
         headers: {
           "Content-Type": "application/json" 
@@ -951,6 +951,185 @@ document.addEventListener("DOMContentLoaded", function () {
     });
   }
 
+  // Render a /check (or /check/incremental) response into the check tab
+  function renderCheckResults(data) {
+    // Show results
+    checkResults.classList.remove("d-none");
+
+    // Update strength text and meter
+    checkStrengthText.textContent = data.strength;
+    checkStrengthMeter.style.width = `${data.score_percent}%`;
+    
+    // Update strength meter color based on score
+    checkStrengthMeter.classList.remove("bg-danger", "bg-warning", "bg-info", "bg-success");
+    if (data.score <= 1) {
+      checkStrengthMeter.classList.add("bg-danger");
+    } else if (data.score === 2) {
+      checkStrengthMeter.classList.add("bg-warning");
+    } else if (data.score === 3) {
+      checkStrengthMeter.classList.add("bg-info");
+    } else {
+      checkStrengthMeter.classList.add("bg-success");
+    }
+
+    // Update crack time
+    checkTimeToCrack.textContent = data.crack_time;
+
+    // Update feedback list
+    checkFeedbackList.innerHTML = "";
+    if (data.feedback && data.feedback.length > 0) {
+      data.feedback.forEach(suggestion => {
+        const li = document.createElement("li");
+        li.className = "list-group-item";
+        li.textContent = suggestion;
+        checkFeedbackList.appendChild(li);
+      });
+    }
+
+    // Update advanced analysis content
+    if (data.analysis) {
+      const analysisHTML = `
+        <div class="row">
+          <div class="col-md-6">
+            <ul class="list-group list-group-flush">
+              <li class="list-group-item d-flex justify-content-between">
+                <span>Length</span>
+                <span class="badge bg-primary rounded-pill">${data.analysis.length}</span>
+              </li>
+              <li class="list-group-item d-flex justify-content-between">
+                <span>Uppercase</span>
+                <span class="badge ${data.analysis.character_sets.uppercase > 0 ? "bg-success" : "bg-secondary"} rounded-pill">
+                  ${data.analysis.character_sets.uppercase}
+                </span>
+              </li>
+              <li class="list-group-item d-flex justify-content-between">
+                <span>Lowercase</span>
+                <span class="badge ${data.analysis.character_sets.lowercase > 0 ? "bg-success" : "bg-secondary"} rounded-pill">
+                  ${data.analysis.character_sets.lowercase}
+                </span>
+              </li>
+            </ul>
+          </div>
+          <div class="col-md-6">
+            <ul class="list-group list-group-flush">
+              <li class="list-group-item d-flex justify-content-between">
+                <span>Digits</span>
+                <span class="badge ${data.analysis.character_sets.digits > 0 ? "bg-success" : "bg-secondary"} rounded-pill">
+                  ${data.analysis.character_sets.digits}
+                </span>
+              </li>
+              <li class="list-group-item d-flex justify-content-between">
+                <span>Symbols</span>
+                <span class="badge ${data.analysis.character_sets.symbols > 0 ? "bg-success" : "bg-secondary"} rounded-pill">
+                  ${data.analysis.character_sets.symbols}
+                </span>
+              </li>
+              <li class="list-group-item d-flex justify-content-between">
+                <span>Entropy</span>
+                <span class="badge bg-info rounded-pill">
+                  ${typeof data.entropy === "number" ? data.entropy.toFixed(1) + " bits" : "n/a"}
+                </span>
+              </li>
+            </ul>
+          </div>
+        </div>
+      `;
+      advancedAnalysisContent.innerHTML = analysisHTML;
+    }
+  }
+
+  // Live feedback while typing: send only the edit since the last check
+  let incrementalState = null;
+  let incrementalInFlight = false;
+  let incrementalPending = false;
+
+  // Wait for a pause in typing before checking, so a burst of keystrokes
+  // costs one request
+  const CHECK_DEBOUNCE_MS = 150;
+  let incrementalTimer = null;
+
+  function scheduleIncrementalCheck() {
+    clearTimeout(incrementalTimer);
+    incrementalTimer = setTimeout(checkPasswordIncremental, CHECK_DEBOUNCE_MS);
+  }
+
+  function buildIncrementalRequest(password) {
+    if (!incrementalState) {
+      return { password: password };
+    }
+
+    // Characters shared with the last checked password are kept server-side
+    const previous = incrementalState.password;
+    const limit = Math.min(previous.length, password.length);
+    let keep = 0;
+    while (keep < limit && previous[keep] === password[keep]) {
+      keep++;
+    }
+
+    return {
+      token: incrementalState.token,
+      revision: incrementalState.revision,
+      keep: keep,
+      append: password.slice(keep)
+    };
+  }
+
+  function checkPasswordIncremental() {
+    // One request at a time; later edits are folded into the next one
+    if (incrementalInFlight) {
+      incrementalPending = true;
+      return;
+    }
+
+    const password = checkPasswordInput.value;
+    if (!password && !incrementalState) return;
+
+    incrementalInFlight = true;
+    fetch("/check/incremental", {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json"
+      },
+      body: JSON.stringify(buildIncrementalRequest(password))
+    })
+    .then(response => {
+      if (response.status === 409) {
+        // Server state is gone or out of step, resend the whole password
+        incrementalState = null;
+        incrementalPending = true;
+        return null;
+      }
+      if (!response.ok) {
+        throw new Error("Network response was not ok");
+      }
+      return response.json();
+    })
+    .then(data => {
+      if (!data) return;
+      incrementalState = { token: data.token, revision: data.revision, password: password };
+      if (data.score !== undefined && password === checkPasswordInput.value) {
+        renderCheckResults(data);
+      }
+    })
+    .catch(error => {
+      console.error("Error checking password strength:", error);
+    })
+    .finally(() => {
+      incrementalInFlight = false;
+      if (incrementalPending) {
+        incrementalPending = false;
+        checkPasswordIncremental();
+      }
+    });
+  }
+
+  if (checkPasswordInput) {
+    checkPasswordInput.addEventListener("input", scheduleIncrementalCheck);
+  }
+
+  // The full check in flight, aborted when a newer one starts
+  let checkController = null;
+
   // Handle form submission for password strength check
   if (checkForm) {
     checkForm.addEventListener("submit", function(e) {
@@ -967,13 +1146,21 @@ document.addEventListener("DOMContentLoaded", function () {
       checkStrengthText.textContent = "Analyzing...";
       checkStrengthMeter.style.width = "0%";
 
+      // Only the latest check may render; cancel any earlier one
+      if (checkController) {
+        checkController.abort();
+      }
+      const controller = new AbortController();
+      checkController = controller;
+
       // Send password to server for analysis
       fetch("/check", {
         method: "POST",
         headers: {
           "Content-Type": "application/json"
         },
-        body: JSON.stringify({ password: password })
+        body: JSON.stringify({ password: password }),
+        signal: controller.signal
       })
       .then(response => {
         if (!response.ok) {
@@ -982,96 +1169,20 @@ document.addEventListener("DOMContentLoaded", function () {
         return response.json();
       })
       .then(data => {
-        // Show results
-        checkResults.classList.remove("d-none");
-
-        // Update strength text and meter
-        checkStrengthText.textContent = data.strength;
-        checkStrengthMeter.style.width = `${data.score_percent}%`;
-        
-        // Update strength meter color based on score
-        checkStrengthMeter.classList.remove("bg-danger", "bg-warning", "bg-info", "bg-success");
-        if (data.score <= 1) {
-          checkStrengthMeter.classList.add("bg-danger");
-        } else if (data.score === 2) {
-          checkStrengthMeter.classList.add("bg-warning");
-        } else if (data.score === 3) {
-          checkStrengthMeter.classList.add("bg-info");
-        } else {
-          checkStrengthMeter.classList.add("bg-success");
-        }
-
-        // Update crack time
-        checkTimeToCrack.textContent = data.crack_time;
-
-        // Update feedback list
-        checkFeedbackList.innerHTML = "";
-        if (data.feedback && data.feedback.length > 0) {
-          data.feedback.forEach(suggestion => {
-            const li = document.createElement("li");
-            li.className = "list-group-item";
-            li.textContent = suggestion;
-            checkFeedbackList.appendChild(li);
-          });
-        }
-
-        // Update advanced analysis content
-        if (data.analysis) {
-          const analysisHTML = `
-            <div class="row">
-              <div class="col-md-6">
-                <ul class="list-group list-group-flush">
-                  <li class="list-group-item d-flex justify-content-between">
-                    <span>Length</span>
-                    <span class="badge bg-primary rounded-pill">${data.analysis.length}</span>
-                  </li>
-                  <li class="list-group-item d-flex justify-content-between">
-                    <span>Uppercase</span>
-                    <span class="badge ${data.analysis.character_sets.uppercase > 0 ? "bg-success" : "bg-secondary"} rounded-pill">
-                      ${data.analysis.character_sets.uppercase}
-                    </span>
-                  </li>
-                  <li class="list-group-item d-flex justify-content-between">
-                    <span>Lowercase</span>
-                    <span class="badge ${data.analysis.character_sets.lowercase > 0 ? "bg-success" : "bg-secondary"} rounded-pill">
-                      ${data.analysis.character_sets.lowercase}
-                    </span>
-                  </li>
-                </ul>
-              </div>
-              <div class="col-md-6">
-                <ul class="list-group list-group-flush">
-                  <li class="list-group-item d-flex justify-content-between">
-                    <span>Digits</span>
-                    <span class="badge ${data.analysis.character_sets.digits > 0 ? "bg-success" : "bg-secondary"} rounded-pill">
-                      ${data.analysis.character_sets.digits}
-                    </span>
-                  </li>
-                  <li class="list-group-item d-flex justify-content-between">
-                    <span>Symbols</span>
-                    <span class="badge ${data.analysis.character_sets.symbols > 0 ? "bg-success" : "bg-secondary"} rounded-pill">
-                      ${data.analysis.character_sets.symbols}
-                    </span>
-                  </li>
-                  <li class="list-group-item d-flex justify-content-between">
-                    <span>Entropy</span>
-                    <span class="badge bg-info rounded-pill">
-                      ${data.entropy.toFixed(1)} bits
-                    </span>
-                  </li>
-                </ul>
-              </div>
-            </div>
-          `;
-          advancedAnalysisContent.innerHTML = analysisHTML;
-        }
+        renderCheckResults(data);
 
         // Hide advanced analysis section initially
         advancedAnalysis.classList.add("d-none");
       })
       .catch(error => {
+        if (error.name === "AbortError") return;
         console.error("Error checking password strength:", error);
         alert("Error checking password strength. Please try again.");
+      })
+      .finally(() => {
+        if (checkController === controller) {
+          checkController = null;
+        }
       });
     });
   }
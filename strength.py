@@ -0,0 +1,81 @@
+from datetime import datetime
+
+# Map the precompiled dictionaries (ZXCVBN_DICTIONARY_PATH) before zxcvbn
+# is imported; audit workers import this module without app.py
+import dictionaries
+dictionaries.install_from_env()
+
+from zxcvbn import feedback, matching, scoring, time_estimates
+
+import metrics
+from analyzer import analyzer_from_env
+
+# Strength scoring and pattern analysis shared by the web app and audit
+# workers. Nothing here touches Flask or the scoring pool, so worker
+# processes score in-process without importing the application.
+
+# Single-pass pattern analyzer, keyboard layouts come from KEYBOARD_LAYOUTS
+pattern_analyzer = analyzer_from_env()
+
+# zxcvbn refuses longer passwords
+MAX_PASSWORD_LENGTH = 72
+
+def check_length(password, max_length=MAX_PASSWORD_LENGTH):
+    """Raise ValueError for a password too long to score"""
+    if len(password) > max_length:
+        raise ValueError(f"Password exceeds max length of {max_length} characters.")
+
+def run_zxcvbn(password, max_length=MAX_PASSWORD_LENGTH):
+    """
+    The steps of zxcvbn.zxcvbn(), with matching and scoring timed as
+    separate stages. No user inputs are passed on this path.
+    """
+    check_length(password, max_length)
+    
+    start = datetime.now()
+    with metrics.stage('zxcvbn_matching'):
+        matches = matching.omnimatch(password, matching.RANKED_DICTIONARIES)
+    with metrics.stage('zxcvbn_scoring'):
+        result = scoring.most_guessable_match_sequence(password, matches)
+        result['calc_time'] = datetime.now() - start
+        result.update(time_estimates.estimate_attack_times(result['guesses']))
+        result['feedback'] = feedback.get_feedback(result['score'], result['sequence'])
+    return result
+
+def is_common_password(strength_info):
+    """Whether zxcvbn rates the password as common; None when scoring was skipped"""
+    if strength_info.get('degraded'):
+        return None
+    return strength_info['raw_result'].get('guesses', 0) < 1000
+
+def summarize_strength(result):
+    """Extracts the fields we report from a zxcvbn result"""
+    # Get crack time in human-readable format
+    crack_time = result['crack_times_display']['offline_slow_hashing_1e4_per_second']
+    
+    # Get score (0-4, where 0 is very weak and 4 is very strong)
+    score = result['score']
+    
+    return {
+        'crack_time': crack_time,
+        'score': score,
+        'feedback': result.get('feedback', {}),
+        'entropy': result['guesses_log10'],
+        'raw_result': result
+    }
+
+def analyze_password_patterns(password, scan=None):
+    """
+    Analyze patterns in the password for additional insights.
+    Pass an existing pattern_analyzer scan to avoid rescanning.
+    """
+    if scan is None:
+        with metrics.stage('pattern_analysis'):
+            scan = pattern_analyzer.scan(password)
+    return {
+        'length': scan['length'],
+        'character_sets': scan['character_sets'],
+        'repeating_chars': scan['repeating_chars'],
+        'sequential_chars': scan['sequential_chars'],
+        'keyboard_patterns': scan['keyboard_patterns']
+    }
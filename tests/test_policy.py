@@ -0,0 +1,47 @@
+"""Generating and validating against declarative password policies."""
+import pytest
+
+import app as padlock
+from policy import Policy, PolicyProfile
+from strength import MAX_PASSWORD_LENGTH
+
+
+@pytest.fixture
+def client():
+    return padlock.app.test_client()
+
+
+def test_policy_can_only_produce_one_password():
+    policy = Policy.from_dict({'uppercase': False, 'digits': False, 'symbols': False,
+                               'min_length': 4, 'forbidden': list('abcdefghijklmnopqrstuvwxy')})
+    profile = PolicyProfile(policy, 4)
+    assert profile.generate() == 'zzzz'
+    assert profile.report()['entropy_bits'] == 0
+
+
+def test_validate_reports_characters_outside_the_alphabet():
+    policy = Policy.from_dict({'symbol_set': '!#', 'exclude_similar': True})
+    violations = policy.validate('Abcdefgh1l!$')
+    assert {'rule': 'characters', 'message': 'Must not contain "1l$"'} in violations
+
+
+@pytest.mark.parametrize('rules', [{}, {'max_repeat': 2}, {'forbidden': ['abc']}])
+def test_generate_beyond_the_scoring_limit(client, rules):
+    min_length = MAX_PASSWORD_LENGTH + 8
+    response = client.post('/generate', json={'policy': {'min_length': min_length, **rules}})
+    assert response.status_code == 200
+    result = response.get_json()
+    assert len(result['password']) == min_length
+    if rules:
+        # Only an estimate of the entropy is known, so it is left unscored
+        assert result['score'] is None
+    else:
+        assert result['score'] == 4
+        assert result['policy']['exact']
+
+
+def test_validate_beyond_the_scoring_limit(client):
+    password = 'Aa1!' * 20
+    response = client.post('/policy/validate', json={'password': password, 'policy': {'min_length': 80}})
+    assert response.status_code == 200
+    assert response.get_json()['valid']
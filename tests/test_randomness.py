@@ -0,0 +1,123 @@
+"""
+Uniformity of randomness.SecureRandom's draws.
+
+The mapping and rejection logic is tested on deterministic byte sources
+in place of os.urandom: a stream that walks every byte (or 16-bit word)
+value in turn must come out exactly uniform, which catches any modulo
+bias, and a seeded stream must pass chi-square goodness-of-fit tests.
+"""
+import math
+import random
+from array import array
+
+import pytest
+
+from generator import get_profile
+from randomness import SecureRandom
+
+# Pool sizes covering the translate path, the 16- and 32-bit word paths and
+# sizes just past powers of two, where rejection rates are highest
+POOL_SIZES = (2, 3, 10, 26, 62, 77, 129, 255, 256, 257, 1000, 7776, 65537)
+
+# Normal quantile for a 0.001 significance level
+Z_SCORE = 3.090
+
+SEED = 20261018
+
+
+class StreamRandom(SecureRandom):
+    """SecureRandom reading a fixed byte pattern, repeated forever, instead of os.urandom"""
+
+    def __init__(self, pattern):
+        super().__init__()
+        self.pattern = pattern
+        self.offset = 0
+
+    def randbytes(self, n):
+        start = self.offset
+        self.offset = (self.offset + n) % len(self.pattern)
+        repeats = (start + n) // len(self.pattern) + 1
+        return (self.pattern * repeats)[start:start + n]
+
+
+class SeededRandom(SecureRandom):
+    """SecureRandom reading a seeded pseudo-random stream instead of os.urandom"""
+
+    def __init__(self, seed=SEED):
+        super().__init__()
+        self.source = random.Random(seed)
+
+    def randbytes(self, n):
+        return self.source.randbytes(n)
+
+
+def chi_square_critical(df, z=Z_SCORE):
+    """Wilson-Hilferty approximation of the chi-square quantile"""
+    return df * (1 - 2 / (9 * df) + z * math.sqrt(2 / (9 * df))) ** 3
+
+
+def assert_uniform(counts, total):
+    expected = total / len(counts)
+    statistic = sum((count - expected) ** 2 / expected for count in counts)
+    assert statistic <= chi_square_critical(len(counts) - 1)
+
+
+@pytest.mark.parametrize('n', [n for n in POOL_SIZES if n <= 256])
+def test_byte_indices_have_no_rejection_bias(n):
+    # Each cycle of the 256 byte values yields every index limit // n times
+    rng = StreamRandom(bytes(range(256)))
+    limit = 256 - 256 % n
+    cycles = 3
+    counts = [0] * n
+    for index in rng.indices(n, cycles * limit):
+        counts[index] += 1
+    assert counts == [cycles * limit // n] * n
+
+
+@pytest.mark.parametrize('n', [n for n in POOL_SIZES if 256 < n <= 1 << 16])
+def test_word_indices_have_no_rejection_bias(n):
+    # Each cycle of the 65536 word values yields every index 65536 // mask times
+    rng = StreamRandom(array('H', range(1 << 16)).tobytes())
+    per_cycle = (1 << 16) >> (n - 1).bit_length()
+    counts = [0] * n
+    for index in rng.indices(n, n * per_cycle):
+        counts[index] += 1
+    assert counts == [per_cycle] * n
+
+
+@pytest.mark.parametrize('alphabet', ["0123456789", "abcdefghijklmnopqrstuvwxyz0123456789!@#"])
+def test_string_has_no_rejection_bias(alphabet):
+    rng = StreamRandom(bytes(range(256)))
+    limit = 256 - 256 % len(alphabet)
+    text = rng.string(alphabet, 2 * limit)
+    assert [text.count(char) for char in alphabet] == [2 * limit // len(alphabet)] * len(alphabet)
+
+
+@pytest.mark.parametrize('n', POOL_SIZES)
+def test_indices_are_uniform(n):
+    total = n * max(20, 2000 // n)
+    counts = [0] * n
+    for index in SeededRandom().indices(n, total):
+        counts[index] += 1
+    assert_uniform(counts, total)
+
+
+@pytest.mark.parametrize('alphabet', [
+    get_profile().chars,
+    "0123456789",
+    "".join(map(chr, range(32, 127))),
+    "αβγδεζηθ",
+])
+def test_string_is_uniform(alphabet):
+    total = len(alphabet) * 500
+    text = SeededRandom().string(alphabet, total)
+    assert_uniform([text.count(char) for char in alphabet], total)
+
+
+def test_randbelow_is_uniform():
+    rng = SeededRandom()
+    counts = [0] * 62
+    total = 62 * 500
+    for _ in range(total):
+        counts[rng.randbelow(62)] += 1
+    assert_uniform(counts, total)
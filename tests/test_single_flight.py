@@ -0,0 +1,104 @@
+"""Coalescing of concurrent identical scoring calls."""
+import threading
+import time
+
+import pytest
+
+import app as padlock
+from single_flight import SingleFlight
+
+CLIENTS = 16
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for callers to queue up")
+        time.sleep(0.001)
+
+
+def run_concurrently(count, target):
+    """Run target(index) in count threads started together; return their results"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(index):
+        barrier.wait()
+        try:
+            results[index] = target(index)
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_duplicates_run_once():
+    flight = SingleFlight()
+    calls = []
+
+    def score(password):
+        calls.append(password)
+        # Hold the call until every other caller is waiting on it
+        wait_for(lambda: flight.waiting(password) == CLIENTS - 1)
+        return {'score': len(calls)}
+
+    results = run_concurrently(CLIENTS, lambda _: flight.run('hunter2', score, 'hunter2'))
+    assert calls == ['hunter2']
+    assert all(result == {'score': 1} for result in results)
+    assert flight.stats() == {'in_flight': 0, 'calls': 1, 'coalesced': CLIENTS - 1}
+
+
+def test_distinct_passwords_are_not_coalesced():
+    flight = SingleFlight()
+    results = run_concurrently(4, lambda i: flight.run(f"password{i}", str.upper, f"password{i}"))
+    assert results == ['PASSWORD0', 'PASSWORD1', 'PASSWORD2', 'PASSWORD3']
+    assert flight.stats()['coalesced'] == 0
+
+
+def test_every_waiter_gets_the_error():
+    flight = SingleFlight()
+
+    def fail(password):
+        wait_for(lambda: flight.waiting(password) == CLIENTS - 1)
+        raise ValueError("scoring failed")
+
+    results = run_concurrently(CLIENTS, lambda _: flight.run('hunter2', fail, 'hunter2'))
+    assert all(isinstance(result, ValueError) for result in results)
+    # Nothing is kept once the call is over, the next one runs again
+    assert flight.run('hunter2', str.upper, 'hunter2') == 'HUNTER2'
+
+
+@pytest.fixture
+def uncached(monkeypatch):
+    """The app with results coming from scoring rather than the cache"""
+    monkeypatch.setattr(padlock, 'strength_cache', None)
+    monkeypatch.setattr(padlock, 'scoring_flight', SingleFlight())
+    monkeypatch.setattr(padlock, 'scoring_executor', None)
+    monkeypatch.setattr(padlock, 'scoring_executor_started', True)
+
+
+def test_concurrent_checks_score_once(uncached, monkeypatch):
+    score_password = padlock.score_password
+    calls = []
+
+    def counting_score(password):
+        calls.append(password)
+        wait_for(lambda: padlock.scoring_flight.waiting(password) == CLIENTS - 1)
+        return score_password(password)
+
+    monkeypatch.setattr(padlock, 'score_password', counting_score)
+
+    def check(_):
+        response = padlock.app.test_client(use_cookies=False).post('/check', json={'password': 'Tr0ub4dor&3'})
+        return response.status_code, response.get_json()
+
+    results = run_concurrently(CLIENTS, check)
+    assert calls == ['Tr0ub4dor&3']
+    assert all(status == 200 for status, _ in results)
+    assert all(body == results[0][1] for _, body in results)